@@ -1,3 +1,3 @@
-from . import models
+from . import models, rag
 
-__all__ = ["models"]
+__all__ = ["models", "rag"]
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 import httpx
+import json
 
 from app.config import settings
+from app.utils.pull_jobs import pull_jobs
+from app.utils.tracing import span
 
 router = APIRouter()
 
@@ -11,7 +15,8 @@ async def list_models():
     """Ollama에서 사용 가능한 모델 목록 조회"""
     try:
         async with httpx.AsyncClient() as client:
-            response = await client.get(f"{settings.OLLAMA_HOST}/api/tags")
+            with span("ollama.tags"):
+                response = await client.get(f"{settings.OLLAMA_HOST}/api/tags")
             response.raise_for_status()
             data = response.json()
 
@@ -36,22 +41,82 @@ async def list_models():
 
 
 @router.post("/{model_name}/pull")
-async def pull_model(model_name: str):
-    """새 모델 다운로드 (Ollama pull)"""
+async def pull_model(model_name: str, wait: bool = False):
+    """
+    새 모델 다운로드 (Ollama pull)
+
+    백그라운드 작업으로 시작하고 바로 202와 작업 정보를 반환합니다.
+    같은 모델이 이미 다운로드 중이면 기존 작업을 반환합니다.
+    wait=true면 완료될 때까지 기다렸다가 결과를 반환합니다 (기존 동작).
+    """
+    job, created = pull_jobs.start(model_name)
+
+    if wait:
+        await pull_jobs.wait(job)
+        if job.state == "error":
+            if isinstance(job.exception, httpx.RequestError):
+                raise HTTPException(status_code=503, detail=f"Ollama 서버에 연결할 수 없습니다: {job.error}")
+            raise HTTPException(status_code=500, detail=job.error)
+        if job.state == "cancelled":
+            raise HTTPException(status_code=503, detail="pull 작업이 취소되었습니다")
+        return {"status": "success", "message": f"{model_name} 모델 다운로드 완료", "job_id": job.id}
+
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job.id,
+            "model": model_name,
+            "state": job.state,
+            "deduplicated": not created,
+            "status_url": f"/api/models/pulls/{job.id}",
+            "events_url": f"/api/models/pulls/{job.id}/events",
+        },
+    )
+
+
+@router.get("/pulls")
+async def list_pull_jobs():
+    """모델 다운로드 작업 목록 (최근 순)"""
+    return {"jobs": [job.snapshot() for job in pull_jobs.list()]}
+
+
+@router.get("/pulls/{job_id}")
+async def get_pull_job(job_id: str):
+    """모델 다운로드 작업 상태 조회"""
+    job = pull_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"작업을 찾을 수 없습니다: {job_id}")
+    return job.snapshot()
+
+
+@router.get("/pulls/{job_id}/events")
+async def stream_pull_job(job_id: str, request: Request):
+    """
+    모델 다운로드 진행률 SSE 스트림
+
+    접속 즉시 현재 상태를 보내고 이후 바뀔 때마다 전송하며, 작업이 끝나면 종료합니다.
+    재접속 시 Last-Event-ID 헤더를 보내면 그 이후 상태부터 이어서 받습니다.
+    """
+    job = pull_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"작업을 찾을 수 없습니다: {job_id}")
     try:
-        async with httpx.AsyncClient(timeout=600.0) as client:
-            response = await client.post(
-                f"{settings.OLLAMA_HOST}/api/pull",
-                json={"name": model_name, "stream": False},
-            )
-            response.raise_for_status()
-            return {"status": "success", "message": f"{model_name} 모델 다운로드 완료"}
-    except httpx.RequestError as e:
-        raise HTTPException(
-            status_code=503, detail=f"Ollama 서버에 연결할 수 없습니다: {str(e)}"
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        last_version = int(request.headers.get("last-event-id", -1))
+    except ValueError:
+        last_version = -1
+
+    async def generate():
+        async for snapshot in pull_jobs.subscribe(job, last_version):
+            yield f"id: {snapshot['version']}\ndata: {json.dumps(snapshot, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        },
+    )
 
 
 @router.get("/{model_name}/info")
@@ -59,9 +124,10 @@ async def get_model_info(model_name: str):
     """특정 모델의 상세 정보 조회"""
     try:
         async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.OLLAMA_HOST}/api/show", json={"name": model_name}
-            )
+            with span("ollama.show", model=model_name):
+                response = await client.post(
+                    f"{settings.OLLAMA_HOST}/api/show", json={"name": model_name}
+                )
             response.raise_for_status()
             return response.json()
     except httpx.RequestError as e:
@@ -0,0 +1,174 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+import json
+
+from app.config import settings
+from app.chains.hedging import hedge_llm
+from app.chains.prompts import build_rag_system_prompt
+from app.chains.rag_chain import get_rag_llm
+from app.chains.rag_stream import get_rag_components, stream_rag_events
+from app.utils import tracing
+from app.utils.deadline import deadline_from_request
+from app.utils.embedding_batcher import batcher_stats
+from app.utils.retrieval_cache import retrieval_cache
+from app.utils.session_router import rank_ollama_hosts
+from app.utils.tracing import span
+
+router = APIRouter()
+
+
+def _sse(data: dict) -> str:
+    return f"data: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@router.post("/chat/stream")
+async def rag_chat_stream(request: Request):
+    """
+    RAG 기반 스트리밍 채팅
+
+    Body:
+        messages: 대화 메시지 (마지막 user 메시지가 질문)
+        model: LLM 모델 (기본값: pipeline.llm_model 또는 OLLAMA_DEFAULT_MODEL)
+        pipeline: create_rag_chain과 같은 키의 RAG 설정 (임베딩, 벡터 DB, top_k 등)
+        debug: 토큰별 디버그 정보와 단계별 워터폴(span) 포함 여부
+        hedge: 첫 토큰 지연 시 다른 Ollama 인스턴스로 헤징 (LLM_HEDGE_ENABLED면 기본 사용)
+        deadline_ms: 응답 지연 예산 (X-Request-Deadline-Ms 헤더가 우선, 없으면 경로 기본값)
+
+    pipeline.llm_fallbacks([{provider, model, endpoint, api_key}])를 주면 그 순서로 헤징/페일오버합니다.
+    """
+    with span("parse_body"):
+        body = await request.json()
+    messages = body.get("messages", [])
+    pipeline = body.get("pipeline") or {}
+    if not isinstance(pipeline, dict):
+        raise HTTPException(status_code=400, detail="pipeline은 객체여야 합니다")
+    model_name = body.get("model") or pipeline.get("llm_model") or settings.OLLAMA_DEFAULT_MODEL
+    debug_mode = body.get("debug", False)
+    trace = tracing.start_recording() if debug_mode else None
+    deadline = deadline_from_request(request, body)
+
+    if not messages or messages[-1].get("role") != "user" or not messages[-1].get("content"):
+        raise HTTPException(status_code=400, detail="마지막 메시지는 user 질문이어야 합니다")
+    question = messages[-1]["content"]
+    history = messages[:-1]
+
+    try:
+        with span("rag_components"):
+            embeddings, vectorstore = get_rag_components(pipeline)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"잘못된 RAG 파이프라인 설정: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"RAG 파이프라인 초기화 실패: {str(e)}")
+
+    llm_provider = pipeline.get("llm_provider", "OLLAMA")
+    llm_endpoint = pipeline.get("llm_endpoint")
+    fallbacks = list(pipeline.get("llm_fallbacks") or [])
+    if not llm_endpoint and llm_provider.upper() == "OLLAMA":
+        # 같은 대화는 같은 Ollama 인스턴스로 보내 KV 캐시 재사용, 나머지 인스턴스는 헤징 후보
+        hosts = rank_ollama_hosts(messages, body.get("session_id"))
+        llm_endpoint = hosts[0]
+        if not fallbacks and body.get("hedge", settings.LLM_HEDGE_ENABLED):
+            fallbacks = [{"endpoint": host} for host in hosts[1:]]
+
+    def make_llm(max_tokens):
+        options = {
+            "temperature": pipeline.get("llm_temperature", 0.7),
+            "max_tokens": max_tokens,
+        }
+        llm = get_rag_llm(
+            provider=llm_provider,
+            model=model_name,
+            endpoint=llm_endpoint,
+            api_key=pipeline.get("llm_api_key"),
+            **options,
+        )
+        if not fallbacks:
+            return llm
+        secondaries = [
+            get_rag_llm(
+                provider=fb.get("provider", llm_provider),
+                model=fb.get("model", model_name),
+                endpoint=fb.get("endpoint"),
+                api_key=fb.get("api_key"),
+                **options,
+            )
+            for fb in fallbacks
+        ]
+        return hedge_llm(llm, secondaries, policy_name=f"{llm_provider.upper()}:{model_name}")
+
+    async def generate():
+        """스트리밍 응답 생성"""
+        token_count = 0
+        async for event in stream_rag_events(
+            question=question,
+            history=history,
+            embeddings=embeddings,
+            vectorstore=vectorstore,
+            make_llm=make_llm,
+            top_k=pipeline.get("top_k", 5),
+            score_threshold=pipeline.get("score_threshold", 0.7),
+            system_prompt=build_rag_system_prompt(llm_provider, pipeline.get("system_prompt")),
+            context_template=pipeline.get("context_template"),
+            max_tokens=pipeline.get("llm_max_tokens", 4096),
+            deadline=deadline,
+        ):
+            if event["type"] == "context":
+                # 검색 완료 이벤트 (단계별 소요 시간 포함)
+                yield _sse({
+                    "type": "rag_context",
+                    "documents": event["documents"],
+                    "timings": event["timings"],
+                    "retrieval_cache": event["retrieval_cache"],
+                })
+            elif event["type"] == "token":
+                token_count += 1
+                event_data = {"content": event["content"]}
+                if debug_mode:
+                    event_data["type"] = "token"
+                    event_data["token_index"] = token_count
+                yield _sse(event_data)
+            else:
+                done_data = {
+                    "done": True,
+                    "full_response": event["full_response"],
+                    "timings": event["timings"],
+                    # deadline으로 검색/생성이 잘렸으면 partial=True
+                    "partial": event["partial"],
+                    "deadline": event["deadline"],
+                }
+                if debug_mode:
+                    done_data["type"] = "graph_end"
+                    done_data["stats"] = {
+                        "total_tokens": event["token_count"],
+                        "total_time_ms": int(event["timings"]["total_ms"]),
+                        "ttft_ms": int(event["timings"].get("ttft_ms", 0)),
+                        "model": model_name,
+                        "node": "rag",
+                    }
+                    if event["hedge"]:
+                        done_data["stats"]["hedge"] = event["hedge"]
+                    if trace is not None:
+                        done_data["trace_id"] = trace.trace_id
+                        done_data["waterfall"] = trace.waterfall()
+                yield _sse(done_data)
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        },
+    )
+
+
+@router.get("/cache/stats")
+async def rag_cache_stats():
+    """검색 결과 캐시 통계 (항목 수, 메모리, 적중률, 무효화/제거 수)"""
+    return {"enabled": settings.RETRIEVAL_CACHE_ENABLED, **retrieval_cache.stats()}
+
+
+@router.get("/embeddings/batch/stats")
+async def embedding_batch_stats():
+    """임베딩 마이크로 배칭 통계 (namespace별 배치 수, 평균 배치 크기, 대기 시간)"""
+    return {"enabled": settings.EMBED_BATCH_ENABLED, "batchers": batcher_stats()}
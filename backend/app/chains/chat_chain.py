@@ -1,3 +1,5 @@
+from typing import Dict, List
+
 from langchain_community.chat_models import ChatOllama
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
@@ -8,6 +10,8 @@ from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.language_models.chat_models import BaseChatModel
 
 from app.config import settings
+from app.chains.hedging import hedge_llm
+from app.chains.prompts import build_system_prompt
 
 
 def get_llm_by_provider(
@@ -28,6 +32,7 @@ def get_llm_by_provider(
             base_url=endpoint or settings.OLLAMA_HOST,
             model=model,
             temperature=temperature,
+            num_predict=max_tokens,
         )
     elif provider == "OPENAI":
         return ChatOpenAI(
@@ -59,6 +64,7 @@ def get_llm_by_provider(
             base_url=settings.OLLAMA_HOST,
             model=model,
             temperature=temperature,
+            num_predict=max_tokens,
         )
 
 
@@ -86,13 +92,7 @@ def create_chat_chain():
 
     prompt = ChatPromptTemplate.from_messages(
         [
-            (
-                "system",
-                "You are a helpful AI assistant. Respond in the same language as the user. "
-                "If the user speaks Korean, respond in Korean. "
-                "Provide clear, concise, and helpful responses. "
-                "/no_think",  # Disable thinking mode for qwen3
-            ),
+            ("system", build_system_prompt("OLLAMA")),  # /no_think: Disable thinking mode for qwen3
             MessagesPlaceholder(variable_name="history"),
             ("human", "{input}"),
         ]
@@ -129,6 +129,7 @@ def create_dynamic_chat_chain(
     temperature: float = 0.7,
     max_tokens: int = 4096,
     system_prompt: str = None,
+    fallbacks: List[Dict] = None,
 ):
     """
     동적 프로바이더를 지원하는 채팅 체인 생성
@@ -141,6 +142,8 @@ def create_dynamic_chat_chain(
         temperature: 온도 파라미터
         max_tokens: 최대 토큰 수
         system_prompt: 시스템 프롬프트 (선택)
+        fallbacks: 헤징/페일오버용 보조 LLM 설정 목록 (선택)
+            [{"provider": ..., "model": ..., "endpoint": ..., "api_key": ...}]
     """
     llm = get_llm_by_provider(
         provider=provider,
@@ -150,19 +153,25 @@ def create_dynamic_chat_chain(
         temperature=temperature,
         max_tokens=max_tokens,
     )
+    if fallbacks:
+        llm = hedge_llm(
+            llm,
+            [
+                get_llm_by_provider(
+                    provider=fb.get("provider", provider),
+                    model=fb.get("model", model),
+                    endpoint=fb.get("endpoint"),
+                    api_key=fb.get("api_key"),
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
+                for fb in fallbacks
+            ],
+            policy_name=f"{provider.upper()}:{model}:{endpoint or ''}",
+        )
 
-    # 시스템 프롬프트 설정
-    default_system_prompt = (
-        "You are a helpful AI assistant. Respond in the same language as the user. "
-        "If the user speaks Korean, respond in Korean. "
-        "Provide clear, concise, and helpful responses."
-    )
-
-    # Ollama의 경우 /no_think 추가
-    if provider.upper() == "OLLAMA":
-        system_msg = (system_prompt or default_system_prompt) + " /no_think"
-    else:
-        system_msg = system_prompt or default_system_prompt
+    # 시스템 프롬프트 설정 (Ollama의 경우 /no_think 추가)
+    system_msg = build_system_prompt(provider, system_prompt)
 
     prompt = ChatPromptTemplate.from_messages(
         [
@@ -0,0 +1,327 @@
+"""
+LLM 요청 헤징(hedging)과 빠른 페일오버
+
+주 LLM의 첫 토큰이 지연 기준(고정값 또는 관측된 TTFT p95)까지 오지 않으면
+같은 요청을 보조 프로바이더/엔드포인트에도 보내고, 먼저 스트리밍을 시작한 쪽을 사용하며 나머지는 취소합니다.
+- 첫 토큰 전에 오류가 나면 지연을 기다리지 않고 바로 다음 후보로 페일오버
+- 예산: 요청마다 budget_ratio만큼 토큰이 쌓이고 헤지 1회에 1개 사용 (추가 부하 상한)
+- 통계: 요청 수, 헤지 수/비율, 보조 승리 수, 예산 부족, 페일오버
+
+비동기 경로(astream/ainvoke)에서만 헤징합니다. 동기 호출은 주 LLM을 쓰고 오류 시에만 페일오버합니다.
+"""
+
+import asyncio
+import threading
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableConfig, ensure_config
+
+from app.config import settings
+
+
+class HedgePolicy:
+    """
+    헤지 지연 기준과 예산, 통계 (같은 주 LLM을 쓰는 요청끼리 공유)
+
+    지연 기준은 주 LLM의 최근 TTFT 분포의 percentile을 쓰고, 표본이 부족하면 delay_ms를 씁니다.
+    TTFT 표본은 주 LLM이 첫 토큰을 보낸 요청에서만 기록합니다.
+    """
+
+    def __init__(
+        self,
+        delay_ms: float = 2000.0,
+        percentile: float = 95.0,
+        min_samples: int = 20,
+        window: int = 200,
+        budget_ratio: float = 0.1,
+        burst: float = 5.0,
+    ):
+        self.delay_ms = delay_ms
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.budget_ratio = budget_ratio
+        self.burst = burst
+        self._ttfts = deque(maxlen=window)
+        self._tokens = burst
+        self._lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "hedged": 0,
+            "secondary_wins": 0,
+            "budget_denied": 0,
+            "failovers": 0,
+            "errors": 0,
+        }
+
+    def current_delay_ms(self) -> float:
+        with self._lock:
+            samples = sorted(self._ttfts)
+        if len(samples) < self.min_samples:
+            return self.delay_ms
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        return samples[index]
+
+    def record_ttft(self, ttft_ms: float):
+        with self._lock:
+            self._ttfts.append(ttft_ms)
+
+    def on_request(self):
+        with self._lock:
+            self.stats["requests"] += 1
+            self._tokens = min(self.burst, self._tokens + self.budget_ratio)
+
+    def try_hedge(self) -> bool:
+        """예산이 남아 있으면 1개 사용하고 True"""
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                self.stats["hedged"] += 1
+                return True
+            self.stats["budget_denied"] += 1
+            return False
+
+    def count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            samples = len(self._ttfts)
+            tokens = self._tokens
+        requests = stats["requests"] or 1
+        return {
+            **stats,
+            "hedge_rate": round(stats["hedged"] / requests, 4),
+            "secondary_win_rate": round(stats["secondary_wins"] / stats["hedged"], 4) if stats["hedged"] else 0.0,
+            "delay_ms": round(self.current_delay_ms(), 2),
+            "ttft_samples": samples,
+            "budget_tokens": round(tokens, 2),
+        }
+
+
+_policies: Dict[str, HedgePolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def get_hedge_policy(name: str) -> HedgePolicy:
+    """이름별 공유 정책 (설정 기본값으로 생성)"""
+    with _policies_lock:
+        policy = _policies.get(name)
+        if policy is None:
+            policy = _policies[name] = HedgePolicy(
+                delay_ms=settings.LLM_HEDGE_DELAY_MS,
+                percentile=settings.LLM_HEDGE_PERCENTILE,
+                budget_ratio=settings.LLM_HEDGE_BUDGET,
+            )
+        return policy
+
+
+def hedge_stats() -> Dict[str, Dict]:
+    """정책별 헤징 통계"""
+    with _policies_lock:
+        policies = dict(_policies)
+    return {name: policy.snapshot() for name, policy in policies.items()}
+
+
+_DONE = object()
+
+# astream 호출자의 config (BaseChatModel.astream은 _astream에 run_manager를 넘기지 않음)
+_caller_config: ContextVar[Optional[RunnableConfig]] = ContextVar("hedge_caller_config", default=None)
+
+
+def _candidate_config(run_manager, index: int) -> RunnableConfig:
+    """
+    후보 모델 호출 config
+
+    후보를 공개 astream/invoke로 호출해 후보 모델의 콜백(트레이싱, 토큰)이 실행으로 기록되게 합니다.
+    run_manager가 있으면(ainvoke/invoke) 헤징 실행의 하위 실행으로, 없으면(astream) 호출자 콜백으로 기록합니다.
+    """
+    tag = f"hedge:{index}"
+    if run_manager is not None:
+        return {"callbacks": run_manager.get_child(tag)}
+    config = {key: value for key, value in ensure_config(_caller_config.get()).items() if key not in ("run_id", "run_name")}
+    config["tags"] = [*config.get("tags", []), tag]
+    return config
+
+
+class HedgedChatModel(BaseChatModel):
+    """주 LLM + 보조 LLM 목록을 감싸는 헤징 채팅 모델"""
+
+    primary: BaseChatModel
+    secondaries: List[BaseChatModel]
+    policy: Any  # HedgePolicy
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged-chat"
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator:
+        token = _caller_config.set(config)
+        try:
+            async for chunk in super().astream(input, config, **kwargs):
+                yield chunk
+        finally:
+            try:
+                _caller_config.reset(token)
+            except ValueError:
+                pass  # 다른 context에서 닫힌 경우 (가비지 컬렉션 등)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        policy: HedgePolicy = self.policy
+        candidates = [self.primary, *self.secondaries]
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks: List[asyncio.Task] = []
+        launched_at: List[float] = []
+        loop = asyncio.get_running_loop()
+
+        def launch(index: int):
+            async def pump():
+                config = _candidate_config(run_manager, index)
+                try:
+                    async for message in candidates[index].astream(messages, config=config, stop=stop, **kwargs):
+                        chunk = ChatGenerationChunk(message=message, generation_info=dict(message.response_metadata) or None)
+                        await queue.put((index, chunk, None))
+                    await queue.put((index, _DONE, None))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    await queue.put((index, None, e))
+
+            launched_at.append(loop.time())
+            tasks.append(asyncio.create_task(pump()))
+
+        policy.on_request()
+        delay = policy.current_delay_ms() / 1000
+        launch(0)
+        hedge_at = launched_at[0] + delay
+        failed: Dict[int, Exception] = {}
+        winner = None
+        first = None
+        hedged = False
+
+        try:
+            # 첫 청크를 먼저 보낸 후보를 승자로 선택
+            while winner is None:
+                timeout = None
+                if len(tasks) < len(candidates) and hedge_at is not None:
+                    timeout = max(0.0, hedge_at - loop.time())
+                try:
+                    index, item, error = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    if policy.try_hedge():
+                        hedged = True
+                        launch(len(tasks))
+                        hedge_at = loop.time() + delay
+                    else:
+                        hedge_at = None
+                    continue
+
+                if error is not None or item is _DONE:
+                    # 첫 청크 전에 실패(또는 빈 응답) → 다음 후보로 즉시 페일오버
+                    failed[index] = error or RuntimeError("empty response")
+                    if len(tasks) < len(candidates):
+                        policy.count("failovers")
+                        launch(len(tasks))
+                    elif len(failed) == len(tasks):
+                        policy.count("errors")
+                        raise failed[0]
+                    continue
+
+                winner, first = index, item
+
+            if winner == 0:
+                policy.record_ttft((loop.time() - launched_at[0]) * 1000)
+            elif hedged and 0 not in failed:
+                # 주 LLM의 TTFT는 관측되지 않았으므로(하한값일 뿐) 표본에 넣지 않음
+                # (넣으면 p95가 요청마다 밀려 올라감)
+                policy.count("secondary_wins")
+            for index, task in enumerate(tasks):
+                if index != winner:
+                    task.cancel()
+
+            first.generation_info = {
+                **(first.generation_info or {}),
+                "hedge": {"winner": winner, "hedged": hedged, "candidates": len(tasks)},
+            }
+            if run_manager:
+                await run_manager.on_llm_new_token(first.text, chunk=first)
+            yield first
+
+            while True:
+                index, item, error = await queue.get()
+                if index != winner:
+                    continue
+                if error is not None:
+                    raise error
+                if item is _DONE:
+                    return
+                if run_manager:
+                    await run_manager.on_llm_new_token(item.text, chunk=item)
+                yield item
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        result: Optional[ChatGenerationChunk] = None
+        async for chunk in self._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+            result = chunk if result is None else result + chunk
+        if result is None:
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=""))])
+        return ChatResult(generations=[
+            ChatGeneration(
+                message=AIMessage(
+                    content=result.message.content,
+                    response_metadata=result.generation_info or {},
+                ),
+                generation_info=result.generation_info,
+            )
+        ])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # 동기 경로: 헤징 없이 순서대로 시도 (오류 시 페일오버)
+        self.policy.on_request()
+        for index, llm in enumerate([self.primary, *self.secondaries]):
+            config = _candidate_config(run_manager, index)
+            try:
+                message = llm.invoke(messages, config=config, stop=stop, **kwargs)
+                return ChatResult(generations=[ChatGeneration(message=message)])
+            except Exception:
+                if index == len(self.secondaries):
+                    self.policy.count("errors")
+                    raise
+                self.policy.count("failovers")
+        raise RuntimeError("no candidates")
+
+
+def hedge_llm(primary: BaseChatModel, secondaries: List[BaseChatModel], policy_name: str) -> BaseChatModel:
+    """보조 LLM이 있으면 헤징 모델로 감싸서 반환"""
+    if not secondaries:
+        return primary
+    return HedgedChatModel(primary=primary, secondaries=secondaries, policy=get_hedge_policy(policy_name))
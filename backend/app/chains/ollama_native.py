@@ -0,0 +1,146 @@
+"""
+Ollama /api/chat 직접 스트리밍 (LangChain을 거치지 않는 fast path)
+
+ChatOllama.astream은 토큰마다 메시지 청크 객체와 콜백을 만들기 때문에, 스트리밍 엔드포인트에서는
+같은 요청을 /api/chat에 직접 보내고 NDJSON 줄을 읽는 즉시 토큰 문자열만 넘깁니다.
+- 연결: 호스트별로 공유하는 httpx.AsyncClient (keep-alive 연결 풀, 앱 종료 시 close_clients)
+- 파싱: 받은 바이트를 줄 단위로 잘라 json.loads (줄이 여러 청크에 걸쳐도 처리)
+- 마지막 줄(done)의 시간 정보(load/prompt_eval/eval)는 info에 담아 통계/트레이싱에 사용
+- 오류: HTTP 오류는 httpx.HTTPStatusError, 스트림 안의 {"error": ...}는 ValueError
+
+헤징(HedgedChatModel)과 LangChain 콜백은 거치지 않으므로, 헤징이 켜진 요청은 기존 경로를 씁니다.
+"""
+
+import json
+import threading
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+from langchain_core.messages import BaseMessage
+
+from app.config import settings
+from app.utils import tracing
+
+
+_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+# done 줄에서 통계로 남길 필드
+_DONE_FIELDS = (
+    "total_duration", "load_duration", "prompt_eval_count",
+    "prompt_eval_duration", "eval_count", "eval_duration", "done_reason",
+)
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url: str) -> httpx.AsyncClient:
+    """호스트별 공유 클라이언트 (연결 재사용)"""
+    client = _clients.get(base_url)
+    if client is not None and not client.is_closed:
+        return client
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None or client.is_closed:
+            client = _clients[base_url] = httpx.AsyncClient(
+                base_url=base_url,
+                # 생성 중 토큰 사이 간격은 길어질 수 있으므로 read timeout은 두지 않음
+                timeout=httpx.Timeout(settings.OLLAMA_FAST_STREAM_CONNECT_TIMEOUT, read=None),
+                limits=httpx.Limits(
+                    max_connections=settings.OLLAMA_FAST_STREAM_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OLLAMA_FAST_STREAM_MAX_CONNECTIONS,
+                ),
+            )
+    return client
+
+
+async def close_clients():
+    """공유 클라이언트 연결 종료"""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def to_ollama_messages(messages: List[BaseMessage]) -> List[Dict[str, str]]:
+    """LangChain 메시지를 /api/chat messages 형식으로"""
+    converted = []
+    for message in messages:
+        role = _ROLES.get(message.type) or getattr(message, "role", "user")
+        content = message.content
+        if not isinstance(content, str):
+            content = "".join(
+                part if isinstance(part, str) else part.get("text", "")
+                for part in content
+            )
+        converted.append({"role": role, "content": content})
+    return converted
+
+
+async def _ndjson_lines(response: httpx.Response) -> AsyncIterator[bytes]:
+    """받은 바이트를 줄 단위로 (마지막 줄에 줄바꿈이 없어도 반환)"""
+    buffer = b""
+    async for data in response.aiter_bytes():
+        buffer += data
+        if b"\n" not in data:
+            continue
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+async def stream_chat(
+    base_url: str,
+    model: str,
+    messages: List[BaseMessage],
+    options: Dict = None,
+    info: Optional[Dict] = None,
+) -> AsyncIterator[str]:
+    """
+    /api/chat 스트림에서 토큰 문자열만 차례로 반환
+
+    Args:
+        options: Ollama options (temperature, num_predict 등, None 값은 제외)
+        info: 전달하면 마지막 줄의 시간/토큰 수 정보를 채움
+    """
+    payload = {
+        "model": model,
+        "messages": to_ollama_messages(messages),
+        "stream": True,
+        "options": {key: value for key, value in (options or {}).items() if value is not None},
+    }
+    llm_span = tracing.open_span("ollama.chat", model=model, path="native")
+    done: Dict = {}
+    first_token = True
+    try:
+        async with get_client(base_url).stream("POST", "/api/chat", json=payload) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                response.raise_for_status()
+            async for line in _ndjson_lines(response):
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise ValueError(f"Ollama 오류: {chunk['error']}")
+                content = chunk.get("message", {}).get("content")
+                if content:
+                    if first_token and llm_span is not None:
+                        llm_span.set(ttft_ms=round((time.time_ns() - llm_span.start_ns) / 1e6, 2))
+                    first_token = False
+                    yield content
+                if chunk.get("done"):
+                    done = {key: chunk[key] for key in _DONE_FIELDS if key in chunk}
+                    return
+    except Exception as e:
+        if llm_span is not None:
+            llm_span.set(error=type(e).__name__)
+        raise
+    finally:
+        if info is not None:
+            info.update(done)
+        tracing.close_llm_span(llm_span, done)
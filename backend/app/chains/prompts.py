@@ -0,0 +1,99 @@
+"""
+KV 캐시 친화적 프롬프트 조립
+
+로컬 llama.cpp/Ollama는 새 프롬프트의 앞부분(prefix)이 직전 프롬프트와 같으면
+그만큼 KV 캐시를 재사용하고 prefill을 건너뜁니다. 이를 위해:
+- 시스템 프롬프트는 모든 경로(그래프, 스트리밍, LangServe 체인)에서 바이트 단위로 같은 상수 사용
+- 대화 히스토리는 받은 그대로 이어붙여 턴이 지나도 앞부분이 바뀌지 않게 유지
+- 검색 컨텍스트, 타임스탬프 같은 휘발성 내용은 히스토리와 질문 뒤에 별도 메시지로 배치
+"""
+
+from typing import List, Sequence
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+
+# 기본 채팅 시스템 프롬프트 (모든 채팅 경로 공통)
+CHAT_SYSTEM_PROMPT = (
+    "You are a helpful AI assistant. "
+    "Respond in the same language as the user. "
+    "If the user speaks Korean, respond in Korean. "
+    "Provide clear, concise, and helpful responses."
+)
+
+# qwen3 thinking 모드 비활성화 (Ollama 전용)
+NO_THINK_SUFFIX = " /no_think"
+
+# RAG 시스템 프롬프트 (히스토리 포함)
+RAG_SYSTEM_PROMPT = """You are a helpful AI assistant.
+Answer the question based on the provided context and conversation history.
+If you cannot find the answer in the context, say so.
+Respond in the same language as the user's question."""
+
+# 질문 뒤에 붙는 검색 컨텍스트 메시지
+RAG_CONTEXT_TEMPLATE = """Context:
+{context}
+
+Answer the question above based on this context."""
+
+
+def build_system_prompt(provider: str = "OLLAMA", system_prompt: str = None) -> str:
+    """
+    프로바이더별 시스템 프롬프트 (같은 입력이면 항상 같은 바이트열)
+    """
+    text = system_prompt or CHAT_SYSTEM_PROMPT
+    if provider.upper() == "OLLAMA" and not text.endswith(NO_THINK_SUFFIX):
+        text += NO_THINK_SUFFIX
+    return text
+
+
+def assemble_chat_messages(
+    messages: Sequence[BaseMessage],
+    system_prompt: str,
+) -> List[BaseMessage]:
+    """
+    [시스템] + 히스토리 순서로 메시지 조립
+
+    클라이언트가 첫 메시지로 시스템 메시지를 보냈으면 그것을 그대로 사용합니다.
+    """
+    messages = list(messages)
+    if not messages or not isinstance(messages[0], SystemMessage):
+        messages.insert(0, SystemMessage(content=system_prompt))
+    return messages
+
+
+def build_rag_system_prompt(provider: str = "OLLAMA", system_prompt: str = None) -> str:
+    """RAG 경로 공통 시스템 프롬프트 (기본값 RAG_SYSTEM_PROMPT)"""
+    return build_system_prompt(provider, system_prompt or RAG_SYSTEM_PROMPT)
+
+
+def assemble_rag_messages(
+    system_prompt: str,
+    history: Sequence[BaseMessage],
+    question: str,
+    context: str,
+    volatile: Sequence[str] = (),
+    context_template: str = None,
+) -> List[BaseMessage]:
+    """
+    [시스템] + 히스토리 + 질문 + [컨텍스트 + 휘발성 내용] 순서로 메시지 조립
+
+    질문은 다음 턴의 히스토리에 들어갈 모습 그대로 단독 메시지로 두고,
+    매번 바뀌는 컨텍스트는 그 뒤에 붙여 다음 턴에서 질문까지 KV 캐시가 재사용되게 합니다.
+    사용자 지정 context_template({context}, {question})을 주면 질문과 컨텍스트를 한 메시지에 담습니다.
+    """
+    if context_template:
+        return [
+            SystemMessage(content=system_prompt),
+            *history,
+            HumanMessage(content=context_template.format(context=context, question=question)),
+        ]
+    trailing = RAG_CONTEXT_TEMPLATE.format(context=context)
+    if volatile:
+        trailing += "\n\n" + "\n".join(volatile)
+    return [
+        SystemMessage(content=system_prompt),
+        *history,
+        HumanMessage(content=question),
+        HumanMessage(content=trailing),
+    ]
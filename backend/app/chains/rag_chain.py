@@ -2,7 +2,7 @@
 RAG (Retrieval-Augmented Generation) Chain
 
 이 파일은 RAG 파이프라인을 구현합니다.
-- 문서 로딩 및 파싱
+- 문서 로딩 및 파싱 (app.loaders.document_loader)
 - 청킹 (텍스트 분할)
 - 임베딩 생성
 - 벡터 저장소 관리
@@ -10,15 +10,17 @@ RAG (Retrieval-Augmented Generation) Chain
 - LLM 응답 생성
 """
 
-from typing import List, Optional, Dict, Any
+import os
+from operator import itemgetter
+from itertools import islice
+from typing import Iterable, List, Optional, Dict, Any, Union
 from langchain_community.chat_models import ChatOllama
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_anthropic import ChatAnthropic
 from langchain_community.embeddings import OllamaEmbeddings
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough, RunnableParallel
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough, RunnableParallel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain_core.documents import Document
 from langchain_text_splitters import (
     RecursiveCharacterTextSplitter,
@@ -30,6 +32,12 @@ from langchain_text_splitters import (
 )
 
 from app.config import settings
+from app.chains.prompts import assemble_rag_messages, build_rag_system_prompt
+from app.chains.semantic_splitter import SemanticTextSplitter
+from app.utils.embedding_batcher import batch_embeddings
+from app.utils.embedding_cache import CachedEmbeddings
+from app.utils.retrieval_cache import CachedRetriever, cache_enabled_for, collection_key, retrieval_cache
+from app.vectorstores.sharded_store import ShardedVectorStore, shard_collection_names
 
 
 def get_embeddings(
@@ -37,10 +45,32 @@ def get_embeddings(
     model_name: str,
     endpoint: str = None,
     api_key: str = None,
+    cache: bool = False,
+    batch: bool = None,
 ):
     """
     임베딩 프로바이더에 따라 적절한 임베딩 인스턴스 생성
+
+    cache=True이면 같은 프로바이더/모델끼리 공유하는 LRU 캐시를 거칩니다.
+    batch=True(기본값 EMBED_BATCH_ENABLED)이면 동시 호출을 모아 배치로 요청합니다 (Ollama, OpenAI 호환).
     """
+    namespace = f"{provider.upper()}:{model_name}:{endpoint or ''}"
+    if cache:
+        return CachedEmbeddings(
+            get_embeddings(provider, model_name, endpoint=endpoint, api_key=api_key, batch=batch),
+            namespace=namespace,
+        )
+    if batch is None:
+        batch = settings.EMBED_BATCH_ENABLED
+    if batch:
+        return batch_embeddings(
+            get_embeddings(provider, model_name, endpoint=endpoint, api_key=api_key, batch=False),
+            namespace=namespace,
+            max_batch_size=settings.EMBED_BATCH_MAX_SIZE,
+            max_wait_ms=settings.EMBED_BATCH_MAX_WAIT_MS,
+            max_concurrent_batches=settings.EMBED_BATCH_MAX_CONCURRENT,
+        )
+
     provider = provider.upper()
 
     if provider == "OLLAMA":
@@ -76,9 +106,12 @@ def get_text_splitter(
     chunk_size: int = 1000,
     chunk_overlap: int = 200,
     separators: List[str] = None,
+    embeddings=None,
 ):
     """
     청킹 전략에 따라 적절한 텍스트 분할기 생성
+
+    SEMANTIC 전략은 문장 임베딩에 사용할 embeddings가 필요합니다.
     """
     strategy = strategy.upper()
 
@@ -95,10 +128,13 @@ def get_text_splitter(
             separators=separators or ["\n\n", "\n", " ", ""],
         )
     elif strategy == "SEMANTIC":
-        # 시맨틱 분할은 추가 설정 필요
-        return RecursiveCharacterTextSplitter(
+        if embeddings is None:
+            raise ValueError("SEMANTIC 청킹에는 embeddings가 필요합니다")
+        # 시맨틱 청크끼리는 겹치지 않으므로 overlap은 긴 단일 문장 분할에만 사용
+        return SemanticTextSplitter(
+            embeddings=embeddings,
             chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
+            chunk_overlap=min(chunk_overlap, chunk_size // 2),
         )
     elif strategy == "MARKDOWN":
         headers_to_split_on = [
@@ -127,16 +163,71 @@ def get_text_splitter(
         )
 
 
+# 같은 프로세스 안에서 검색하는 벡터 저장소 (샤드 동시 검색 수를 CPU 코어 수로 제한)
+_LOCAL_DB_TYPES = ("CHROMA", "FAISS", "QUANTIZED")
+
+
 def get_vector_store(
     db_type: str,
     embeddings,
-    collection_name: str = "default",
+    collection_name: Union[str, List[str]] = "default",
     connection_url: str = None,
     settings_dict: Dict = None,
 ):
     """
     벡터 데이터베이스 타입에 따라 적절한 벡터 저장소 생성
+
+    검색 결과 캐시가 같은 컬렉션을 가리키는 인스턴스끼리 무효화를 공유하도록 컬렉션 키를 붙입니다.
+
+    collection_name이 여러 컬렉션(목록 또는 쉼표 구분)이거나 settings_dict["shards"]가 2 이상이면
+    각 컬렉션을 샤드로 묶은 ShardedVectorStore를 반환합니다.
+    (settings_dict["shard_key"]: 쓰기 라우팅 메타데이터 키, settings_dict["shard_timeout"]: 샤드 검색 제한 시간,
+    settings_dict["shard_parallel"]: 동시에 검색할 샤드 수)
     """
+    settings_dict = settings_dict or {}
+    shard_names = shard_collection_names(collection_name, settings_dict.get("shards"))
+    if shard_names is not None:
+        shard_settings = {
+            key: value for key, value in settings_dict.items()
+            if key not in ("shards", "shard_key", "shard_timeout", "shard_parallel")
+        }
+        shards = {
+            name: get_vector_store(db_type, embeddings, name, connection_url, shard_settings)
+            for name in shard_names
+        }
+        if any(shard is None for shard in shards.values()):
+            raise ValueError(f"{db_type}은(는) 샤드 컬렉션을 지원하지 않습니다")
+        parallel = settings_dict.get("shard_parallel") or settings.SHARD_SEARCH_PARALLEL
+        if not parallel and db_type in _LOCAL_DB_TYPES:
+            # 같은 프로세스에서 CPU로 검색하므로 코어 수보다 많이 동시에 돌리면 서로 느려짐
+            parallel = os.cpu_count() or 1
+        vectorstore = ShardedVectorStore(
+            shards,
+            embeddings,
+            shard_key=settings_dict.get("shard_key"),
+            shard_timeout=settings_dict.get("shard_timeout"),
+            max_parallel=parallel or None,
+        )
+        vectorstore._retrieval_cache_key = "SHARDS:" + "|".join(collection_key(shard) for shard in shards.values())
+        return vectorstore
+
+    vectorstore = _create_vector_store(db_type, embeddings, collection_name, connection_url, settings_dict)
+    if vectorstore is not None:
+        location = connection_url or settings_dict.get("persist_directory", "")
+        try:
+            vectorstore._retrieval_cache_key = f"{db_type.upper()}:{location}:{collection_name}"
+        except (AttributeError, ValueError):
+            pass  # 속성을 막는 저장소는 인스턴스 단위 키 사용
+    return vectorstore
+
+
+def _create_vector_store(
+    db_type: str,
+    embeddings,
+    collection_name: str = "default",
+    connection_url: str = None,
+    settings_dict: Dict = None,
+):
     db_type = db_type.upper()
 
     if db_type == "CHROMA":
@@ -157,6 +248,17 @@ def get_vector_store(
             collection_name=collection_name,
             connection=connection_url,
         )
+    elif db_type == "QUANTIZED":
+        # 로컬 memmap 기반 int8/binary 양자화 저장소 (대용량 컬렉션의 메모리 절감용)
+        from app.vectorstores.quantized_store import QuantizedVectorStore
+        settings_dict = settings_dict or {}
+        return QuantizedVectorStore(
+            embedding=embeddings,
+            persist_directory=settings_dict.get("persist_directory", "./quantized_db"),
+            collection_name=collection_name,
+            quantization=settings_dict.get("quantization", "int8"),
+            rescore_factor=settings_dict.get("rescore_factor", 4),
+        )
     elif db_type == "QDRANT":
         from langchain_qdrant import Qdrant
         from qdrant_client import QdrantClient
@@ -174,11 +276,89 @@ def get_vector_store(
         )
 
 
+def get_rag_llm(
+    provider: str,
+    model: str,
+    endpoint: str = None,
+    api_key: str = None,
+    temperature: float = 0.7,
+    max_tokens: int = 4096,
+):
+    """
+    RAG 응답 생성용 LLM 인스턴스 생성
+    """
+    provider = provider.upper()
+    if provider == "OLLAMA":
+        return ChatOllama(
+            base_url=endpoint or settings.OLLAMA_HOST,
+            model=model,
+            temperature=temperature,
+            num_predict=max_tokens,
+        )
+    elif provider == "OPENAI":
+        return ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            api_key=api_key,
+            base_url=endpoint if endpoint else None,
+        )
+    elif provider == "ANTHROPIC":
+        return ChatAnthropic(
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            api_key=api_key,
+        )
+    else:
+        return ChatOllama(
+            base_url=settings.OLLAMA_HOST,
+            model=model,
+            temperature=temperature,
+            num_predict=max_tokens,
+        )
+
+
+def get_retriever(vectorstore, top_k: int = 5, score_threshold: float = 0.7):
+    """
+    similarity_score_threshold 리트리버 생성 (캐시를 쓸 수 있는 저장소는 검색 결과 캐시 적용)
+    """
+    if cache_enabled_for(vectorstore):
+        return CachedRetriever(vectorstore=vectorstore, k=top_k, score_threshold=score_threshold)
+    return vectorstore.as_retriever(
+        search_type="similarity_score_threshold",
+        search_kwargs={
+            "k": top_k,
+            "score_threshold": score_threshold,
+        },
+    )
+
+
 def format_docs(docs: List[Document]) -> str:
     """검색된 문서들을 문자열로 포맷팅"""
     return "\n\n".join(doc.page_content for doc in docs)
 
 
+def rag_prompt(provider: str = "OLLAMA", system_prompt: str = None, context_template: str = None) -> RunnableLambda:
+    """
+    {"question", "context", "history"(선택)} 입력을 RAG 메시지 목록으로 바꾸는 Runnable
+
+    모든 RAG 경로가 같은 시스템 프롬프트와 메시지 배치(prompts.assemble_rag_messages)를 쓰도록 합니다.
+    """
+    system = build_rag_system_prompt(provider, system_prompt)
+
+    def to_messages(inputs: Dict) -> List[BaseMessage]:
+        return assemble_rag_messages(
+            system,
+            inputs.get("history", []),
+            inputs["question"],
+            inputs["context"],
+            context_template=context_template,
+        )
+
+    return RunnableLambda(to_messages)
+
+
 def create_rag_chain(
     # 임베딩 설정
     embedding_provider: str = "OLLAMA",
@@ -187,7 +367,7 @@ def create_rag_chain(
     embedding_api_key: str = None,
     # 벡터 DB 설정
     vectordb_type: str = "CHROMA",
-    vectordb_collection: str = "default",
+    vectordb_collection: Union[str, List[str]] = "default",
     vectordb_url: str = None,
     vectordb_settings: Dict = None,
     # 청킹 설정
@@ -229,61 +409,20 @@ def create_rag_chain(
     )
 
     # 리트리버 생성
-    retriever = vectorstore.as_retriever(
-        search_type="similarity_score_threshold",
-        search_kwargs={
-            "k": top_k,
-            "score_threshold": score_threshold,
-        },
-    )
+    retriever = get_retriever(vectorstore, top_k, score_threshold)
 
     # LLM 생성
-    llm_provider = llm_provider.upper()
-    if llm_provider == "OLLAMA":
-        llm = ChatOllama(
-            base_url=llm_endpoint or settings.OLLAMA_HOST,
-            model=llm_model,
-            temperature=llm_temperature,
-        )
-    elif llm_provider == "OPENAI":
-        llm = ChatOpenAI(
-            model=llm_model,
-            temperature=llm_temperature,
-            max_tokens=llm_max_tokens,
-            api_key=llm_api_key,
-            base_url=llm_endpoint if llm_endpoint else None,
-        )
-    elif llm_provider == "ANTHROPIC":
-        llm = ChatAnthropic(
-            model=llm_model,
-            temperature=llm_temperature,
-            max_tokens=llm_max_tokens,
-            api_key=llm_api_key,
-        )
-    else:
-        llm = ChatOllama(
-            base_url=settings.OLLAMA_HOST,
-            model=llm_model,
-            temperature=llm_temperature,
-        )
-
-    # 기본 시스템 프롬프트
-    default_system_prompt = """You are a helpful AI assistant.
-Answer the question based on the provided context.
-If you cannot find the answer in the context, say so.
-Respond in the same language as the user's question."""
-
-    # 기본 컨텍스트 템플릿
-    default_context_template = """Context:
-{context}
-
-Question: {question}"""
+    llm = get_rag_llm(
+        provider=llm_provider,
+        model=llm_model,
+        endpoint=llm_endpoint,
+        api_key=llm_api_key,
+        temperature=llm_temperature,
+        max_tokens=llm_max_tokens,
+    )
 
-    # 프롬프트 템플릿 생성
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt or default_system_prompt),
-        ("human", context_template or default_context_template),
-    ])
+    # 프롬프트 (스트리밍/히스토리 경로와 같은 메시지 배치)
+    prompt = rag_prompt(llm_provider, system_prompt, context_template)
 
     # RAG 체인 구성
     rag_chain = (
@@ -322,26 +461,31 @@ def create_rag_chain_with_history(
                     formatted.append(AIMessage(content=content))
         return formatted
 
-    # 히스토리가 있는 프롬프트
-    system_prompt = kwargs.get("system_prompt") or """You are a helpful AI assistant.
-Answer the question based on the provided context and conversation history.
-If you cannot find the answer in the context, say so.
-Respond in the same language as the user's question."""
+    # 히스토리가 있는 프롬프트 (질문 뒤에 컨텍스트, assemble_rag_messages 참고)
+    prompt_with_history = rag_prompt(
+        kwargs.get("llm_provider", "OLLAMA"),
+        kwargs.get("system_prompt"),
+        kwargs.get("context_template"),
+    )
 
-    prompt_with_history = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
-        MessagesPlaceholder(variable_name="history"),
-        ("human", "Context:\n{context}\n\nQuestion: {question}"),
-    ])
+    retriever = get_retriever(vectorstore, kwargs.get("top_k", 5), kwargs.get("score_threshold", 0.7))
+    llm = get_rag_llm(
+        provider=kwargs.get("llm_provider", "OLLAMA"),
+        model=kwargs.get("llm_model", "llama3"),
+        endpoint=kwargs.get("llm_endpoint"),
+        api_key=kwargs.get("llm_api_key"),
+        temperature=kwargs.get("llm_temperature", 0.7),
+        max_tokens=kwargs.get("llm_max_tokens", 4096),
+    )
 
     # 히스토리 포함 체인
     rag_chain_with_history = (
         RunnablePassthrough.assign(
             history=format_history,
-            context=lambda x: vectorstore.as_retriever().invoke(x["question"]) | format_docs,
+            context=itemgetter("question") | retriever | format_docs,
         )
         | prompt_with_history
-        | base_chain.last  # LLM
+        | llm
         | StrOutputParser()
     )
 
@@ -350,17 +494,43 @@ Respond in the same language as the user's question."""
 
 # 문서 인덱싱 함수
 def index_documents(
-    documents: List[Document],
+    documents: Iterable[Document],
     vectorstore,
     text_splitter,
+    batch_size: int = 64,
+    shard_key: str = None,
 ) -> int:
     """
     문서들을 청킹하고 벡터 저장소에 인덱싱
-    """
-    # 청킹
-    chunks = text_splitter.split_documents(documents)
 
-    # 벡터 저장소에 추가
-    vectorstore.add_documents(chunks)
-
-    return len(chunks)
+    documents는 리스트 또는 ParallelDocumentLoader.lazy_load() 같은 이터레이터이며,
+    batch_size 문서 단위로 분할/저장하므로 전체를 메모리에 올리지 않습니다.
+    샤드 저장소는 shard_key(없으면 저장소 설정) 메타데이터 값 또는 해시로 청크를 샤드에 나눠 저장합니다.
+    """
+    sharded = isinstance(vectorstore, ShardedVectorStore)
+    iterator = iter(documents)
+    total = 0
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            break
+
+        # 청킹
+        chunks = text_splitter.split_documents(batch)
+        if not chunks:
+            continue
+
+        # 벡터 저장소에 추가
+        if sharded:
+            vectorstore.add_documents(chunks, shard_key=shard_key)
+        else:
+            vectorstore.add_documents(chunks)
+        total += len(chunks)
+
+        # 이 컬렉션의 캐시된 검색 결과 무효화 (샤드 저장소는 각 샤드 컬렉션도)
+        retrieval_cache.bump_generation(collection_key(vectorstore))
+        if sharded:
+            for shard in vectorstore.shards.values():
+                retrieval_cache.bump_generation(collection_key(shard))
+
+    return total
@@ -0,0 +1,284 @@
+"""
+비동기 스트리밍 RAG 파이프라인
+
+create_rag_chain은 검색이 Runnable 내부에서 동기로 실행되어 스트리밍 전에 전부 기다려야 합니다.
+이 모듈은 단계를 직접 비동기로 구성합니다.
+- 쿼리 임베딩 요청을 먼저 띄우고, 그동안 히스토리 변환과 LLM 클라이언트 생성을 진행
+- 벡터 검색은 스레드에서 실행 (벡터 저장소 API가 동기이므로)
+- 검색 결과 캐시에 있으면 임베딩과 벡터 검색을 모두 건너뜀
+- 요청 deadline: 검색은 시간 제한 후 컨텍스트 없이 진행, 생성은 deadline에 끊고 partial 표시,
+  시간이 부족하면 top_k와 생성 토큰 수 축소
+- 샤드 저장소: 검색 제한 시간 안에 끝난 샤드의 결과만으로 컨텍스트 구성 (빠진 샤드는 partial 표시)
+- 컨텍스트가 준비되는 즉시 토큰 스트리밍 시작
+- 단계별 소요 시간(embed, search, pack, TTFT) 기록, 트레이싱 중이면 단계별 span 기록
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+
+from app.config import settings
+from app.chains.prompts import RAG_SYSTEM_PROMPT, assemble_rag_messages
+from app.chains.rag_chain import format_docs, get_embeddings, get_vector_store
+from app.graphs.chat_graph import convert_messages
+from app.utils import tracing
+from app.utils.deadline import Deadline, aiter_until
+from app.utils.retrieval_cache import (
+    RetrievalCache,
+    cache_enabled_for,
+    collection_key,
+    lookup_documents,
+    retrieval_cache,
+    store_documents,
+)
+from app.utils.tracing import span
+from app.vectorstores.sharded_store import ShardedVectorStore
+
+
+# 벡터 저장소별 "벡터로 검색 + 점수" 메서드 (점수는 _select_relevance_score_fn으로 변환)
+_SCORED_VECTOR_SEARCH_METHODS = (
+    "similarity_search_by_vector_with_score",
+    "similarity_search_by_vector_with_relevance_scores",
+    "similarity_search_with_score_by_vector",
+)
+
+# 임베딩/벡터 저장소 인스턴스 캐시 (설정별로 재사용)
+_component_cache: Dict[str, Tuple[Any, Any]] = {}
+_component_lock = threading.Lock()
+
+
+def get_rag_components(pipeline: Dict):
+    """
+    파이프라인 설정으로 (embeddings, vectorstore) 생성 또는 캐시에서 반환
+
+    pipeline 키는 create_rag_chain 인자와 같습니다
+    (embedding_provider, embedding_model, vectordb_type, vectordb_collection, ...).
+    잘못된 설정(검색할 저장소를 만들 수 없는 경우 등)은 ValueError를 냅니다.
+    """
+    config = {
+        "embedding_provider": pipeline.get("embedding_provider", "OLLAMA"),
+        "embedding_model": pipeline.get("embedding_model", "nomic-embed-text"),
+        "embedding_endpoint": pipeline.get("embedding_endpoint"),
+        "embedding_api_key": pipeline.get("embedding_api_key"),
+        "vectordb_type": pipeline.get("vectordb_type", "CHROMA"),
+        "vectordb_collection": pipeline.get("vectordb_collection", "default"),
+        "vectordb_url": pipeline.get("vectordb_url"),
+        "vectordb_settings": pipeline.get("vectordb_settings"),
+    }
+    key = json.dumps(config, sort_keys=True, default=str)
+    with _component_lock:
+        cached = _component_cache.get(key)
+        if cached is None:
+            embeddings = get_embeddings(
+                provider=config["embedding_provider"],
+                model_name=config["embedding_model"],
+                endpoint=config["embedding_endpoint"],
+                api_key=config["embedding_api_key"],
+                cache=True,
+            )
+            vectorstore = get_vector_store(
+                db_type=config["vectordb_type"],
+                embeddings=embeddings,
+                collection_name=config["vectordb_collection"],
+                connection_url=config["vectordb_url"],
+                settings_dict=config["vectordb_settings"],
+            )
+            if vectorstore is None:
+                raise ValueError(f"{config['vectordb_type']}은(는) 스트리밍 RAG에서 지원하지 않습니다")
+            cached = _component_cache[key] = (embeddings, vectorstore)
+    return cached
+
+
+def search_by_vector(
+    vectorstore,
+    vector: List[float],
+    k: int,
+    score_threshold: Optional[float] = None,
+    timeout: Optional[float] = None,
+) -> List[Tuple[Document, Optional[float]]]:
+    """
+    쿼리 벡터로 검색해 (문서, relevance) 목록 반환
+
+    점수를 주는 벡터 검색 메서드가 없는 저장소는 점수 없이(None) 반환하고 임계값을 적용하지 않습니다.
+    샤드 저장소는 timeout(초)까지 끝난 샤드의 결과만 병합해 ShardResults로 반환합니다.
+    """
+    if isinstance(vectorstore, ShardedVectorStore):
+        return vectorstore.similarity_search_by_vector_with_relevance_scores(
+            vector, k, score_threshold=score_threshold, timeout=timeout
+        )
+    for name in _SCORED_VECTOR_SEARCH_METHODS:
+        method = getattr(vectorstore, name, None)
+        if method is None:
+            continue
+        try:
+            relevance = vectorstore._select_relevance_score_fn()
+        except NotImplementedError:
+            # relevance 함수가 없는 저장소(InMemoryVectorStore 등)는 점수를 이미 유사도로 봄
+            relevance = float
+        results = [(doc, relevance(score)) for doc, score in method(vector, k=k)]
+        if score_threshold is not None:
+            results = [(doc, score) for doc, score in results if score >= score_threshold]
+        return results
+    return [(doc, None) for doc in vectorstore.similarity_search_by_vector(vector, k=k)]
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+async def stream_rag_events(
+    question: str,
+    history: List[Dict],
+    embeddings,
+    vectorstore,
+    make_llm: Callable[[Optional[int]], BaseChatModel],
+    top_k: int = 5,
+    score_threshold: Optional[float] = 0.7,
+    system_prompt: str = None,
+    context_template: str = None,
+    max_tokens: Optional[int] = None,
+    deadline: Deadline = None,
+) -> AsyncIterator[Dict]:
+    """
+    RAG 응답을 이벤트 단위로 생성
+
+    make_llm은 생성 토큰 수 상한(max_tokens, deadline으로 줄어들 수 있음)을 받아 LLM을 만듭니다.
+
+    Yields:
+        {"type": "context", "documents": [...], "timings": {...}, "retrieval_cache": "hit" | "miss" | None}
+        {"type": "token", "content": "..."}  (토큰마다)
+        {"type": "done", "full_response": "...", "token_count": n, "timings": {...}, "hedge": {...} | None,
+         "partial": bool, "deadline": {...}}
+    """
+    start = time.perf_counter()
+    timings: Dict[str, float] = {}
+    deadline = deadline or Deadline()
+    top_k = deadline.cap_top_k(top_k)
+    retrieval_timeout = deadline.stage_timeout(settings.DEADLINE_RETRIEVAL_SHARE)
+
+    async def embed_query() -> List[float]:
+        with span("embed_query"):
+            vector = await embeddings.aembed_query(question)
+        timings["embed_ms"] = _ms(time.perf_counter() - start)
+        return vector
+
+    # 캐시된 검색 결과가 있으면 임베딩/검색 생략
+    cache_key = None
+    cached = None
+    cache_status = None
+    if cache_enabled_for(vectorstore):
+        cache_key = RetrievalCache.make_key(collection_key(vectorstore), question, top_k, score_threshold)
+        with span("retrieval_cache") as cache_span:
+            cached = await asyncio.to_thread(lookup_documents, vectorstore, cache_key)
+            cache_status = "miss" if cached is None else "hit"
+            if cache_span is not None:
+                cache_span.set(status=cache_status)
+        timings["cache_ms"] = _ms(time.perf_counter() - start)
+
+    # 임베딩 요청을 먼저 띄우고, 기다리는 동안 히스토리 변환과 LLM 생성을 진행
+    embed_task = asyncio.create_task(embed_query()) if cached is None else None
+    with span("setup"):
+        history_messages: List[BaseMessage] = convert_messages(history)
+        # 검색에 쓸 시간을 빼고 남은 시간으로 생성 토큰 수 상한 결정
+        reserve_ms = retrieval_timeout * 1000 if cached is None and retrieval_timeout else 0.0
+        llm = make_llm(deadline.cap_tokens(max_tokens, reserve_ms=reserve_ms))
+    timings["setup_ms"] = _ms(time.perf_counter() - start)
+
+    async def retrieve() -> List[Tuple[Document, Optional[float]]]:
+        # 검색 시작 전 generation으로 저장해야 검색 중 인덱싱된 결과를 놓치지 않음
+        generation = retrieval_cache.generation(cache_key[0]) if cache_key else 0
+        vector = await embed_task
+
+        search_start = time.perf_counter()
+        # 샤드 검색은 전체 검색 제한 시간 안에서 끝난 샤드만 병합 (느린 샤드 때문에 컨텍스트 전체를 잃지 않도록)
+        shard_timeout = max(0.0, search_deadline - search_start) if search_deadline is not None else None
+        with span("vector_search", top_k=top_k) as search_span:
+            results = await asyncio.to_thread(
+                search_by_vector, vectorstore, vector, top_k, score_threshold, shard_timeout
+            )
+            if search_span is not None:
+                search_span.set(hits=len(results))
+                if getattr(results, "missing", None):
+                    search_span.set(missing_shards=",".join(sorted(results.missing)))
+        timings["search_ms"] = _ms(time.perf_counter() - search_start)
+        for name, reason in getattr(results, "missing", {}).items():
+            deadline.degrade(f"skip_shard:{name}:{reason}")
+            deadline.mark_partial("shards")
+        if cache_key:
+            store_documents(cache_key, generation, results)
+        return results
+
+    if cached is not None:
+        hits = cached
+    else:
+        search_deadline = None
+        if retrieval_timeout is not None:
+            retrieval_timeout = max(0.0, retrieval_timeout - (time.perf_counter() - start))
+            # 샤드 결과를 병합할 여유를 남기고 샤드 검색을 끊음
+            search_deadline = time.perf_counter() + retrieval_timeout * 0.9
+        try:
+            hits = await asyncio.wait_for(retrieve(), retrieval_timeout)
+        except asyncio.TimeoutError:
+            # 검색이 시간 안에 끝나지 않으면 컨텍스트 없이 답변
+            hits = []
+            deadline.degrade("skip_retrieval")
+            deadline.mark_partial("retrieval")
+        except BaseException:
+            embed_task.cancel()
+            raise
+
+    pack_start = time.perf_counter()
+    with span("pack_context"):
+        docs = [doc for doc, _ in hits]
+        context = format_docs(docs)
+        messages = assemble_rag_messages(
+            system_prompt or RAG_SYSTEM_PROMPT,
+            history_messages,
+            question,
+            context,
+            context_template=context_template,
+        )
+    timings["pack_ms"] = _ms(time.perf_counter() - pack_start)
+    timings["context_ready_ms"] = _ms(time.perf_counter() - start)
+
+    yield {
+        "type": "context",
+        "documents": [
+            {"id": doc.id, "metadata": doc.metadata, "score": score}
+            for doc, score in hits
+        ],
+        "timings": dict(timings),
+        "retrieval_cache": cache_status,
+    }
+
+    full_response = ""
+    token_count = 0
+    hedge = None
+    async for chunk in aiter_until(deadline, llm.astream(messages, config=tracing.trace_config())):
+        # 헤징 모델이면 첫 청크에 승자 정보가 실려 옴
+        hedge = chunk.response_metadata.get("hedge", hedge)
+        content = chunk.content
+        if not content:
+            continue
+        if token_count == 0:
+            timings["ttft_ms"] = _ms(time.perf_counter() - start)
+        full_response += content
+        token_count += 1
+        yield {"type": "token", "content": content}
+
+    timings["total_ms"] = _ms(time.perf_counter() - start)
+    yield {
+        "type": "done",
+        "full_response": full_response,
+        "token_count": token_count,
+        "timings": timings,
+        "hedge": hedge,
+        "partial": deadline.partial,
+        "deadline": deadline.snapshot(),
+    }
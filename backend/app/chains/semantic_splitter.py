@@ -0,0 +1,155 @@
+"""
+시맨틱 텍스트 분할기
+
+문장 단위 임베딩의 인접 코사인 거리로 주제 전환 지점을 찾아 청크를 나눕니다.
+- 문장 임베딩은 CachedEmbeddings를 통해 배치 요청 + 캐시 재사용
+- 브레이크포인트는 문서 전체에 대해 NumPy로 한 번에 계산
+- chunk_size는 하드 상한 (넘는 구간은 거리가 큰 지점부터 다시 분할)
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import RecursiveCharacterTextSplitter, TextSplitter
+
+from app.utils.embedding_cache import CachedEmbeddings
+
+
+# 문장 경계: 종결 부호 뒤 공백, 또는 빈 줄
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?。？！])\s+|\n\s*\n")
+
+
+def split_sentences(text: str) -> List[str]:
+    """텍스트를 문장 단위로 분할"""
+    return [s.strip() for s in SENTENCE_PATTERN.split(text) if s and s.strip()]
+
+
+def cosine_distances(vectors: np.ndarray) -> np.ndarray:
+    """인접한 행 벡터 사이의 코사인 거리 (길이 n-1)"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    normalized = vectors / np.maximum(norms, 1e-12)
+    return 1.0 - np.einsum("ij,ij->i", normalized[:-1], normalized[1:])
+
+
+class SemanticTextSplitter(TextSplitter):
+    """
+    임베딩 기반 시맨틱 청킹
+
+    Args:
+        embeddings: 문장 임베딩에 사용할 Embeddings 인스턴스
+        chunk_size: 청크 최대 길이 (하드 상한)
+        chunk_overlap: 단일 문장이 chunk_size를 넘을 때 문자 분할에 쓰는 overlap
+        breakpoint_percentile: 이 백분위수를 넘는 거리에서 청크를 나눔
+        buffer_size: 문장 임베딩 시 앞뒤로 함께 묶을 문장 수 (문맥 보강)
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 0,
+        breakpoint_percentile: float = 95.0,
+        buffer_size: int = 1,
+        **kwargs: Any,
+    ):
+        super().__init__(chunk_size=chunk_size, chunk_overlap=chunk_overlap, **kwargs)
+        if not isinstance(embeddings, CachedEmbeddings):
+            embeddings = CachedEmbeddings(embeddings)
+        self._embeddings = embeddings
+        self._breakpoint_percentile = breakpoint_percentile
+        self._buffer_size = buffer_size
+        self._fallback = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=self._length_function,
+        )
+
+    def _windows(self, sentences: List[str]) -> List[str]:
+        """각 문장을 앞뒤 buffer_size 문장과 묶은 임베딩 입력"""
+        if self._buffer_size <= 0:
+            return sentences
+        n = len(sentences)
+        return [
+            " ".join(sentences[max(0, i - self._buffer_size):min(n, i + self._buffer_size + 1)])
+            for i in range(n)
+        ]
+
+    def _group_ranges(self, sentences: List[str], distances: np.ndarray) -> List[tuple]:
+        """브레이크포인트 기준 (start, end) 문장 구간 목록"""
+        if len(distances) == 0:
+            return [(0, len(sentences))]
+        threshold = np.percentile(distances, self._breakpoint_percentile)
+        cuts = (np.flatnonzero(distances > threshold) + 1).tolist()
+        bounds = [0] + cuts + [len(sentences)]
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def _enforce_size(
+        self,
+        sentences: List[str],
+        lengths: np.ndarray,
+        distances: np.ndarray,
+        start: int,
+        end: int,
+    ) -> List[str]:
+        """chunk_size를 넘는 구간을 거리가 가장 큰 지점에서 반복 분할"""
+        chunks = []
+        # 순서를 유지하기 위해 뒤쪽 구간을 먼저 쌓는 스택
+        stack = [(start, end)]
+        while stack:
+            start, end = stack.pop()
+            # 문장 사이 공백(1자)까지 포함한 길이
+            total = int(lengths[start:end].sum()) + (end - start - 1)
+            if total <= self._chunk_size:
+                chunks.append(" ".join(sentences[start:end]))
+            elif end - start == 1:
+                chunks.extend(self._fallback.split_text(sentences[start]))
+            else:
+                # 구간 내부 경계 중 주제 전환이 가장 큰 지점
+                split = start + 1 + int(np.argmax(distances[start:end - 1]))
+                stack.append((split, end))
+                stack.append((start, split))
+        return chunks
+
+    def split_text(self, text: str) -> List[str]:
+        sentences = split_sentences(text)
+        if not sentences:
+            return []
+        if len(sentences) == 1:
+            if self._length_function(sentences[0]) <= self._chunk_size:
+                return sentences
+            return self._fallback.split_text(sentences[0])
+
+        vectors = np.asarray(self._embeddings.embed_documents(self._windows(sentences)), dtype=np.float32)
+        distances = cosine_distances(vectors)
+        lengths = np.fromiter((self._length_function(s) for s in sentences), dtype=np.int64, count=len(sentences))
+
+        chunks = []
+        for start, end in self._group_ranges(sentences, distances):
+            chunks.extend(self._enforce_size(sentences, lengths, distances, start, end))
+        return chunks
+
+    def create_documents(
+        self, texts: List[str], metadatas: Optional[List[Dict[Any, Any]]] = None
+    ) -> List[Document]:
+        # 여러 문서의 문장을 모아 배치 임베딩으로 캐시를 채운 뒤 문서별로 분할
+        # (캐시 용량을 넘지 않도록 문서 묶음 단위로 처리)
+        metadatas = metadatas or [{}] * len(texts)
+        capacity = max(1, self._embeddings.max_entries // 2)
+        documents: List[Document] = []
+        start = 0
+        while start < len(texts):
+            end = start
+            windows: List[str] = []
+            while end < len(texts) and (end == start or len(windows) < capacity):
+                sentences = split_sentences(texts[end])
+                if len(sentences) > 1:
+                    windows.extend(self._windows(sentences))
+                end += 1
+            if windows:
+                self._embeddings.embed_documents(windows)
+            documents.extend(super().create_documents(texts[start:end], metadatas=metadatas[start:end]))
+            start = end
+        return documents
@@ -4,13 +4,78 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _split_env_list(name: str, default: str) -> list:
+    return [item.strip() for item in os.getenv(name, default).split(",") if item.strip()]
+
+
+def _split_env_map(name: str, default: str) -> dict:
+    """"key=value,key=value" 형식 환경 변수를 {key: float} 로"""
+    result = {}
+    for item in _split_env_list(name, default):
+        key, _, value = item.partition("=")
+        result[key.strip()] = float(value)
+    return result
+
+
 class Settings:
     OLLAMA_HOST: str = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+    # 여러 Ollama 인스턴스 (쉼표 구분, 대화별로 고정 라우팅)
+    OLLAMA_HOSTS: list = _split_env_list("OLLAMA_HOSTS", OLLAMA_HOST)
     OLLAMA_DEFAULT_MODEL: str = os.getenv("OLLAMA_DEFAULT_MODEL", "llama3")
+    # 동시에 진행할 수 있는 모델 pull 수
+    OLLAMA_MAX_PARALLEL_PULLS: int = int(os.getenv("OLLAMA_MAX_PARALLEL_PULLS", "1"))
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "8000"))
     DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
+    # 채팅 그래프 라우터 (간단한 질문은 소형 모델로, 비어 있으면 라우팅 안 함)
+    ROUTER_SMALL_MODEL: str = os.getenv("ROUTER_SMALL_MODEL", "")
+    ROUTER_LARGE_MODELS: list = _split_env_list("ROUTER_LARGE_MODELS", "")
+    ROUTER_MAX_WORDS: int = int(os.getenv("ROUTER_MAX_WORDS", "40"))
+    ROUTER_MAX_CHARS: int = int(os.getenv("ROUTER_MAX_CHARS", "200"))
+    ROUTER_MAX_HISTORY_TURNS: int = int(os.getenv("ROUTER_MAX_HISTORY_TURNS", "6"))
+    ROUTER_COMPLEX_KEYWORDS: list = _split_env_list("ROUTER_COMPLEX_KEYWORDS", "")
+    ROUTER_RULES_FILE: str = os.getenv("ROUTER_RULES_FILE", "")
+    # /graph/chat/stream에서 ChatOllama 대신 /api/chat을 직접 스트리밍 (헤징 요청은 제외)
+    OLLAMA_FAST_STREAM: bool = os.getenv("OLLAMA_FAST_STREAM", "false").lower() == "true"
+    OLLAMA_FAST_STREAM_MAX_CONNECTIONS: int = int(os.getenv("OLLAMA_FAST_STREAM_MAX_CONNECTIONS", "64"))
+    OLLAMA_FAST_STREAM_CONNECT_TIMEOUT: float = float(os.getenv("OLLAMA_FAST_STREAM_CONNECT_TIMEOUT", "10"))
+    # LLM 요청 헤징 (첫 토큰 지연 시 보조 엔드포인트로 동시 요청)
+    LLM_HEDGE_ENABLED: bool = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_DELAY_MS: float = float(os.getenv("LLM_HEDGE_DELAY_MS", "2000"))  # TTFT 표본이 부족할 때
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+    LLM_HEDGE_BUDGET: float = float(os.getenv("LLM_HEDGE_BUDGET", "0.1"))  # 요청 대비 최대 헤지 비율
+    # 검색 결과 캐시 (컬렉션 쓰기 시 무효화, 메모리 상한 LRU)
+    RETRIEVAL_CACHE_ENABLED: bool = os.getenv("RETRIEVAL_CACHE_ENABLED", "true").lower() == "true"
+    RETRIEVAL_CACHE_MAX_MB: float = float(os.getenv("RETRIEVAL_CACHE_MAX_MB", "32"))
+    RETRIEVAL_CACHE_TTL: float = float(os.getenv("RETRIEVAL_CACHE_TTL", "600"))  # 다른 프로세스의 쓰기 반영 상한 (초)
+    # 샤드 컬렉션 동시 검색 (느린 샤드는 제한 시간 후 제외, 0이면 제한 없음)
+    SHARD_SEARCH_TIMEOUT: float = float(os.getenv("SHARD_SEARCH_TIMEOUT", "2"))
+    SHARD_SEARCH_WORKERS: int = int(os.getenv("SHARD_SEARCH_WORKERS", "16"))
+    # 동시에 검색할 샤드 수 (0: 로컬 저장소는 CPU 코어 수, 원격 저장소는 전부 동시)
+    SHARD_SEARCH_PARALLEL: int = int(os.getenv("SHARD_SEARCH_PARALLEL", "0"))
+    # 임베딩 마이크로 배칭 (동시 호출을 max_wait_ms 동안 모아 한 번에 요청)
+    EMBED_BATCH_ENABLED: bool = os.getenv("EMBED_BATCH_ENABLED", "false").lower() == "true"
+    EMBED_BATCH_MAX_SIZE: int = int(os.getenv("EMBED_BATCH_MAX_SIZE", "64"))
+    EMBED_BATCH_MAX_WAIT_MS: float = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+    EMBED_BATCH_MAX_CONCURRENT: int = int(os.getenv("EMBED_BATCH_MAX_CONCURRENT", "4"))
+    # 문서 로더 (0이면 CPU 수만큼 작업자, 파일별 파싱 시간 제한 초)
+    LOADER_MAX_WORKERS: int = int(os.getenv("LOADER_MAX_WORKERS", "0"))
+    LOADER_FILE_TIMEOUT: float = float(os.getenv("LOADER_FILE_TIMEOUT", "60"))
+    # 요청 deadline: 헤더/body 값이 없을 때 경로별 기본 예산 (ms)
+    DEADLINE_ROUTE_DEFAULTS: dict = _split_env_map(
+        "DEADLINE_ROUTE_DEFAULTS",
+        "/graph/chat=120000,/graph/chat/stream=120000,/rag/chat/stream=120000",
+    )
+    DEADLINE_TIGHT_MS: float = float(os.getenv("DEADLINE_TIGHT_MS", "15000"))  # 남은 시간이 이보다 적으면 축소
+    DEADLINE_RETRIEVAL_SHARE: float = float(os.getenv("DEADLINE_RETRIEVAL_SHARE", "0.3"))  # 검색에 쓸 남은 시간 비율
+    DEADLINE_DECODE_TOKENS_PER_SEC: float = float(os.getenv("DEADLINE_DECODE_TOKENS_PER_SEC", "20"))  # 토큰 상한 추정용
+    DEADLINE_MIN_TOKENS: int = int(os.getenv("DEADLINE_MIN_TOKENS", "64"))
     FRONTEND_URL: str = os.getenv("FRONTEND_URL", "http://localhost:3000")
+    # 요청 트레이스 내보내기: "" (끔), "file" (JSONL), "otlp" (OTLP/HTTP JSON)
+    TRACE_EXPORT: str = os.getenv("TRACE_EXPORT", "").lower()
+    TRACE_FILE: str = os.getenv("TRACE_FILE", "./traces.jsonl")
+    TRACE_OTLP_ENDPOINT: str = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+    TRACE_SERVICE_NAME: str = os.getenv("TRACE_SERVICE_NAME", "sdc-llm-backend")
 
 
 settings = Settings()
@@ -5,16 +5,22 @@ Features:
 - 상태 기반 대화 관리
 - 스트리밍 응답 지원
 - 동적 모델 선택
+- 라우터 노드: 간단한 질문은 소형 모델(chat_small), 복잡한 질문은 요청 모델(chat)
+- 요청 deadline: 생성 토큰 수 제한, deadline에 생성을 끊고 partial 표시
 - 확장 가능한 그래프 구조
 """
 
-from typing import Annotated, TypedDict, Sequence
+import math
+from typing import Annotated, Any, TypedDict, Sequence
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
 from langchain_community.chat_models import ChatOllama
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
 
 from app.config import settings
+from app.chains.prompts import assemble_chat_messages, build_system_prompt
+from app.graphs.router import query_router
+from app.utils.deadline import aiter_until, iter_until
 
 
 # 상태 정의
@@ -22,6 +28,59 @@ class ChatState(TypedDict):
     """채팅 그래프의 상태"""
     messages: Annotated[Sequence[BaseMessage], add_messages]
     model_name: str
+    ollama_host: str  # 세션 고정 라우팅으로 선택된 Ollama 호스트 (선택)
+    route: str  # 라우터 결정 ("small" | "large")
+    route_reason: str
+    routed_model: str  # 라우터가 고른 실제 모델
+    deadline: Any  # 요청 deadline (app.utils.deadline.Deadline, 선택)
+
+
+def router_node(state: ChatState) -> ChatState:
+    """질문 난이도에 따라 경로와 모델 결정"""
+    requested = state.get("model_name", settings.OLLAMA_DEFAULT_MODEL)
+    decision = query_router.route(state["messages"], requested)
+    return {"route": decision.route, "route_reason": decision.reason, "routed_model": decision.model}
+
+
+def select_route(state: ChatState) -> str:
+    return "chat_small" if state.get("route") == "small" else "chat"
+
+
+def add_routed_chat_nodes(workflow: StateGraph, chat_node):
+    """router -> (chat_small | chat) -> END 구조로 노드/엣지 추가"""
+    workflow.add_node("router", router_node)
+    workflow.add_node("chat_small", chat_node)
+    workflow.add_node("chat", chat_node)
+    workflow.set_entry_point("router")
+    workflow.add_conditional_edges("router", select_route, {"chat_small": "chat_small", "chat": "chat"})
+    workflow.add_edge("chat_small", END)
+    workflow.add_edge("chat", END)
+
+
+def _ollama_for_state(state: ChatState, model_name: str) -> ChatOllama:
+    """상태의 호스트와 deadline(생성 토큰 수 상한, 요청 timeout)을 반영한 ChatOllama"""
+    deadline = state.get("deadline")
+    options = {}
+    if deadline is not None and deadline.enabled:
+        options["num_predict"] = deadline.cap_tokens(None)
+        options["timeout"] = max(1, math.ceil(deadline.remaining_s()))
+    return ChatOllama(
+        base_url=state.get("ollama_host") or settings.OLLAMA_HOST,
+        model=model_name,
+        temperature=0.7,
+        **options,
+    )
+
+
+def _partial_response(chunks, deadline) -> AIMessage:
+    """스트림 청크를 합쳐 하나의 응답으로 (deadline으로 잘렸으면 response_metadata에 partial 표시)"""
+    response = None
+    for chunk in chunks:
+        response = chunk if response is None else response + chunk
+    return AIMessage(
+        content=response.content if response is not None else "",
+        response_metadata={"partial": deadline.partial, "deadline": deadline.snapshot()},
+    )
 
 
 def create_chat_graph():
@@ -29,7 +88,8 @@ def create_chat_graph():
     LangGraph 기반 채팅 그래프 생성
 
     그래프 구조:
-    START -> chat_node -> END
+    START -> router -> chat_small (소형 모델) -> END
+                    -> chat (요청 모델)     -> END
 
     확장 가능:
     - 도구 사용 노드 추가
@@ -37,46 +97,38 @@ def create_chat_graph():
     - 멀티 에이전트 구조
     """
 
-    # 시스템 프롬프트
-    SYSTEM_PROMPT = (
-        "You are a helpful AI assistant. "
-        "Respond in the same language as the user. "
-        "If the user speaks Korean, respond in Korean. "
-        "Provide clear, concise, and helpful responses."
-    )
+    # 시스템 프롬프트 (모든 채팅 경로 공통, KV 캐시 재사용을 위해 바이트 단위로 고정)
+    SYSTEM_PROMPT = build_system_prompt("OLLAMA")
 
     def chat_node(state: ChatState) -> ChatState:
-        """메인 채팅 노드"""
-        model_name = state.get("model_name", settings.OLLAMA_DEFAULT_MODEL)
+        """메인 채팅 노드 (라우터가 고른 모델 사용)"""
+        model_name = state.get("routed_model") or state.get("model_name", settings.OLLAMA_DEFAULT_MODEL)
 
         # LLM 초기화
-        llm = ChatOllama(
-            base_url=settings.OLLAMA_HOST,
-            model=model_name,
-            temperature=0.7,
-        )
-
-        # 메시지 준비 (시스템 메시지 추가)
-        messages = list(state["messages"])
-
-        # 시스템 메시지가 없으면 추가
-        if not messages or not isinstance(messages[0], SystemMessage):
-            messages.insert(0, SystemMessage(content=SYSTEM_PROMPT))
-
-        # LLM 호출
-        response = llm.invoke(messages)
-
-        return {"messages": [response]}
+        llm = _ollama_for_state(state, model_name)
+
+        # 메시지 준비 (시스템 메시지가 없으면 추가)
+        messages = assemble_chat_messages(state["messages"], SYSTEM_PROMPT)
+
+        # LLM 호출 (deadline이 있으면 스트리밍으로 받다가 deadline에 중단)
+        deadline = state.get("deadline")
+        if deadline is None or not deadline.enabled:
+            return {"messages": [llm.invoke(messages)]}
+        chunks = []
+        try:
+            chunks.extend(iter_until(deadline, llm.stream(messages)))
+        except Exception:
+            # 첫 토큰 전 요청 timeout 등 — deadline이 지난 경우만 partial로 처리
+            if not deadline.expired():
+                raise
+            deadline.mark_partial("generation")
+        return {"messages": [_partial_response(chunks, deadline)]}
 
     # 그래프 빌드
     workflow = StateGraph(ChatState)
 
-    # 노드 추가
-    workflow.add_node("chat", chat_node)
-
-    # 엣지 정의
-    workflow.set_entry_point("chat")
-    workflow.add_edge("chat", END)
+    # 노드/엣지 추가 (라우터 + 소형/요청 모델 채팅 노드)
+    add_routed_chat_nodes(workflow, chat_node)
 
     # 그래프 컴파일
     graph = workflow.compile()
@@ -91,37 +143,24 @@ def create_streaming_chat_graph():
     이 버전은 astream_events를 사용하여 토큰 단위 스트리밍 지원
     """
 
-    SYSTEM_PROMPT = (
-        "You are a helpful AI assistant. "
-        "Respond in the same language as the user. "
-        "If the user speaks Korean, respond in Korean. "
-        "Provide clear, concise, and helpful responses. "
-        "/no_think"  # qwen3 thinking 모드 비활성화
-    )
+    SYSTEM_PROMPT = build_system_prompt("OLLAMA")  # /no_think로 qwen3 thinking 모드 비활성화
 
     async def chat_node(state: ChatState) -> ChatState:
         """비동기 채팅 노드"""
-        model_name = state.get("model_name", settings.OLLAMA_DEFAULT_MODEL)
-
-        llm = ChatOllama(
-            base_url=settings.OLLAMA_HOST,
-            model=model_name,
-            temperature=0.7,
-        )
+        model_name = state.get("routed_model") or state.get("model_name", settings.OLLAMA_DEFAULT_MODEL)
 
-        messages = list(state["messages"])
+        llm = _ollama_for_state(state, model_name)
 
-        if not messages or not isinstance(messages[0], SystemMessage):
-            messages.insert(0, SystemMessage(content=SYSTEM_PROMPT))
+        messages = assemble_chat_messages(state["messages"], SYSTEM_PROMPT)
 
-        response = await llm.ainvoke(messages)
-
-        return {"messages": [response]}
+        deadline = state.get("deadline")
+        if deadline is None or not deadline.enabled:
+            return {"messages": [await llm.ainvoke(messages)]}
+        chunks = [chunk async for chunk in aiter_until(deadline, llm.astream(messages))]
+        return {"messages": [_partial_response(chunks, deadline)]}
 
     workflow = StateGraph(ChatState)
-    workflow.add_node("chat", chat_node)
-    workflow.set_entry_point("chat")
-    workflow.add_edge("chat", END)
+    add_routed_chat_nodes(workflow, chat_node)
 
     return workflow.compile()
 
@@ -0,0 +1,169 @@
+"""
+채팅 그래프 라우터 (간단한 질문 → 소형 모델, 복잡한 질문 → 요청 모델)
+
+규칙 기반 분류기로 마지막 user 메시지와 대화 길이를 보고 경로를 정합니다.
+- 코드 블록/인라인 코드 포함 → large
+- 복잡한 작업 키워드 포함 (분석, 비교, 설계, explain why 등) → large
+- 질문 길이(단어/글자 수)가 기준 초과 → large
+- 대화 턴 수가 기준 초과 → large (긴 맥락은 큰 모델에서 유지)
+- 그 외 → small
+
+ROUTER_SMALL_MODEL이 비어 있으면 항상 large(요청 모델)로 보냅니다.
+규칙과 기준값은 환경 변수 또는 ROUTER_RULES_FILE(JSON)로 설정합니다.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Sequence
+
+from langchain_core.messages import BaseMessage, HumanMessage
+
+from app.config import settings
+
+
+DEFAULT_COMPLEX_KEYWORDS = [
+    "분석", "비교", "설계", "원인", "요약해", "단계별", "코드", "구현", "최적화", "증명",
+    "analyze", "analysis", "compare", "design", "step by step", "explain why",
+    "implement", "optimize", "prove", "debug", "refactor",
+]
+
+_CODE_PATTERN = re.compile(r"```|`[^`\n]+`|\bdef |\bclass |\bSELECT\b|[{};]\s*$", re.MULTILINE)
+
+
+@dataclass
+class RouterConfig:
+    """라우팅 규칙과 기준값"""
+    small_model: str = ""
+    # 라우팅 대상 요청 모델 (비어 있으면 모든 모델). 클라이언트가 고른 소형 모델은 그대로 둠
+    large_models: List[str] = field(default_factory=list)
+    max_words: int = 40
+    max_chars: int = 200
+    max_history_turns: int = 6
+    complex_keywords: List[str] = field(default_factory=lambda: list(DEFAULT_COMPLEX_KEYWORDS))
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.small_model)
+
+    @classmethod
+    def from_settings(cls) -> "RouterConfig":
+        config = cls(
+            small_model=settings.ROUTER_SMALL_MODEL,
+            large_models=settings.ROUTER_LARGE_MODELS,
+            max_words=settings.ROUTER_MAX_WORDS,
+            max_chars=settings.ROUTER_MAX_CHARS,
+            max_history_turns=settings.ROUTER_MAX_HISTORY_TURNS,
+        )
+        if settings.ROUTER_COMPLEX_KEYWORDS:
+            config.complex_keywords = settings.ROUTER_COMPLEX_KEYWORDS
+        if settings.ROUTER_RULES_FILE:
+            with open(settings.ROUTER_RULES_FILE, encoding="utf-8") as f:
+                for key, value in json.load(f).items():
+                    if hasattr(config, key):
+                        setattr(config, key, value)
+        return config
+
+
+@dataclass
+class RouteDecision:
+    route: str  # "small" | "large"
+    model: str
+    reason: str
+    overhead_us: float
+
+
+class RouterStats:
+    """경로별 요청 수와 분류기 자체 소요 시간"""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self.routes = Counter()
+        self.reasons = Counter()
+        self._overhead = deque(maxlen=window)
+
+    def record(self, decision: RouteDecision):
+        with self._lock:
+            self.routes[decision.route] += 1
+            self.reasons[decision.reason.split(":")[0]] += 1
+            self._overhead.append(decision.overhead_us)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            samples = sorted(self._overhead)
+            routes = dict(self.routes)
+            reasons = dict(self.reasons)
+        total = sum(routes.values())
+
+        def pct(p: float) -> float:
+            return round(samples[min(len(samples) - 1, int(len(samples) * p / 100))], 1) if samples else 0.0
+
+        return {
+            "requests": total,
+            "routes": routes,
+            "small_ratio": round(routes.get("small", 0) / total, 4) if total else 0.0,
+            "reasons": reasons,
+            "overhead_us": {
+                "p50": pct(50),
+                "p99": pct(99),
+                "mean": round(sum(samples) / len(samples), 1) if samples else 0.0,
+            },
+        }
+
+
+class QueryRouter:
+    """규칙 기반 질문 분류기"""
+
+    def __init__(self, config: RouterConfig = None):
+        self.config = config or RouterConfig.from_settings()
+        self.stats = RouterStats()
+        self._keywords = [k.lower() for k in self.config.complex_keywords]
+
+    def _classify(self, messages: Sequence[BaseMessage]):
+        config = self.config
+        question = ""
+        turns = 0
+        for msg in messages:
+            if isinstance(msg, HumanMessage):
+                turns += 1
+                question = msg.content if isinstance(msg.content, str) else str(msg.content)
+
+        if _CODE_PATTERN.search(question):
+            return "large", "code"
+        lowered = question.lower()
+        for keyword in self._keywords:
+            if keyword in lowered:
+                return "large", f"keyword:{keyword}"
+        if len(question) > config.max_chars or len(question.split()) > config.max_words:
+            return "large", "long_question"
+        if turns > config.max_history_turns:
+            return "large", "long_conversation"
+        return "small", "simple"
+
+    def route(self, messages: Sequence[BaseMessage], requested_model: str) -> RouteDecision:
+        """메시지와 요청 모델로 경로 결정 (통계 기록 포함)"""
+        start = time.perf_counter()
+        config = self.config
+        if not config.enabled or requested_model == config.small_model:
+            route, reason = "large", "disabled" if not config.enabled else "requested_small"
+        elif config.large_models and requested_model not in config.large_models:
+            route, reason = "large", "not_routable_model"
+        else:
+            route, reason = self._classify(messages)
+        decision = RouteDecision(
+            route=route,
+            model=config.small_model if route == "small" else requested_model,
+            reason=reason,
+            overhead_us=round((time.perf_counter() - start) * 1e6, 1),
+        )
+        self.stats.record(decision)
+        return decision
+
+    def info(self) -> Dict:
+        return {"enabled": self.config.enabled, "config": asdict(self.config), "stats": self.stats.snapshot()}
+
+
+query_router = QueryRouter()
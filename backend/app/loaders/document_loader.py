@@ -0,0 +1,321 @@
+"""
+병렬 문서 로더
+
+디렉토리/압축 파일을 순회하며 PDF, DOCX, HTML, Markdown, 텍스트 파일을 프로세스 풀에서 파싱하고
+Document를 완료되는 순서대로 하나씩 내보냅니다 (index_documents에 그대로 넘기면 배치 단위로 분할/저장).
+- 압축 파일: .zip, .tar, .tar.gz/.tgz, .tar.bz2, .tar.xz 의 멤버를 파일처럼 처리 (중첩 압축은 제외)
+- 파일별 시간 제한: 작업자 안에서 SIGALRM으로 파싱을 중단 (SIGALRM이 없는 플랫폼에서는 제한 없음)
+- 변경 없는 파일 건너뛰기: 상태 파일(JSON)에 mtime/크기/sha256 기록
+  mtime과 크기가 같으면 읽지 않고, 다르면 작업자가 해시를 비교해 내용이 같으면 파싱하지 않음
+- 진행 중인 작업 수를 제한해 메모리 사용량을 일정하게 유지
+- 통계: 파일 수, 건너뜀, 실패/시간 초과, 페이지 수, 바이트, pages/s, bytes/s
+
+상태 파일은 소비자가 문서를 모두 받아 간 파일만 기록하므로, 인덱싱이 중간에 실패하면 다음 실행에서 다시 처리합니다.
+삭제된 파일이나 바뀐 파일의 이전 청크를 벡터 저장소에서 지우지는 않습니다.
+"""
+
+import hashlib
+import json
+import os
+import signal
+import tarfile
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+from app.config import settings
+from app.loaders.parsers import file_type_for, parse_bytes
+
+
+_TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+
+class FileTimeoutError(TimeoutError):
+    """파일 하나의 파싱이 시간 제한을 넘김"""
+
+
+@dataclass
+class SourceFile:
+    """로드 대상 파일 (일반 파일 또는 압축 파일 멤버)"""
+    key: str  # 상태 파일/metadata["source"] 키: 경로 또는 "archive.zip!member"
+    kind: str  # file | zip | tar
+    location: str
+    member: Optional[str]
+    file_type: str
+    size: int
+    mtime: float
+
+
+def _is_archive(path: str) -> Optional[str]:
+    lowered = path.lower()
+    if lowered.endswith(".zip"):
+        return "zip"
+    if lowered.endswith(_TAR_SUFFIXES):
+        return "tar"
+    return None
+
+
+def _archive_members(path: str, kind: str) -> Iterator[SourceFile]:
+    if kind == "zip":
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                file_type = file_type_for(info.filename)
+                if info.is_dir() or not file_type:
+                    continue
+                mtime = time.mktime(info.date_time + (0, 0, -1))
+                yield SourceFile(f"{path}!{info.filename}", kind, path, info.filename, file_type, info.file_size, mtime)
+    else:
+        with tarfile.open(path) as archive:
+            for info in archive:
+                file_type = file_type_for(info.name)
+                if not info.isfile() or not file_type:
+                    continue
+                yield SourceFile(f"{path}!{info.name}", kind, path, info.name, file_type, info.size, float(info.mtime))
+
+
+def iter_sources(paths: Sequence[str], recursive: bool = True) -> Iterator[SourceFile]:
+    """경로 목록(파일, 디렉토리, 압축 파일)에서 지원하는 파일을 순서대로 나열"""
+    for root in paths:
+        if os.path.isdir(root):
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames.sort()
+                if not recursive:
+                    dirnames.clear()
+                for name in sorted(filenames):
+                    yield from iter_sources([os.path.join(dirpath, name)])
+            continue
+        archive_kind = _is_archive(root)
+        if archive_kind:
+            yield from _archive_members(root, archive_kind)
+            continue
+        file_type = file_type_for(root)
+        if file_type and os.path.isfile(root):
+            stat = os.stat(root)
+            yield SourceFile(root, "file", root, None, file_type, stat.st_size, stat.st_mtime)
+
+
+def _read(kind: str, location: str, member: Optional[str]) -> bytes:
+    if kind == "zip":
+        with zipfile.ZipFile(location) as archive:
+            return archive.read(member)
+    if kind == "tar":
+        with tarfile.open(location) as archive:
+            return archive.extractfile(member).read()
+    with open(location, "rb") as f:
+        return f.read()
+
+
+@contextmanager
+def _time_limit(seconds: Optional[float]):
+    if not seconds or not hasattr(signal, "SIGALRM") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise FileTimeoutError(f"파싱 시간 제한 초과 ({seconds}s)")
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def load_source(source: SourceFile, previous_hash: Optional[str], timeout: Optional[float]) -> Dict:
+    """
+    파일 하나 읽기 + 해시 + 파싱 (작업자 프로세스에서 실행)
+
+    Returns:
+        {"status": "ok" | "unchanged" | "timeout" | "error", "hash", "bytes", "pages", "error"}
+    """
+    try:
+        with _time_limit(timeout):
+            data = _read(source.kind, source.location, source.member)
+            digest = hashlib.sha256(data).hexdigest()
+            if digest == previous_hash:
+                return {"status": "unchanged", "hash": digest, "bytes": len(data)}
+            pages = parse_bytes(data, source.file_type)
+        return {"status": "ok", "hash": digest, "bytes": len(data), "pages": pages}
+    except FileTimeoutError as e:
+        return {"status": "timeout", "error": str(e)}
+    except Exception as e:
+        return {"status": "error", "error": f"{type(e).__name__}: {e}"}
+
+
+@dataclass
+class LoadStats:
+    files: int = 0
+    parsed: int = 0
+    skipped_unchanged: int = 0
+    failed: int = 0
+    timeouts: int = 0
+    pages: int = 0
+    documents: int = 0
+    bytes: int = 0
+    elapsed: float = 0.0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    def snapshot(self) -> Dict:
+        elapsed = self.elapsed or 1e-9
+        return {
+            "files": self.files,
+            "parsed": self.parsed,
+            "skipped_unchanged": self.skipped_unchanged,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "pages": self.pages,
+            "documents": self.documents,
+            "bytes": self.bytes,
+            "elapsed_s": round(self.elapsed, 3),
+            "pages_per_sec": round(self.pages / elapsed, 1),
+            "bytes_per_sec": round(self.bytes / elapsed, 1),
+            "errors": dict(list(self.errors.items())[:20]),
+        }
+
+
+class ParallelDocumentLoader(BaseLoader):
+    """
+    디렉토리/압축 파일을 프로세스 풀에서 파싱하는 lazy 로더
+
+    사용 예:
+        loader = ParallelDocumentLoader(["./docs", "./manuals.zip"], state_path="./.loader_state.json")
+        index_documents(loader.lazy_load(), vectorstore, text_splitter)
+        print(loader.stats.snapshot())
+    """
+
+    def __init__(
+        self,
+        paths: Union[str, Sequence[str]],
+        max_workers: int = None,
+        file_timeout: float = None,
+        state_path: str = None,
+        recursive: bool = True,
+        max_in_flight: int = None,
+    ):
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.max_workers = max_workers or settings.LOADER_MAX_WORKERS or os.cpu_count() or 1
+        self.file_timeout = file_timeout if file_timeout is not None else settings.LOADER_FILE_TIMEOUT
+        self.state_path = state_path
+        self.recursive = recursive
+        self.max_in_flight = max_in_flight or self.max_workers * 2
+        self.stats = LoadStats()
+
+    def _load_state(self) -> Dict[str, Dict]:
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_state(self, state: Dict[str, Dict]):
+        if not self.state_path:
+            return
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def _to_documents(self, source: SourceFile, result: Dict) -> List[Document]:
+        pages = result["pages"]
+        docs = []
+        for text, page_metadata in pages:
+            if not text.strip():
+                continue
+            metadata = {"source": source.key, "file_type": source.file_type, "content_hash": result["hash"]}
+            metadata.update(page_metadata)
+            if len(pages) > 1:
+                metadata["total_pages"] = len(pages)
+            docs.append(Document(page_content=text, metadata=metadata))
+        return docs
+
+    def _results(self, state: Dict[str, Dict]) -> Iterator:
+        """(SourceFile, 결과) 를 완료 순서대로 생성 (mtime/크기가 같은 파일은 제출하지 않음)"""
+        sources = iter_sources(self.paths, self.recursive)
+
+        def pending_sources() -> Iterator[SourceFile]:
+            for source in sources:
+                self.stats.files += 1
+                previous = state.get(source.key)
+                if previous and previous.get("mtime") == source.mtime and previous.get("size") == source.size:
+                    self.stats.skipped_unchanged += 1
+                    continue
+                yield source
+
+        todo = pending_sources()
+        if self.max_workers <= 1:
+            for source in todo:
+                previous = state.get(source.key) or {}
+                yield source, load_source(source, previous.get("hash"), self.file_timeout)
+            return
+
+        executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        pool_generation = 0
+        in_flight: Dict[Future, tuple] = {}  # future -> (SourceFile, 제출한 풀 세대)
+        try:
+            exhausted = False
+            while True:
+                while not exhausted and len(in_flight) < self.max_in_flight:
+                    source = next(todo, None)
+                    if source is None:
+                        exhausted = True
+                        break
+                    previous = state.get(source.key) or {}
+                    future = executor.submit(load_source, source, previous.get("hash"), self.file_timeout)
+                    in_flight[future] = (source, pool_generation)
+                if not in_flight:
+                    return
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    source, generation = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        # 작업자가 비정상 종료 (메모리 부족 등) → 새 풀로 계속, 진행 중이던 파일은 실패 처리
+                        result = {"status": "error", "error": f"작업자 종료: {e}"}
+                        if generation == pool_generation:
+                            executor.shutdown(wait=False, cancel_futures=True)
+                            executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                            pool_generation += 1
+                    yield source, result
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def lazy_load(self) -> Iterator[Document]:
+        self.stats = LoadStats()
+        state = self._load_state()
+        start = time.perf_counter()
+        try:
+            for source, result in self._results(state):
+                status = result["status"]
+                if status in ("timeout", "error"):
+                    self.stats.failed += 1
+                    self.stats.timeouts += status == "timeout"
+                    self.stats.errors[source.key] = result["error"]
+                    continue
+                entry = {"mtime": source.mtime, "size": source.size, "hash": result["hash"]}
+                if status == "unchanged":
+                    self.stats.skipped_unchanged += 1
+                    state[source.key] = entry
+                    continue
+
+                docs = self._to_documents(source, result)
+                self.stats.parsed += 1
+                self.stats.pages += len(result["pages"])
+                self.stats.bytes += result["bytes"]
+                self.stats.documents += len(docs)
+                yield from docs
+                # 소비자가 이 파일의 문서를 모두 가져간 뒤에 기록
+                state[source.key] = entry
+        finally:
+            self.stats.elapsed = time.perf_counter() - start
+            self._save_state(state)
+
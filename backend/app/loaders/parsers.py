@@ -0,0 +1,157 @@
+"""
+파일 형식별 텍스트 추출기
+
+프로세스 풀 작업자에서 실행되며 외부 서비스 없이 로컬에서 파싱합니다.
+- Markdown / 텍스트: 디코딩 (UTF-8 → CP949 → Latin-1 순서로 시도), YAML front matter 제거
+- HTML: 표준 라이브러리 html.parser (script/style 제외, 블록 태그는 줄바꿈)
+- DOCX: zip 안의 word/document.xml을 직접 읽음 (페이지 나누기 기준으로 페이지 구분)
+- PDF: pypdf로 페이지별 텍스트 추출 (pip install pypdf 필요)
+
+모든 파서는 bytes를 받아 [(페이지 텍스트, 페이지 메타데이터)] 목록을 반환합니다.
+"""
+
+import io
+import re
+import zipfile
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional, Tuple
+from xml.etree import ElementTree
+
+Page = Tuple[str, Dict]
+
+FILE_TYPES = {
+    ".pdf": "pdf",
+    ".docx": "docx",
+    ".html": "html",
+    ".htm": "html",
+    ".md": "markdown",
+    ".markdown": "markdown",
+    ".txt": "text",
+}
+
+_FRONT_MATTER = re.compile(r"\A---\s*\n.*?\n---\s*\n", re.DOTALL)
+_BLANK_LINES = re.compile(r"\n\s*\n\s*\n+")
+
+
+def file_type_for(name: str) -> Optional[str]:
+    """확장자로 파일 형식 결정 (지원하지 않으면 None)"""
+    dot = name.rfind(".")
+    return FILE_TYPES.get(name[dot:].lower()) if dot >= 0 else None
+
+
+def decode_text(data: bytes) -> str:
+    for encoding in ("utf-8-sig", "cp949"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("latin-1")
+
+
+def parse_text(data: bytes) -> List[Page]:
+    return [(decode_text(data), {})]
+
+
+def parse_markdown(data: bytes) -> List[Page]:
+    return [(_FRONT_MATTER.sub("", decode_text(data), count=1), {})]
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """본문 텍스트와 제목만 모으는 HTML 파서"""
+
+    SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "head"}
+    BLOCK_TAGS = {
+        "p", "div", "br", "li", "ul", "ol", "tr", "table", "section", "article",
+        "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "header", "footer",
+    }
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.title = ""
+        self._skip = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        elif tag in self.SKIP_TAGS:
+            self._skip += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        elif tag in self.SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip:
+            self.parts.append(data)
+
+
+def parse_html(data: bytes) -> List[Page]:
+    extractor = _HTMLTextExtractor()
+    extractor.feed(decode_text(data))
+    extractor.close()
+    lines = (line.strip() for line in "".join(extractor.parts).splitlines())
+    text = _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+    metadata = {"title": extractor.title.strip()} if extractor.title.strip() else {}
+    return [(text, metadata)]
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def parse_docx(data: bytes) -> List[Page]:
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+
+    pages: List[List[str]] = [[]]
+    for paragraph in root.iter(f"{_W}p"):
+        text = []
+        for node in paragraph.iter():
+            if node.tag == f"{_W}t":
+                text.append(node.text or "")
+            elif node.tag == f"{_W}tab":
+                text.append("\t")
+            elif node.tag == f"{_W}br" and node.get(f"{_W}type") != "page":
+                text.append("\n")
+            elif (node.tag == f"{_W}br" and node.get(f"{_W}type") == "page") or node.tag == f"{_W}lastRenderedPageBreak":
+                # 페이지 나누기 앞의 텍스트까지를 이전 페이지로
+                if text or pages[-1]:
+                    pages[-1].append("".join(text))
+                    pages.append([])
+                    text = []
+        pages[-1].append("".join(text))
+
+    results = ["\n".join(p for p in page if p).strip() for page in pages]
+    return [(text, {"page": i}) for i, text in enumerate(results) if text] or [("", {})]
+
+
+def parse_pdf(data: bytes) -> List[Page]:
+    try:
+        from pypdf import PdfReader
+    except ImportError as e:
+        raise ImportError("PDF 파싱에는 pypdf가 필요합니다: pip install pypdf") from e
+    reader = PdfReader(io.BytesIO(data))
+    return [(page.extract_text() or "", {"page": i}) for i, page in enumerate(reader.pages)]
+
+
+PARSERS: Dict[str, Callable[[bytes], List[Page]]] = {
+    "pdf": parse_pdf,
+    "docx": parse_docx,
+    "html": parse_html,
+    "markdown": parse_markdown,
+    "text": parse_text,
+}
+
+
+def parse_bytes(data: bytes, file_type: str) -> List[Page]:
+    """파일 내용을 형식에 맞는 파서로 페이지 목록으로 변환"""
+    return PARSERS[file_type](data)
@@ -2,14 +2,22 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from langserve import add_routes
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.messages import HumanMessage, AIMessage
 from langchain_community.chat_models import ChatOllama
 import json
 
 from app.config import settings
 from app.chains.chat_chain import create_chat_chain
 from app.graphs.chat_graph import create_chat_graph, create_streaming_chat_graph, convert_messages
-from app.api.routes import models
+from app.graphs.router import query_router
+from app.chains.prompts import assemble_chat_messages, build_system_prompt
+from app.chains.hedging import hedge_llm, hedge_stats
+from app.chains import ollama_native
+from app.utils.session_router import pick_ollama_host, rank_ollama_hosts
+from app.utils import tracing
+from app.utils.deadline import aiter_until, deadline_from_request
+from app.utils.tracing import TracingMiddleware, span
+from app.api.routes import models, rag
 
 app = FastAPI(
     title="e1soft LLM Backend",
@@ -24,8 +32,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Trace-Id"],
 )
 
+# 요청 단위 트레이싱 (TRACE_EXPORT 설정 또는 X-Trace 헤더/debug 플래그로 opt-in)
+app.add_middleware(TracingMiddleware)
+
+
+@app.on_event("shutdown")
+async def close_ollama_clients():
+    """직접 스트리밍용 공유 연결 종료"""
+    await ollama_native.close_clients()
+
 
 # Health check
 @app.get("/health")
@@ -40,6 +58,7 @@ add_routes(
     path="/chat",
     enable_feedback_endpoint=True,
     enable_public_trace_link_endpoint=True,
+    per_req_config_modifier=tracing.langserve_config_modifier,
 )
 
 
@@ -51,24 +70,33 @@ streaming_chat_graph = create_streaming_chat_graph()
 @app.post("/graph/chat")
 async def graph_chat(request: Request):
     """LangGraph 기반 채팅 (non-streaming)"""
-    body = await request.json()
+    with span("parse_body"):
+        body = await request.json()
     messages = body.get("messages", [])
     model_name = body.get("model", settings.OLLAMA_DEFAULT_MODEL)
+    deadline = deadline_from_request(request, body)
 
     # 메시지 변환
-    langchain_messages = convert_messages(messages)
-
-    # 그래프 실행
-    result = chat_graph.invoke({
-        "messages": langchain_messages,
-        "model_name": model_name,
-    })
-
-    # 마지막 AI 메시지 반환
+    with span("convert_messages", count=len(messages)):
+        langchain_messages = convert_messages(messages)
+
+    # 그래프 실행 (같은 대화는 같은 Ollama 인스턴스로 보내 KV 캐시 재사용)
+    with span("graph.invoke", model=model_name):
+        result = chat_graph.invoke({
+            "messages": langchain_messages,
+            "model_name": model_name,
+            "ollama_host": pick_ollama_host(messages, body.get("session_id")),
+            "deadline": deadline,
+        }, config=tracing.trace_config())
+
+    # 마지막 AI 메시지 반환 (deadline으로 잘렸으면 partial=True)
     last_message = result["messages"][-1]
     return {
         "role": "assistant",
         "content": last_message.content,
+        "model": result.get("routed_model", model_name),
+        "partial": deadline.partial,
+        "deadline": deadline.snapshot(),
     }
 
 
@@ -77,30 +105,67 @@ async def graph_chat_stream(request: Request):
     """LangGraph 기반 스트리밍 채팅"""
     import time
 
-    body = await request.json()
+    with span("parse_body"):
+        body = await request.json()
     messages = body.get("messages", [])
     model_name = body.get("model", settings.OLLAMA_DEFAULT_MODEL)
     debug_mode = body.get("debug", False)
+    # debug 모드는 완료 이벤트에 워터폴을 포함하므로 span 기록 시작
+    trace = tracing.start_recording() if debug_mode else None
+    deadline = deadline_from_request(request, body)
 
-    # 시스템 프롬프트
-    system_prompt = (
-        "You are a helpful AI assistant. "
-        "Respond in the same language as the user. "
-        "If the user speaks Korean, respond in Korean. "
-        "Provide clear, concise, and helpful responses. "
-        "/no_think"
-    )
+    # 시스템 프롬프트 (모든 채팅 경로 공통)
+    system_prompt = build_system_prompt("OLLAMA")
 
-    # LLM 초기화
-    llm = ChatOllama(
-        base_url=settings.OLLAMA_HOST,
-        model=model_name,
-        temperature=0.7,
-    )
+    # 메시지 변환
+    with span("convert_messages", count=len(messages)):
+        history = convert_messages(messages)
+
+    # 라우터: 간단한 질문은 소형 모델로 (그래프의 router 노드와 같은 규칙)
+    with span("router") as router_span:
+        decision = query_router.route(history, model_name)
+        if router_span is not None:
+            router_span.set(route=decision.route, reason=decision.reason, model=decision.model)
+    node_name = "chat_small" if decision.route == "small" else "chat"
+    model_name = decision.model
+
+    # LLM 초기화 (같은 대화는 같은 Ollama 인스턴스로 보내 KV 캐시 재사용)
+    # 헤징 사용 시 나머지 인스턴스를 우선순위대로 보조 후보로 사용
+    with span("client_init"):
+        hosts = rank_ollama_hosts(messages, body.get("session_id"))
+        if not body.get("hedge", settings.LLM_HEDGE_ENABLED):
+            hosts = hosts[:1]
+        # 시간이 부족하면 생성 토큰 수 제한 (그 외에는 deadline에 스트림을 끊음)
+        num_predict = deadline.cap_tokens(None)
+        # 헤징하지 않는 요청은 /api/chat 직접 스트리밍 가능 (요청/응답 형식은 같음)
+        native = len(hosts) == 1 and body.get("native_stream", settings.OLLAMA_FAST_STREAM)
+        llms = [
+            ChatOllama(base_url=host, model=model_name, temperature=0.7, num_predict=num_predict)
+            for host in hosts
+        ]
+        llm = hedge_llm(
+            llms[0],
+            llms[1:],
+            policy_name=f"OLLAMA:{model_name}",
+        )
 
     # 메시지 준비
-    langchain_messages = [SystemMessage(content=system_prompt)]
-    langchain_messages.extend(convert_messages(messages))
+    langchain_messages = assemble_chat_messages(history, system_prompt)
+    llm_config = tracing.trace_config()
+
+    hedge = None
+    ollama_info = {}
+
+    async def langchain_tokens():
+        """ChatOllama(헤징 포함) 스트림에서 토큰 문자열만"""
+        nonlocal hedge
+        stream = llm.astream(langchain_messages, config=llm_config)
+        try:
+            async for chunk in stream:
+                hedge = chunk.response_metadata.get('hedge', hedge)
+                yield chunk.content
+        finally:
+            await stream.aclose()
 
     async def generate():
         """스트리밍 응답 생성"""
@@ -111,10 +176,20 @@ async def graph_chat_stream(request: Request):
 
         # 그래프 실행 시작 이벤트
         if debug_mode:
-            yield f"data: {json.dumps({'type': 'graph_start', 'node': 'chat', 'model': model_name, 'timestamp': start_time})}\n\n"
-
-        async for chunk in llm.astream(langchain_messages):
-            content = chunk.content
+            yield f"data: {json.dumps({'type': 'graph_start', 'node': node_name, 'model': model_name, 'timestamp': start_time})}\n\n"
+
+        if native:
+            tokens = ollama_native.stream_chat(
+                hosts[0],
+                model_name,
+                langchain_messages,
+                options={"temperature": 0.7, "num_predict": num_predict},
+                info=ollama_info,
+            )
+        else:
+            tokens = langchain_tokens()
+
+        async for content in aiter_until(deadline, tokens):
             if content:  # 빈 토큰 필터링
                 current_time = time.time()
 
@@ -143,6 +218,9 @@ async def graph_chat_stream(request: Request):
         done_data = {
             'done': True,
             'full_response': full_response,
+            # deadline에 생성을 끊었으면 partial=True
+            'partial': deadline.partial,
+            'deadline': deadline.snapshot(),
         }
 
         if debug_mode:
@@ -153,8 +231,21 @@ async def graph_chat_stream(request: Request):
                 'ttft_ms': int(ttft * 1000),  # Time to First Token
                 'tokens_per_sec': round(tokens_per_sec, 2),
                 'model': model_name,
-                'node': 'chat',
+                'node': node_name,
+                'stream_path': 'native' if native else 'langchain',
+                'route': {
+                    'route': decision.route,
+                    'reason': decision.reason,
+                    'overhead_us': decision.overhead_us,
+                },
             }
+            if hedge:
+                done_data['stats']['hedge'] = hedge
+            if ollama_info:
+                done_data['stats']['ollama'] = ollama_info
+            if trace is not None:
+                done_data['trace_id'] = trace.trace_id
+                done_data['waterfall'] = trace.waterfall()
 
         yield f"data: {json.dumps(done_data)}\n\n"
 
@@ -175,29 +266,55 @@ async def graph_info():
         "name": "chat_graph",
         "description": "LangGraph 기반 채팅 워크플로우",
         "nodes": [
+            {
+                "id": "router",
+                "name": "Router Node",
+                "description": "규칙 기반 분류로 간단한 질문은 소형 모델, 복잡한 질문은 요청 모델로 라우팅",
+                "type": "router",
+            },
+            {
+                "id": "chat_small",
+                "name": "Small Chat Node",
+                "description": f"소형 모델({query_router.config.small_model or '미설정'})로 응답 생성",
+                "type": "llm",
+            },
             {
                 "id": "chat",
                 "name": "Chat Node",
-                "description": "Ollama LLM을 사용한 응답 생성",
+                "description": "요청 모델(Ollama LLM)로 응답 생성",
                 "type": "llm",
-            }
+            },
         ],
         "edges": [
-            {"from": "__start__", "to": "chat"},
+            {"from": "__start__", "to": "router"},
+            {"from": "router", "to": "chat_small", "condition": "route == small"},
+            {"from": "router", "to": "chat", "condition": "route == large"},
+            {"from": "chat_small", "to": "__end__"},
             {"from": "chat", "to": "__end__"},
         ],
         "features": [
             "스트리밍 응답",
             "동적 모델 선택",
+            "질문 난이도 기반 모델 라우팅",
             "다국어 지원",
             "토큰 통계",
         ],
+        "router": query_router.info(),
     }
 
 
+@app.get("/hedging/stats")
+async def hedging_stats():
+    """LLM 요청 헤징 통계 (정책별 요청 수, 헤지 비율, 보조 승리 수, 현재 지연 기준)"""
+    return {"enabled": settings.LLM_HEDGE_ENABLED, "policies": hedge_stats()}
+
+
 # 모델 관리 API 라우트
 app.include_router(models.router, prefix="/api/models", tags=["models"])
 
+# RAG 스트리밍 API 라우트
+app.include_router(rag.router, prefix="/rag", tags=["rag"])
+
 
 if __name__ == "__main__":
     import uvicorn
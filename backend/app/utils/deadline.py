@@ -0,0 +1,160 @@
+"""
+요청 deadline(지연 예산) 전파와 단계별 축소
+
+요청마다 남은 시간을 들고 다니며 검색/생성 단계가 이를 보고 스스로 줄이거나 멈춥니다.
+- 예산: X-Request-Deadline-Ms 헤더(남은 ms) → body "deadline_ms" → 경로별 기본값(DEADLINE_ROUTE_DEFAULTS) 순서
+- 항상: 검색(임베딩+벡터 검색)은 남은 시간의 DEADLINE_RETRIEVAL_SHARE까지만 기다리고,
+  생성은 deadline에 스트림을 끊음 → 그때까지의 결과를 partial 표시와 함께 반환
+- 남은 시간이 DEADLINE_TIGHT_MS보다 적으면: top_k를 남은 시간에 비례해 축소,
+  생성 토큰 수(num_predict/max_tokens)를 남은 시간 × DEADLINE_DECODE_TOKENS_PER_SEC로 제한
+
+적용한 축소와 중단 사유는 snapshot()으로 응답의 완료 이벤트에 실립니다.
+"""
+
+import asyncio
+import time
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+from fastapi import HTTPException, Request
+
+from app.config import settings
+
+
+DEADLINE_HEADER = "x-request-deadline-ms"
+
+T = TypeVar("T")
+
+
+class Deadline:
+    """요청 하나의 지연 예산 (budget_ms가 없거나 0 이하면 제한 없음)"""
+
+    def __init__(self, budget_ms: Optional[float] = None, source: str = "none"):
+        self.budget_ms = budget_ms if budget_ms and budget_ms > 0 else None
+        self.source = source  # header | body | route | none
+        self.started = time.monotonic()
+        self.degraded: List[str] = []
+        self.partial_reasons: List[str] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget_ms is not None
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.partial_reasons)
+
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self.started) * 1000
+
+    def remaining_ms(self) -> float:
+        if not self.enabled:
+            return float("inf")
+        return self.budget_ms - self.elapsed_ms()
+
+    def remaining_s(self) -> Optional[float]:
+        """남은 시간(초), 제한이 없으면 None (asyncio.wait_for timeout으로 바로 사용)"""
+        return max(0.0, self.remaining_ms() / 1000) if self.enabled else None
+
+    def expired(self) -> bool:
+        return self.remaining_ms() <= 0
+
+    def is_tight(self) -> bool:
+        return self.enabled and self.remaining_ms() < settings.DEADLINE_TIGHT_MS
+
+    def stage_timeout(self, share: float) -> Optional[float]:
+        """남은 시간 중 share 비율을 한 단계의 timeout(초)으로"""
+        remaining = self.remaining_s()
+        return None if remaining is None else remaining * share
+
+    def degrade(self, action: str):
+        self.degraded.append(action)
+
+    def mark_partial(self, reason: str):
+        if reason not in self.partial_reasons:
+            self.partial_reasons.append(reason)
+
+    def cap_top_k(self, top_k: int) -> int:
+        """시간이 부족하면 남은 시간에 비례해 검색 개수 축소 (최소 1)"""
+        if not self.is_tight():
+            return top_k
+        k = max(1, int(top_k * max(0.0, self.remaining_ms()) / settings.DEADLINE_TIGHT_MS))
+        if k < top_k:
+            self.degrade(f"top_k:{top_k}->{k}")
+        return k
+
+    def cap_tokens(self, max_tokens: Optional[int], reserve_ms: float = 0.0) -> Optional[int]:
+        """
+        시간이 부족하면 생성 토큰 수 상한 계산
+
+        reserve_ms는 생성 전에 남은 단계(검색 등)에 쓸 시간으로, 그만큼 빼고 계산합니다.
+        """
+        if not self.is_tight():
+            return max_tokens
+        available_s = max(0.0, self.remaining_ms() - reserve_ms) / 1000
+        cap = max(settings.DEADLINE_MIN_TOKENS, int(available_s * settings.DEADLINE_DECODE_TOKENS_PER_SEC))
+        if max_tokens is not None and max_tokens <= cap:
+            return max_tokens
+        self.degrade(f"max_tokens:{cap}")
+        return cap
+
+    def snapshot(self) -> Dict:
+        return {
+            "budget_ms": self.budget_ms,
+            "source": self.source,
+            "elapsed_ms": round(self.elapsed_ms(), 1),
+            "remaining_ms": round(self.remaining_ms(), 1) if self.enabled else None,
+            "degraded": list(self.degraded),
+            "partial": self.partial,
+            "partial_reasons": list(self.partial_reasons),
+        }
+
+
+def deadline_from_request(request: Request, body: Dict) -> Deadline:
+    """헤더 → body → 경로별 기본값 순서로 예산 결정"""
+    for source, value in (("header", request.headers.get(DEADLINE_HEADER)), ("body", body.get("deadline_ms"))):
+        if value in (None, ""):
+            continue
+        try:
+            return Deadline(float(value), source)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail=f"잘못된 deadline 값입니다: {value!r}")
+    default = settings.DEADLINE_ROUTE_DEFAULTS.get(request.url.path)
+    return Deadline(default, "route") if default else Deadline()
+
+
+async def aiter_until(deadline: Deadline, iterable: AsyncIterable[T], reason: str = "generation") -> AsyncIterator[T]:
+    """deadline까지만 비동기 스트림을 읽음 (도달하면 스트림을 닫고 partial 표시)"""
+    iterator = iterable.__aiter__()
+    try:
+        while True:
+            timeout = deadline.remaining_s()
+            if timeout is not None and timeout <= 0:
+                deadline.mark_partial(reason)
+                return
+            try:
+                item = await asyncio.wait_for(iterator.__anext__(), timeout)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                deadline.mark_partial(reason)
+                return
+            yield item
+    finally:
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def iter_until(deadline: Deadline, iterable: Iterable[T], reason: str = "generation") -> Iterator[T]:
+    """동기 스트림 버전 (청크 사이에서만 확인하므로 첫 청크 대기는 클라이언트 timeout으로 제한)"""
+    iterator = iter(iterable)
+    try:
+        for item in iterator:
+            yield item
+            if deadline.expired():
+                deadline.mark_partial(reason)
+                return
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
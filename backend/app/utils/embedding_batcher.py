@@ -0,0 +1,243 @@
+"""
+임베딩 마이크로 배칭
+
+여러 요청에서 동시에 들어오는 embed_query/embed_documents 호출을 몇 ms 동안 모아
+한 번의 배치 프로바이더 호출로 보내고, 결과를 기다리던 호출자에게 나눠 줍니다.
+- 첫 호출이 들어온 뒤 max_wait_ms까지, 또는 텍스트가 max_batch_size개 찰 때까지 모음
+- 배치는 스레드 풀에서 최대 max_concurrent_batches개까지 동시에 실행 (슬롯을 기다리는 동안 다음 배치가 커짐)
+- 동기 호출과 비동기 호출(aembed_*)을 같은 배처에서 처리 — 프로바이더/모델별로 프로세스 전역 공유
+- max_batch_size 이상인 embed_documents(인덱싱)는 이미 배치이므로 모으지 않고 같은 배치 호출로 바로 실행
+
+배치 호출 방식은 프로바이더마다 다릅니다.
+- Ollama: langchain_community OllamaEmbeddings는 텍스트마다 /api/embeddings를 호출하므로
+  /api/embed(input 목록)를 직접 호출합니다. 이 API는 정규화된 벡터를 반환하므로
+  L2 거리를 쓰는 컬렉션은 같은 설정(EMBED_BATCH_ENABLED)으로 인덱싱해야 합니다.
+- OpenAI 호환: embed_query가 embed_documents([text])[0]과 같으므로 embed_documents로 묶음
+- 그 외 프로바이더는 배칭하지 않음
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+from langchain_community.embeddings import OllamaEmbeddings
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+
+BatchFn = Callable[[str, List[str]], List[List[float]]]
+
+
+class EmbeddingBatcher:
+    """동시 임베딩 요청을 모아 배치로 실행하는 수집 스레드 + 실행 스레드 풀"""
+
+    def __init__(
+        self,
+        batch_fn: BatchFn,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        max_concurrent_batches: int = 4,
+        window: int = 2000,
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+        self._queue: "queue.Queue[Tuple[str, List[str], Future, float]]" = queue.Queue()
+        self._slots = threading.Semaphore(self.max_concurrent_batches)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = deque(maxlen=window)
+        self._queue_waits = deque(maxlen=window)
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+        self.errors = 0
+
+    def _ensure_started(self):
+        if self._executor is not None:
+            return
+        with self._start_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_concurrent_batches, thread_name_prefix="embed-batch")
+                threading.Thread(target=self._collect, name="embed-batch-collector", daemon=True).start()
+
+    def submit(self, kind: str, texts: List[str]) -> Future:
+        """kind("query" | "doc")와 텍스트 목록을 넣고, 벡터 목록을 돌려줄 Future 반환"""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((kind, list(texts), future, time.perf_counter()))
+        return future
+
+    def _collect(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][1])
+            until = batch[0][3] + self.max_wait
+            while size < self.max_batch_size:
+                timeout = until - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[1])
+            # 실행 슬롯이 빌 때까지 대기 (그동안 들어온 호출은 다음 배치로)
+            self._slots.acquire()
+            self._executor.submit(self._run, batch)
+
+    def _run(self, batch: List[Tuple[str, List[str], Future, float]]):
+        try:
+            started = time.perf_counter()
+            by_kind: Dict[str, List[Tuple[List[str], Future]]] = {}
+            for kind, texts, future, enqueued in batch:
+                by_kind.setdefault(kind, []).append((texts, future))
+                with self._stats_lock:
+                    self._queue_waits.append((started - enqueued) * 1000)
+            for kind, items in by_kind.items():
+                self._run_kind(kind, items)
+        finally:
+            self._slots.release()
+
+    def _run_kind(self, kind: str, items: List[Tuple[List[str], Future]]):
+        # 같은 텍스트는 한 번만 임베딩
+        unique: Dict[str, int] = {}
+        for texts, _ in items:
+            for text in texts:
+                unique.setdefault(text, len(unique))
+        texts = list(unique)
+        chunks = [texts[start:start + self.max_batch_size] for start in range(0, len(texts), self.max_batch_size)]
+        with self._stats_lock:
+            self.batches += len(chunks)
+            self._batch_sizes.extend(len(chunk) for chunk in chunks)
+        try:
+            vectors = [vector for chunk in chunks for vector in self.batch_fn(kind, chunk)]
+        except Exception as e:
+            with self._stats_lock:
+                self.errors += 1
+            for _, future in items:
+                future.set_exception(e)
+            return
+        with self._stats_lock:
+            self.requests += len(items)
+            self.texts += sum(len(t) for t, _ in items)
+        for item_texts, future in items:
+            future.set_result([vectors[unique[text]] for text in item_texts])
+
+    def run_direct(self, kind: str, texts: List[str]) -> List[List[float]]:
+        """큐를 거치지 않고 max_batch_size 단위로 바로 배치 호출 (큰 embed_documents용)"""
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.max_batch_size):
+            vectors.extend(self.batch_fn(kind, texts[start:start + self.max_batch_size]))
+        return vectors
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            sizes = list(self._batch_sizes)
+            waits = sorted(self._queue_waits)
+            stats = {"requests": self.requests, "texts": self.texts, "batches": self.batches, "errors": self.errors}
+
+        def pct(p: float) -> float:
+            return round(waits[min(len(waits) - 1, int(len(waits) * p / 100))], 3) if waits else 0.0
+
+        return {
+            **stats,
+            "mean_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            "queue_wait_ms": {"p50": pct(50), "p99": pct(99)},
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+def ollama_batch_fn(embeddings: OllamaEmbeddings, timeout: float = 60.0) -> BatchFn:
+    """Ollama /api/embed 배치 호출 (OllamaEmbeddings의 쿼리/문서 instruction 접두어 유지)"""
+    client = httpx.Client(base_url=embeddings.base_url, timeout=timeout, headers=embeddings.headers or {})
+
+    def batch(kind: str, texts: List[str]) -> List[List[float]]:
+        prefix = embeddings.query_instruction if kind == "query" else embeddings.embed_instruction
+        payload = {"model": embeddings.model, "input": [f"{prefix}{text}" for text in texts]}
+        response = client.post("/api/embed", json=payload)
+        response.raise_for_status()
+        return response.json()["embeddings"]
+
+    return batch
+
+
+def make_batch_fn(embeddings: Embeddings) -> Optional[BatchFn]:
+    """프로바이더에 맞는 배치 호출 함수 (배칭을 지원하지 않으면 None)"""
+    if isinstance(embeddings, OllamaEmbeddings):
+        return ollama_batch_fn(embeddings)
+    if isinstance(embeddings, OpenAIEmbeddings):
+        return lambda kind, texts: embeddings.embed_documents(texts)
+    return None
+
+
+class BatchedEmbeddings(Embeddings):
+    """EmbeddingBatcher를 거치는 임베딩 래퍼"""
+
+    def __init__(self, embeddings: Embeddings, batcher: EmbeddingBatcher):
+        self.embeddings = embeddings
+        self.batcher = batcher
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        if len(texts) >= self.batcher.max_batch_size:
+            return self.batcher.run_direct("doc", texts)
+        return self.batcher.submit("doc", texts).result()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.batcher.submit("query", [text]).result()[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        if len(texts) >= self.batcher.max_batch_size:
+            return await asyncio.to_thread(self.batcher.run_direct, "doc", texts)
+        return await asyncio.wrap_future(self.batcher.submit("doc", texts))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await asyncio.wrap_future(self.batcher.submit("query", [text])))[0]
+
+
+# namespace(프로바이더/모델/엔드포인트)별 공유 배처
+_batchers: Dict[str, EmbeddingBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def batch_embeddings(
+    embeddings: Embeddings,
+    namespace: str,
+    max_batch_size: int = 64,
+    max_wait_ms: float = 5.0,
+    max_concurrent_batches: int = 4,
+) -> Embeddings:
+    """배칭을 지원하는 프로바이더면 공유 배처를 거치는 래퍼로 감싸서 반환"""
+    batch_fn = make_batch_fn(embeddings)
+    if batch_fn is None:
+        return embeddings
+    with _batchers_lock:
+        batcher = _batchers.get(namespace)
+        if batcher is None:
+            batcher = _batchers[namespace] = EmbeddingBatcher(
+                batch_fn,
+                max_batch_size=max_batch_size,
+                max_wait_ms=max_wait_ms,
+                max_concurrent_batches=max_concurrent_batches,
+            )
+    return BatchedEmbeddings(embeddings, batcher)
+
+
+def batcher_stats() -> Dict[str, Dict]:
+    """namespace별 배처 통계"""
+    with _batchers_lock:
+        batchers = dict(_batchers)
+    return {namespace: batcher.stats() for namespace, batcher in batchers.items()}
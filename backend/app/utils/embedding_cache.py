@@ -0,0 +1,145 @@
+"""
+임베딩 캐시
+
+같은 텍스트를 다시 임베딩하지 않도록 벡터를 LRU로 보관하는 Embeddings 래퍼입니다.
+- 캐시 미스만 모아서 batch_size 단위로 프로바이더에 요청
+- namespace(프로바이더/모델)별 캐시를 프로세스 전역에서 공유
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+
+class _LRUVectorStore:
+    """스레드 안전한 LRU 벡터 저장소"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[bytes, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: bytes) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._data.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, key: bytes, vector: List[float]):
+        with self._lock:
+            self._data[key] = vector
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# namespace별 공유 캐시
+_shared_stores: Dict[str, _LRUVectorStore] = {}
+_shared_lock = threading.Lock()
+
+
+def _get_shared_store(namespace: str, max_entries: int) -> _LRUVectorStore:
+    with _shared_lock:
+        store = _shared_stores.get(namespace)
+        if store is None:
+            store = _shared_stores[namespace] = _LRUVectorStore(max_entries)
+        return store
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    LRU 캐시를 거치는 임베딩 래퍼
+
+    Args:
+        embeddings: 실제 임베딩 인스턴스
+        namespace: 캐시 공유 키 (None이면 인스턴스 전용 캐시)
+        max_entries: 캐시 최대 벡터 수
+        batch_size: 프로바이더 1회 호출당 최대 텍스트 수
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        namespace: str = None,
+        max_entries: int = 50_000,
+        batch_size: int = 64,
+    ):
+        self.embeddings = embeddings
+        self.namespace = namespace
+        self.batch_size = batch_size
+        if namespace:
+            self._store = _get_shared_store(namespace, max_entries)
+        else:
+            self._store = _LRUVectorStore(max_entries)
+
+    @property
+    def max_entries(self) -> int:
+        return self._store.max_entries
+
+    @staticmethod
+    def _key(kind: str, text: str) -> bytes:
+        # 프로바이더에 따라 문서/쿼리 임베딩이 다를 수 있으므로 구분해서 저장
+        return hashlib.sha1(f"{kind}:{text}".encode("utf-8")).digest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        # 캐시 미스 텍스트만 중복 없이 수집
+        missing: Dict[bytes, List[int]] = {}
+        for i, text in enumerate(texts):
+            key = self._key("doc", text)
+            vector = self._store.get(key)
+            if vector is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                results[i] = vector
+
+        keys = list(missing)
+        for start in range(0, len(keys), self.batch_size):
+            batch_keys = keys[start:start + self.batch_size]
+            batch_texts = [texts[missing[key][0]] for key in batch_keys]
+            vectors = self.embeddings.embed_documents(batch_texts)
+            for key, vector in zip(batch_keys, vectors):
+                self._store.put(key, vector)
+                for i in missing[key]:
+                    results[i] = vector
+
+        return results
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key("query", text)
+        vector = self._store.get(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self._store.put(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        # 내부 임베딩의 비동기 구현을 그대로 사용 (배처 등이 스레드 풀을 점유하지 않도록)
+        key = self._key("query", text)
+        vector = self._store.get(key)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            self._store.put(key, vector)
+        return vector
+
+    def cache_stats(self) -> Dict[str, float]:
+        """캐시 적중률 통계"""
+        total = self._store.hits + self._store.misses
+        return {
+            "entries": len(self._store),
+            "hits": self._store.hits,
+            "misses": self._store.misses,
+            "hit_rate": round(self._store.hits / total, 4) if total else 0.0,
+        }
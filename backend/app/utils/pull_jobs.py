@@ -0,0 +1,189 @@
+"""
+백그라운드 모델 다운로드(Ollama pull) 작업 관리
+
+pull은 수 분씩 걸리므로 HTTP 요청을 붙잡지 않고 백그라운드 작업으로 실행합니다.
+- Ollama의 스트리밍 pull 출력(NDJSON)으로 진행률 갱신
+- 같은 모델의 진행 중인 pull은 기존 작업을 그대로 반환 (중복 다운로드 방지)
+- 동시 pull 수 제한 (OLLAMA_MAX_PARALLEL_PULLS) — 다운로드가 추론 I/O를 잠식하지 않도록
+- 작업 상태는 프로세스 메모리에 보관하므로 클라이언트가 재접속해도 현재 상태부터 이어서 조회 가능
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from dataclasses import dataclass, field, fields
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from app.config import settings
+
+
+# 완료된 작업 보관 시간 (초)
+FINISHED_JOB_TTL = 3600
+
+_ACTIVE_STATES = ("queued", "running")
+
+
+@dataclass
+class PullJob:
+    """모델 pull 작업 상태"""
+    id: str
+    model: str
+    state: str = "queued"  # queued | running | success | error | cancelled
+    status: str = ""  # Ollama가 보낸 마지막 status 문자열
+    completed: int = 0
+    total: int = 0
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    version: int = 0  # 상태가 바뀔 때마다 증가 (SSE 이벤트 id)
+    layers: Dict[str, List[int]] = field(default_factory=dict, repr=False)
+    exception: Optional[Exception] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.state not in _ACTIVE_STATES
+
+    def snapshot(self) -> Dict:
+        data = {f.name: getattr(self, f.name) for f in fields(self) if f.name not in ("layers", "exception")}
+        data["percent"] = round(self.completed * 100 / self.total, 1) if self.total else 0.0
+        return data
+
+
+class PullJobManager:
+    """pull 작업 생성/중복 제거/동시성 제한/상태 구독"""
+
+    def __init__(self, max_parallel: int = 1):
+        self.max_parallel = max(1, max_parallel)
+        self.jobs: Dict[str, PullJob] = {}
+        self._active: Dict[str, PullJob] = {}  # model -> 진행 중인 작업
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._changed: Optional[asyncio.Condition] = None
+
+    def _primitives(self):
+        # 이벤트 루프 안에서 처음 사용할 때 생성
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_parallel)
+            self._changed = asyncio.Condition()
+        return self._semaphore, self._changed
+
+    async def _notify(self, job: PullJob):
+        job.version += 1
+        _, changed = self._primitives()
+        async with changed:
+            changed.notify_all()
+
+    def _prune(self):
+        now = time.time()
+        for job_id, job in list(self.jobs.items()):
+            if job.done and job.finished_at and now - job.finished_at > FINISHED_JOB_TTL:
+                del self.jobs[job_id]
+
+    def start(self, model: str, host: str = None):
+        """
+        pull 작업 시작
+
+        Returns:
+            (작업, 새로 만들었는지 여부) — 같은 모델이 진행 중이면 기존 작업을 반환
+        """
+        self._primitives()
+        self._prune()
+        existing = self._active.get(model)
+        if existing is not None and not existing.done:
+            return existing, False
+
+        job = PullJob(id=uuid.uuid4().hex[:12], model=model)
+        self.jobs[job.id] = job
+        self._active[model] = job
+        self._tasks[job.id] = asyncio.create_task(self._run(job, host or settings.OLLAMA_HOST))
+        return job, True
+
+    def get(self, job_id: str) -> Optional[PullJob]:
+        return self.jobs.get(job_id)
+
+    def list(self) -> List[PullJob]:
+        self._prune()
+        return sorted(self.jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    async def _run(self, job: PullJob, host: str):
+        semaphore, _ = self._primitives()
+        try:
+            async with semaphore:
+                job.state = "running"
+                job.started_at = time.time()
+                await self._notify(job)
+                await self._pull(job, host)
+            job.state = "success"
+        except asyncio.CancelledError:
+            # 종료 시 취소돼도 구독자와 중복 제거가 끝난 작업으로 보도록 종료 상태로 남김
+            job.state = "cancelled"
+            job.error = "cancelled"
+            raise
+        except Exception as e:
+            job.state = "error"
+            job.error = str(e) or type(e).__name__
+            job.exception = e
+        finally:
+            job.finished_at = time.time()
+            if self._active.get(job.model) is job:
+                del self._active[job.model]
+            self._tasks.pop(job.id, None)
+            await self._notify(job)
+
+    async def _pull(self, job: PullJob, host: str):
+        timeout = httpx.Timeout(30.0, read=600.0)
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            async with client.stream(
+                "POST", f"{host}/api/pull", json={"name": job.model, "stream": True}
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    progress = json.loads(line)
+                    if progress.get("error"):
+                        raise RuntimeError(progress["error"])
+                    self._apply_progress(job, progress)
+                    await self._notify(job)
+        if job.status != "success":
+            raise RuntimeError(f"pull이 완료되지 않았습니다 (마지막 상태: {job.status or '없음'})")
+
+    @staticmethod
+    def _apply_progress(job: PullJob, progress: Dict):
+        """레이어별 진행률을 합산해 전체 진행률 계산"""
+        job.status = progress.get("status", job.status)
+        digest = progress.get("digest")
+        if digest and progress.get("total"):
+            job.layers[digest] = [int(progress.get("completed") or 0), int(progress["total"])]
+            job.completed = sum(done for done, _ in job.layers.values())
+            job.total = sum(total for _, total in job.layers.values())
+
+    async def wait(self, job: PullJob) -> PullJob:
+        """작업 완료까지 대기"""
+        async for _ in self.subscribe(job):
+            pass
+        return job
+
+    async def subscribe(self, job: PullJob, last_version: int = -1) -> AsyncIterator[Dict]:
+        """
+        작업 상태 스냅샷 스트림
+
+        last_version보다 새로운 상태가 있으면 즉시 보내고, 이후 바뀔 때마다 최신 상태를 보냅니다.
+        진행률 갱신이 몰려도 최신 스냅샷 하나로 합쳐집니다. 작업이 끝나면 종료합니다.
+        """
+        _, changed = self._primitives()
+        while True:
+            if job.version > last_version:
+                last_version = job.version
+                yield job.snapshot()
+            if job.done:
+                return
+            async with changed:
+                await changed.wait_for(lambda: job.version > last_version)
+
+
+pull_jobs = PullJobManager(settings.OLLAMA_MAX_PARALLEL_PULLS)
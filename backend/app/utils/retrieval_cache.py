@@ -0,0 +1,226 @@
+"""
+검색 결과 캐시
+
+같은 질문이 반복되면 임베딩과 벡터 검색을 건너뛰도록 검색 결과(청크 id, 점수)를 보관합니다.
+- 키: (컬렉션, 정규화된 질문, top_k, score_threshold, 필터)
+- 무효화: 컬렉션별 generation 카운터 — index_documents가 쓸 때마다 증가시키고,
+  이전 generation으로 저장된 항목은 조회 시 버림 (쓰기가 없는 동안에만 재사용)
+- 메모리 상한(bytes) 기준 LRU 제거, 안전장치로 TTL
+- 문서 본문은 저장하지 않고 get_by_ids로 다시 읽음 (id를 주지 않는 저장소는 캐시하지 않음)
+
+generation은 프로세스 메모리에 있으므로 다른 프로세스의 쓰기는 TTL이 지나야 반영됩니다.
+"""
+
+import json
+import re
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+from app.config import settings
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+# 항목당 고정 오버헤드 추정치 (OrderedDict 노드, 튜플, 리스트 등)
+_ENTRY_OVERHEAD = 200
+
+
+def normalize_query(query: str) -> str:
+    """유니코드 정규화 + 대소문자/공백 통일 + 끝 문장부호 제거"""
+    text = unicodedata.normalize("NFKC", query).casefold()
+    return _WHITESPACE.sub(" ", text).strip().rstrip("?.!？。 ")
+
+
+def collection_key(vectorstore) -> str:
+    """벡터 저장소 인스턴스의 컬렉션 식별자 (get_vector_store가 설정, 없으면 인스턴스 id)"""
+    return getattr(vectorstore, "_retrieval_cache_key", None) or f"{type(vectorstore).__name__}:{id(vectorstore)}"
+
+
+class RetrievalCache:
+    """generation 기반 무효화를 지원하는 메모리 상한 LRU 캐시"""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl_seconds: float = 600.0):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # key -> (generation, 저장 시각, [(청크 id, 점수)], 추정 크기)
+        self._data: "OrderedDict[Tuple, Tuple]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def generation(self, collection: str) -> int:
+        with self._lock:
+            return self._generations.get(collection, 0)
+
+    def bump_generation(self, collection: str) -> int:
+        """컬렉션 쓰기 후 호출 — 기존 항목은 다음 조회 때 버려짐"""
+        with self._lock:
+            self._generations[collection] = self._generations.get(collection, 0) + 1
+            return self._generations[collection]
+
+    @staticmethod
+    def make_key(collection: str, query: str, k: int, score_threshold: Optional[float], filters: Any = None) -> Tuple:
+        filter_key = json.dumps(filters, sort_keys=True, default=str) if filters else ""
+        return (collection, normalize_query(query), k, score_threshold, filter_key)
+
+    def get(self, key: Tuple) -> Optional[List[Tuple[str, float]]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            generation, stored_at, hits, size = entry
+            if generation != self._generations.get(key[0], 0) or time.time() - stored_at > self.ttl_seconds:
+                del self._data[key]
+                self._bytes -= size
+                self.stale += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return hits
+
+    def put(self, key: Tuple, generation: int, hits: List[Tuple[str, float]]):
+        """검색 시작 시점의 generation으로 저장 (검색 중 쓰기가 있었으면 바로 무효)"""
+        size = _ENTRY_OVERHEAD + sum(sys.getsizeof(part) for part in key if isinstance(part, str))
+        size += sum(sys.getsizeof(doc_id) + 24 for doc_id, _ in hits)
+        with self._lock:
+            if generation != self._generations.get(key[0], 0) or size > self.max_bytes:
+                return
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[3]
+            self._data[key] = (generation, time.time(), hits, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= evicted[3]
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+retrieval_cache = RetrievalCache(
+    max_bytes=int(settings.RETRIEVAL_CACHE_MAX_MB * 1024 * 1024),
+    ttl_seconds=settings.RETRIEVAL_CACHE_TTL,
+)
+
+
+def lookup_documents(
+    vectorstore,
+    key: Tuple,
+    cache: RetrievalCache = None,
+) -> Optional[List[Tuple[Document, Optional[float]]]]:
+    """캐시된 id/점수로 문서를 다시 읽어 반환 (미스이거나 문서가 사라졌으면 None)"""
+    cache = cache or retrieval_cache
+    hits = cache.get(key)
+    if hits is None:
+        return None
+    if not hits:
+        return []
+    docs = vectorstore.get_by_ids([doc_id for doc_id, _ in hits])
+    by_id = {doc.id: doc for doc in docs}
+    if len(by_id) < len(hits):
+        return None
+    return [(by_id[doc_id], score) for doc_id, score in hits]
+
+
+def store_documents(
+    key: Tuple,
+    generation: int,
+    results: List[Tuple[Document, Optional[float]]],
+    cache: RetrievalCache = None,
+):
+    """검색 결과의 id/점수 저장 (id 없는 문서가 있거나 일부 샤드가 빠진 결과면 저장하지 않음)"""
+    if getattr(results, "partial", False) or any(not doc.id for doc, _ in results):
+        return
+    hits = [(doc.id, None if score is None else float(score)) for doc, score in results]
+    (cache or retrieval_cache).put(key, generation, hits)
+
+
+def cache_enabled_for(vectorstore) -> bool:
+    """캐시 사용 여부 — get_by_ids를 구현한 저장소만 (기본 VectorStore 구현은 NotImplementedError)"""
+    if not settings.RETRIEVAL_CACHE_ENABLED or vectorstore is None:
+        return False
+    return type(vectorstore).get_by_ids is not VectorStore.get_by_ids
+
+
+class CachedRetriever(BaseRetriever):
+    """
+    similarity_score_threshold 검색에 결과 캐시를 붙인 리트리버
+
+    vectorstore.as_retriever(search_type="similarity_score_threshold", ...)와 같은 결과를 반환합니다.
+    """
+
+    vectorstore: Any
+    k: int = 4
+    score_threshold: Optional[float] = None
+    filters: Optional[Dict] = None
+    cache: Any = None
+
+    def _search_kwargs(self) -> Dict:
+        kwargs: Dict[str, Any] = {"k": self.k}
+        if self.score_threshold is not None:
+            kwargs["score_threshold"] = self.score_threshold
+        if self.filters:
+            kwargs["filter"] = self.filters
+        return kwargs
+
+    def _key(self, query: str) -> Tuple:
+        return RetrievalCache.make_key(
+            collection_key(self.vectorstore), query, self.k, self.score_threshold, self.filters
+        )
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        cache = self.cache or retrieval_cache
+        key = self._key(query)
+        cached = lookup_documents(self.vectorstore, key, cache)
+        if cached is not None:
+            return [doc for doc, _ in cached]
+        generation = cache.generation(key[0])
+        results = self.vectorstore.similarity_search_with_relevance_scores(query, **self._search_kwargs())
+        store_documents(key, generation, results, cache)
+        return [doc for doc, _ in results]
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        cache = self.cache or retrieval_cache
+        key = self._key(query)
+        cached = lookup_documents(self.vectorstore, key, cache)
+        if cached is not None:
+            return [doc for doc, _ in cached]
+        generation = cache.generation(key[0])
+        results = await self.vectorstore.asimilarity_search_with_relevance_scores(query, **self._search_kwargs())
+        store_documents(key, generation, results, cache)
+        return [doc for doc, _ in results]
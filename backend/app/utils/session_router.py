@@ -0,0 +1,56 @@
+"""
+세션 고정 라우팅
+
+여러 Ollama 인스턴스(OLLAMA_HOSTS)를 쓸 때 같은 대화가 항상 같은 인스턴스로 가도록 해
+인스턴스에 남아 있는 KV 캐시(이전 턴의 prefix)를 재사용합니다.
+- 세션 키: 요청의 session_id / chat_id, 없으면 첫 user 메시지 해시
+- 인스턴스 선택: rendezvous(HRW) 해싱 — 인스턴스가 추가/제거되어도 나머지 세션은 그대로 유지
+"""
+
+import hashlib
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def session_key(messages: List[Dict], session_id: Optional[str] = None) -> str:
+    """
+    대화를 식별하는 세션 키
+
+    클라이언트가 세션 id를 주지 않으면 대화의 첫 user 메시지로 식별합니다
+    (같은 대화의 이후 턴에서도 첫 메시지는 변하지 않음).
+    """
+    if session_id:
+        return f"id:{session_id}"
+    for msg in messages:
+        if msg.get("role") == "user":
+            return "first:" + hashlib.sha1(str(msg.get("content", "")).encode("utf-8")).hexdigest()
+    return "empty"
+
+
+def pick_host(key: str, hosts: List[str] = None) -> str:
+    """세션 키에 대해 rendezvous 해싱으로 Ollama 호스트 선택"""
+    hosts = hosts or settings.OLLAMA_HOSTS
+    if len(hosts) == 1:
+        return hosts[0]
+    return max(hosts, key=lambda host: _hash(f"{host}|{key}"))
+
+
+def rank_hosts(key: str, hosts: List[str] = None) -> List[str]:
+    """세션 키에 대한 호스트 우선순위 (첫 번째가 pick_host 결과, 나머지는 헤징/페일오버 순서)"""
+    hosts = hosts or settings.OLLAMA_HOSTS
+    return sorted(hosts, key=lambda host: _hash(f"{host}|{key}"), reverse=True)
+
+
+def pick_ollama_host(messages: List[Dict], session_id: Optional[str] = None) -> str:
+    """요청 메시지/세션 id로 Ollama 호스트 선택"""
+    return pick_host(session_key(messages, session_id))
+
+
+def rank_ollama_hosts(messages: List[Dict], session_id: Optional[str] = None) -> List[str]:
+    """요청 메시지/세션 id에 대한 Ollama 호스트 우선순위"""
+    return rank_hosts(session_key(messages, session_id))
@@ -0,0 +1,442 @@
+"""
+요청 단위 지연 워터폴 트레이싱 (OpenTelemetry 형식 span)
+
+요청마다 Trace를 만들고 단계별 span(시작/종료 시각, 부모, 속성)을 기록합니다.
+- 수동 span: `with span("convert_messages"):` (기록 중이 아니면 아무것도 하지 않음)
+- LangChain 콜백(TracingCallbackHandler): 그래프 노드, 체인, 리트리버, LLM 호출을 자동 기록하고
+  Ollama 응답의 load/prompt_eval/eval 시간으로 대기·prefill·디코드 구간을 나눔
+- 내보내기: TRACE_EXPORT=file (JSONL) 또는 otlp (OTLP/HTTP JSON), 백그라운드 스레드에서 전송
+- 요청별 확인: X-Trace: 1 헤더 → Server-Timing / X-Trace-Id 응답 헤더,
+  스트리밍 엔드포인트의 debug 모드 → 완료 이벤트에 워터폴 포함
+
+TRACE_EXPORT가 비어 있고 요청이 opt-in하지 않으면 span을 만들지 않습니다.
+"""
+
+import contextvars
+import json
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+
+from app.config import settings
+
+
+TRACE_REQUEST_HEADER = "x-trace"
+
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("trace", default=None)
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("trace_span", default=None)
+
+
+class Span:
+    """하나의 구간 (OTel span과 같은 필드)"""
+
+    __slots__ = ("name", "span_id", "parent_id", "start_ns", "end_ns", "attributes")
+
+    def __init__(self, name: str, parent_id: Optional[str], start_ns: int = None, attributes: Dict = None):
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes or {}
+
+    def end(self, end_ns: int = None):
+        if self.end_ns is None:
+            self.end_ns = end_ns or time.time_ns()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+
+class Trace:
+    """요청 하나의 span 모음"""
+
+    def __init__(self, name: str, recording: bool):
+        self.trace_id = secrets.token_hex(16)
+        self.recording = recording
+        self.spans: List[Span] = []
+        self.root = self.add(name, None)
+
+    def add(self, name: str, parent_id: Optional[str], start_ns: int = None, attributes: Dict = None) -> Span:
+        s = Span(name, parent_id, start_ns, attributes)
+        self.spans.append(s)
+        return s
+
+    def waterfall(self) -> List[Dict]:
+        """루트 시작 기준 상대 시각(ms)으로 정리한 span 목록 (진행 중인 span은 현재까지)"""
+        now = time.time_ns()
+        origin = self.root.start_ns
+        depth = {self.root.span_id: 0}
+        rows = []
+        for s in sorted(self.spans, key=lambda s: s.start_ns):
+            depth[s.span_id] = depth.get(s.parent_id, -1) + 1
+            rows.append({
+                "name": s.name,
+                "start_ms": round((s.start_ns - origin) / 1e6, 2),
+                "duration_ms": round(((s.end_ns or now) - s.start_ns) / 1e6, 2),
+                "depth": depth[s.span_id],
+                **({"attributes": s.attributes} if s.attributes else {}),
+            })
+        return rows
+
+    def server_timing(self) -> str:
+        """Server-Timing 헤더 값 (루트 직계 자식 span 기준)"""
+        origin = self.root.start_ns
+        now = time.time_ns()
+        entries = []
+        for s in self.spans:
+            if s.parent_id != self.root.span_id:
+                continue
+            name = re.sub(r"[^A-Za-z0-9_.-]", "_", s.name)
+            entries.append(
+                f'{name};dur={((s.end_ns or now) - s.start_ns) / 1e6:.2f};desc="+{(s.start_ns - origin) / 1e6:.2f}ms"'
+            )
+        entries.append(f"total;dur={(now - origin) / 1e6:.2f}")
+        return ", ".join(entries)
+
+
+def current_trace() -> Optional[Trace]:
+    """기록 중인 현재 요청의 Trace (없으면 None)"""
+    trace = _current_trace.get()
+    return trace if trace is not None and trace.recording else None
+
+
+def start_recording() -> Optional[Trace]:
+    """현재 요청의 span 기록 시작 (본문 debug 플래그처럼 미들웨어 이후에 opt-in하는 경우)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.recording = True
+    return trace
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    현재 span의 자식 span 기록
+
+    async 코드에서도 사용할 수 있습니다 (contextvars가 태스크별로 복사됨).
+    """
+    trace = current_trace()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get() or trace.root
+    s = trace.add(name, parent.span_id, attributes=attributes)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.set(error=type(e).__name__)
+        raise
+    finally:
+        s.end()
+        _current_span.reset(token)
+
+
+def open_span(name: str, **attributes) -> Optional[Span]:
+    """
+    현재 span의 자식 span을 시작만 함 (with로 감쌀 수 없는 스트림 구간용)
+
+    현재 span을 바꾸지 않으므로 async generator 안에서도 안전합니다. close_llm_span으로 끝냅니다.
+    """
+    trace = current_trace()
+    if trace is None:
+        return None
+    parent = _current_span.get() or trace.root
+    return trace.add(name, parent.span_id, attributes=attributes)
+
+
+def close_llm_span(s: Optional[Span], info: Dict = None, **attributes):
+    """open_span으로 시작한 LLM span 종료 (Ollama 시간 정보가 있으면 대기/prefill/디코드 구간 추가)"""
+    if s is None:
+        return
+    s.set(**attributes)
+    s.end()
+    trace = current_trace()
+    if trace is not None and info:
+        _add_ollama_phases(trace, s, info)
+
+
+def callbacks() -> List[BaseCallbackHandler]:
+    """LangChain 호출 config에 넣을 콜백 목록 (기록 중이 아니면 빈 목록)"""
+    trace = current_trace()
+    if trace is None:
+        return []
+    return [TracingCallbackHandler(trace, _current_span.get() or trace.root)]
+
+
+def trace_config(config: Dict = None) -> Dict:
+    """Runnable config에 트레이싱 콜백 추가"""
+    config = dict(config or {})
+    handlers = callbacks()
+    if handlers:
+        existing = config.get("callbacks") or []
+        config["callbacks"] = [*existing, *handlers] if isinstance(existing, list) else handlers
+    return config
+
+
+async def langserve_config_modifier(config: Dict[str, Any], request) -> Dict[str, Any]:
+    """LangServe add_routes(per_req_config_modifier=...)용"""
+    return trace_config(config)
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """LangChain 실행(run)을 span으로 기록하는 콜백"""
+
+    # 스레드풀로 넘기지 않고 호출한 쪽에서 바로 실행 (시각 정확도와 오버헤드)
+    run_inline = True
+
+    def __init__(self, trace: Trace, parent: Span):
+        self.trace = trace
+        self.parent = parent
+        self.runs: Dict[UUID, Span] = {}
+        self.hidden = set()
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, tags=None, **attributes):
+        parent = self.runs.get(parent_run_id) if parent_run_id else None
+        parent = parent or self.parent
+        if tags and "langsmith:hidden" in tags:
+            # LangGraph 내부 실행(ChannelWrite 등)은 span을 만들지 않고 자식을 부모에 연결
+            self.runs[run_id] = parent
+            self.hidden.add(run_id)
+            return
+        self.runs[run_id] = self.trace.add(name, parent.span_id, attributes=attributes)
+
+    def _end(self, run_id: UUID, **attributes) -> Optional[Span]:
+        s = self.runs.pop(run_id, None)
+        if run_id in self.hidden:
+            self.hidden.discard(run_id)
+            return None
+        if s is not None:
+            s.set(**attributes)
+            s.end()
+        return s
+
+    @staticmethod
+    def _name(serialized: Optional[Dict], kwargs: Dict, default: str) -> str:
+        if kwargs.get("name"):
+            return kwargs["name"]
+        if serialized:
+            return serialized.get("name") or (serialized.get("id") or [default])[-1]
+        return default
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, self._name(serialized, kwargs, "chain"), tags=kwargs.get("tags"))
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=type(error).__name__)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, self._name(serialized, kwargs, "retriever"))
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id, documents=len(documents))
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=type(error).__name__)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        metadata = kwargs.get("metadata") or {}
+        self._start(
+            run_id, parent_run_id, self._name(serialized, kwargs, "chat_model"),
+            model=metadata.get("ls_model_name", ""),
+        )
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, self._name(serialized, kwargs, "llm"))
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        s = self.runs.get(run_id)
+        if s is not None and "ttft_ms" not in s.attributes:
+            s.attributes["ttft_ms"] = round((time.time_ns() - s.start_ns) / 1e6, 2)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        s = self._end(run_id)
+        if s is None:
+            return
+        try:
+            info = response.generations[0][0].generation_info or {}
+        except (IndexError, AttributeError):
+            info = {}
+        _add_ollama_phases(self.trace, s, info)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=type(error).__name__)
+
+
+def _add_ollama_phases(trace: Trace, llm_span: Span, info: Dict):
+    """
+    Ollama 응답의 시간 정보(ns)로 LLM span을 대기/로드/prefill/디코드 구간으로 분해
+
+    total_duration 밖의 시간(큐 대기, 네트워크, 클라이언트 처리)은 queue_and_network로 기록합니다.
+    """
+    if "total_duration" not in info:
+        return
+    load = int(info.get("load_duration") or 0)
+    prefill = int(info.get("prompt_eval_duration") or 0)
+    decode = int(info.get("eval_duration") or 0)
+    llm_span.set(
+        prompt_eval_count=info.get("prompt_eval_count", 0),
+        eval_count=info.get("eval_count", 0),
+    )
+    # 서버 측 처리는 응답 끝에서 역산해 배치
+    server_start = llm_span.end_ns - int(info["total_duration"])
+    if server_start > llm_span.start_ns:
+        trace.add("ollama.queue_and_network", llm_span.span_id, llm_span.start_ns).end(server_start)
+    cursor = max(server_start, llm_span.start_ns)
+    for name, duration in (("ollama.load", load), ("ollama.prefill", prefill), ("ollama.decode", decode)):
+        if duration:
+            trace.add(name, llm_span.span_id, cursor).end(min(cursor + duration, llm_span.end_ns))
+            cursor += duration
+
+
+# ---- 내보내기 ----
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(trace: Trace) -> Dict:
+    """OTLP/HTTP JSON 페이로드"""
+    spans = []
+    for s in trace.spans:
+        item = {
+            "traceId": trace.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 2 if s is trace.root else 1,  # SERVER / INTERNAL
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns or s.start_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+        }
+        if s.parent_id:
+            item["parentSpanId"] = s.parent_id
+        spans.append(item)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": settings.TRACE_SERVICE_NAME}},
+            ]},
+            "scopeSpans": [{"scope": {"name": "app.utils.tracing"}, "spans": spans}],
+        }]
+    }
+
+
+class _Exporter:
+    """완료된 Trace를 백그라운드 스레드에서 파일/OTLP로 내보냄 (큐가 가득 차면 버림)"""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.queue: "queue.Queue[Trace]" = queue.Queue(maxsize=1000)
+        self.dropped = 0
+        threading.Thread(target=self._worker, name="trace-exporter", daemon=True).start()
+
+    def submit(self, trace: Trace):
+        try:
+            self.queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _worker(self):
+        client = httpx.Client(timeout=5.0) if self.mode == "otlp" else None
+        while True:
+            trace = self.queue.get()
+            try:
+                if client is not None:
+                    client.post(settings.TRACE_OTLP_ENDPOINT, json=to_otlp(trace))
+                else:
+                    line = json.dumps({
+                        "trace_id": trace.trace_id,
+                        "name": trace.root.name,
+                        "start_unix_ns": trace.root.start_ns,
+                        "duration_ms": round((trace.root.end_ns - trace.root.start_ns) / 1e6, 2),
+                        "spans": trace.waterfall(),
+                    }, ensure_ascii=False, default=str)
+                    directory = os.path.dirname(settings.TRACE_FILE)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    with open(settings.TRACE_FILE, "a", encoding="utf-8") as f:
+                        f.write(line + "\n")
+            except Exception:
+                # 트레이스 내보내기 실패가 요청 처리에 영향을 주지 않도록 무시
+                pass
+
+
+_exporter: Optional[_Exporter] = None
+_exporter_lock = threading.Lock()
+
+
+def _get_exporter() -> Optional[_Exporter]:
+    global _exporter
+    mode = settings.TRACE_EXPORT
+    if mode not in ("file", "otlp"):
+        return None
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = _Exporter(mode)
+    return _exporter
+
+
+# ---- ASGI 미들웨어 ----
+
+class TracingMiddleware:
+    """
+    HTTP 요청마다 루트 span 생성
+
+    응답 본문이 끝까지 전송될 때 루트 span을 닫으므로 스트리밍 응답도 전체 시간이 기록됩니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        opted_in = any(
+            key == TRACE_REQUEST_HEADER.encode() and value not in (b"", b"0")
+            for key, value in scope.get("headers", [])
+        )
+        exporter = _get_exporter()
+        trace = Trace(f"{scope['method']} {scope['path']}", recording=opted_in or exporter is not None)
+        trace.root.set(**{"http.method": scope["method"], "http.route": scope["path"]})
+        token = _current_trace.set(trace)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                trace.root.set(**{"http.status_code": message["status"]})
+                if opted_in:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-trace-id", trace.trace_id.encode()))
+                    headers.append((b"server-timing", trace.server_timing().encode()))
+                    message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                trace.root.end()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            trace.root.end()
+            _current_trace.reset(token)
+            if exporter is not None and trace.recording:
+                exporter.submit(trace)
@@ -0,0 +1,397 @@
+"""
+양자화 임베디드 벡터 저장소
+
+대용량 컬렉션을 CPU 노드에서 적은 메모리로 검색하기 위한 로컬 벡터 저장소입니다.
+- int8(차원별 스케일) 또는 binary(부호 비트) 양자화 코드를 memmap 파일에 저장
+- NumPy 블록 스캔으로 후보 검색 후, float32 원본 벡터로 상위 후보 재채점(rescore)
+- 문서 본문/메타데이터는 JSONL에 저장하고 오프셋만 메모리에 유지
+
+디렉토리 구조 (persist_directory/collection_name/):
+    meta.json      차원, 개수, 용량, 양자화 방식
+    scales.npy     int8 차원별 스케일
+    codes.bin      양자화 코드 (memmap)
+    vectors.f32    정규화된 float32 원본 벡터 (memmap, 재채점 시에만 읽음)
+    deleted.bin    삭제 표시 (memmap)
+    docs.jsonl     id, 본문, 메타데이터
+"""
+
+import json
+import os
+import threading
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+
+QUANTIZATIONS = ("int8", "binary")
+
+# 이 행 수까지는 범위를 벗어난 값이 들어오면 스케일을 다시 잡고 기존 코드를 재양자화
+RECALIBRATE_LIMIT = 100_000
+
+# 비트 수 조회 테이블 (binary 해밍 거리 계산용)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class QuantizedVectorStore(VectorStore):
+    """
+    int8/binary 양자화 + float32 재채점 벡터 저장소
+
+    Args:
+        embedding: 임베딩 인스턴스
+        persist_directory: 저장 루트 디렉토리
+        collection_name: 컬렉션 이름 (하위 디렉토리)
+        quantization: "int8" 또는 "binary"
+        rescore_factor: k * rescore_factor 개 후보를 float32로 재채점
+        block_size: 스캔 시 한 번에 읽는 행 수
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        persist_directory: str = "./quantized_db",
+        collection_name: str = "default",
+        quantization: str = "int8",
+        rescore_factor: int = 4,
+        block_size: int = 16384,
+    ):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"지원하지 않는 양자화 방식입니다: {quantization}")
+        self._embedding = embedding
+        self.path = os.path.join(persist_directory, collection_name)
+        self.rescore_factor = rescore_factor
+        self.block_size = block_size
+        self._lock = threading.RLock()
+        os.makedirs(self.path, exist_ok=True)
+
+        self.meta = {"dim": None, "count": 0, "capacity": 0, "quantization": quantization}
+        meta_path = os.path.join(self.path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                self.meta.update(json.load(f))
+        self.quantization = self.meta["quantization"]
+
+        self._scales: Optional[np.ndarray] = None
+        self._codes = self._vectors = self._deleted = None
+        self._ids: List[str] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._offsets: List[int] = []
+        if self.meta["dim"]:
+            self._open_arrays()
+            self._load_docs_index()
+
+    # ------------------------------------------------------------------
+    # 파일 관리
+    # ------------------------------------------------------------------
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self.meta["dim"]
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _code_width(self) -> int:
+        return self.dim if self.quantization == "int8" else (self.dim + 7) // 8
+
+    def _code_dtype(self):
+        return np.int8 if self.quantization == "int8" else np.uint8
+
+    def _open_arrays(self):
+        capacity = self.meta["capacity"]
+        if capacity == 0:
+            return
+        if self.quantization == "int8":
+            self._scales = np.load(self._file("scales.npy"))
+        self._codes = np.memmap(self._file("codes.bin"), dtype=self._code_dtype(), mode="r+", shape=(capacity, self._code_width()))
+        self._vectors = np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._deleted = np.memmap(self._file("deleted.bin"), dtype=np.uint8, mode="r+", shape=(capacity,))
+
+    def _load_docs_index(self):
+        """docs.jsonl의 줄 오프셋과 id만 메모리에 적재"""
+        docs_path = self._file("docs.jsonl")
+        if not os.path.exists(docs_path):
+            return
+        with open(docs_path, "rb") as f:
+            offset = 0
+            for line in f:
+                if len(self._ids) >= self.meta["count"]:
+                    break
+                self._offsets.append(offset)
+                row_id = json.loads(line)["id"]
+                if not self._deleted[len(self._ids)]:
+                    self._id_to_row[row_id] = len(self._ids)
+                self._ids.append(row_id)
+                offset += len(line)
+
+    def _grow(self, needed: int):
+        """용량이 부족하면 파일을 늘리고 memmap을 다시 연다 (2배씩 증가)"""
+        capacity = self.meta["capacity"]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, 1024)
+        for array in (self._codes, self._vectors, self._deleted):
+            if array is not None:
+                array.flush()
+        for name, row_bytes in (
+            ("codes.bin", self._code_width()),
+            ("vectors.f32", self.dim * 4),
+            ("deleted.bin", 1),
+        ):
+            with open(self._file(name), "ab") as f:
+                f.truncate(new_capacity * row_bytes)
+        self._codes = self._vectors = self._deleted = None
+        self.meta["capacity"] = new_capacity
+        self._open_arrays()
+
+    def _save_meta(self):
+        tmp = self._file("meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, self._file("meta.json"))
+
+    # ------------------------------------------------------------------
+    # 양자화
+    # ------------------------------------------------------------------
+
+    def _quantize(self, vectors: np.ndarray) -> np.ndarray:
+        if self.quantization == "binary":
+            return np.packbits(vectors > 0, axis=1)
+        return np.clip(np.rint(vectors * self._scales), -127, 127).astype(np.int8)
+
+    def _calibrate(self, vectors: np.ndarray):
+        """
+        int8 차원별 스케일 결정
+
+        초기 RECALIBRATE_LIMIT 행까지는 기존 범위를 넘는 값이 들어오면 스케일을 넓히고
+        저장된 float32 원본으로 기존 코드를 다시 양자화합니다. 이후에는 클리핑합니다.
+        """
+        max_abs = np.abs(vectors).max(axis=0)
+        count = self.meta["count"]
+        if self._scales is not None:
+            current = 127.0 / self._scales
+            if count > RECALIBRATE_LIMIT or np.all(max_abs <= current):
+                return
+            max_abs = np.maximum(max_abs, current)
+        self._scales = (127.0 / np.maximum(max_abs, 1e-6)).astype(np.float32)
+        np.save(self._file("scales.npy"), self._scales)
+        for start in range(0, count, self.block_size):
+            end = min(start + self.block_size, count)
+            self._codes[start:end] = self._quantize(np.asarray(self._vectors[start:end]))
+
+    # ------------------------------------------------------------------
+    # 쓰기
+    # ------------------------------------------------------------------
+
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: Union[List[List[float]], np.ndarray],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """미리 계산된 임베딩으로 문서 추가"""
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        if len(vectors) == 0:
+            return []
+        metadatas = metadatas or [{}] * len(texts)
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+
+        with self._lock:
+            if self.dim is None:
+                self.meta["dim"] = int(vectors.shape[1])
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"임베딩 차원이 맞지 않습니다: {vectors.shape[1]} != {self.dim}")
+            if self.quantization == "int8":
+                self._calibrate(vectors)
+
+            start = self.meta["count"]
+            end = start + len(vectors)
+            self._grow(end)
+            self._codes[start:end] = self._quantize(vectors)
+            self._vectors[start:end] = vectors
+            self._deleted[start:end] = 0
+
+            # 같은 id가 이미 있으면 기존 행을 삭제 처리 (upsert)
+            for row_id in ids:
+                old = self._id_to_row.get(row_id)
+                if old is not None:
+                    self._deleted[old] = 1
+
+            docs_path = self._file("docs.jsonl")
+            with open(docs_path, "ab") as f:
+                offset = f.tell()
+                for row, (row_id, text, metadata) in enumerate(zip(ids, texts, metadatas), start=start):
+                    line = (json.dumps({"id": row_id, "text": text, "metadata": metadata}, ensure_ascii=False) + "\n").encode("utf-8")
+                    f.write(line)
+                    self._offsets.append(offset)
+                    self._id_to_row[row_id] = row
+                    self._ids.append(row_id)
+                    offset += len(line)
+
+            for array in (self._codes, self._vectors, self._deleted):
+                array.flush()
+            self.meta["count"] = end
+            self._save_meta()
+        return list(ids)
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        return self.add_embeddings(texts, self._embedding.embed_documents(texts), metadatas, ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        with self._lock:
+            for row_id in ids:
+                row = self._id_to_row.pop(row_id, None)
+                if row is not None:
+                    self._deleted[row] = 1
+            if self._deleted is not None:
+                self._deleted.flush()
+        return True
+
+    # ------------------------------------------------------------------
+    # 검색
+    # ------------------------------------------------------------------
+
+    def _read_docs(self, rows: List[int]) -> List[Document]:
+        docs = []
+        with open(self._file("docs.jsonl"), "rb") as f:
+            for row in rows:
+                f.seek(self._offsets[row])
+                item = json.loads(f.readline())
+                docs.append(Document(id=item["id"], page_content=item["text"], metadata=item["metadata"]))
+        return docs
+
+    def _candidates(self, query: np.ndarray, n: int) -> np.ndarray:
+        """양자화 코드 블록 스캔으로 상위 n개 후보 행 번호 반환"""
+        count = self.meta["count"]
+        if self.quantization == "binary":
+            query_code = np.packbits(query > 0)
+        else:
+            # (q / scale) · code ≈ q · x
+            query_scaled = (query / self._scales).astype(np.float32)
+
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, count, self.block_size):
+            end = min(start + self.block_size, count)
+            codes = self._codes[start:end]
+            if self.quantization == "binary":
+                # 해밍 거리가 작을수록 유사 → 음수로 바꿔 점수화
+                scores = -_POPCOUNT[np.bitwise_xor(codes, query_code)].sum(axis=1, dtype=np.int32).astype(np.float32)
+            else:
+                scores = codes.astype(np.float32) @ query_scaled
+            scores[self._deleted[start:end] != 0] = -np.inf
+
+            rows = np.arange(start, end, dtype=np.int64)
+            if len(scores) > n:
+                top = np.argpartition(scores, -n)[-n:]
+                rows, scores = rows[top], scores[top]
+            best_rows = np.concatenate([best_rows, rows])
+            best_scores = np.concatenate([best_scores, scores])
+            if len(best_scores) > n:
+                top = np.argpartition(best_scores, -n)[-n:]
+                best_rows, best_scores = best_rows[top], best_scores[top]
+
+        return best_rows[np.isfinite(best_scores)]
+
+    def search_by_vector_with_rows(self, embedding: List[float], k: int, candidates: int = None) -> List[Tuple[int, float]]:
+        """(행 번호, 코사인 유사도) 상위 k개 — 후보 검색 + float32 재채점"""
+        if not self.meta["count"]:
+            return []
+        query = _normalize(np.asarray([embedding], dtype=np.float32))[0]
+        rows = self._candidates(query, candidates or k * self.rescore_factor)
+        if len(rows) == 0:
+            return []
+        rows = np.sort(rows)  # 순차 접근으로 memmap 읽기 비용 감소
+        exact = self._vectors[rows] @ query
+        order = np.argsort(-exact)[:k]
+        return [(int(rows[i]), float(exact[i])) for i in order]
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Union[Dict[str, Any], Callable[[dict], bool]]] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        if not filter:
+            hits = self.search_by_vector_with_rows(embedding, k)
+            docs = self._read_docs([row for row, _ in hits])
+            return [(doc, score) for doc, (_, score) in zip(docs, hits)]
+
+        # 메타데이터 필터는 후보를 넉넉히 뽑은 뒤 재채점 결과에 적용
+        match = filter if callable(filter) else (lambda m: all(m.get(key) == value for key, value in filter.items()))
+        fetch = k * self.rescore_factor * 4
+        hits = self.search_by_vector_with_rows(embedding, fetch, candidates=fetch)
+        results = []
+        for doc, (_, score) in zip(self._read_docs([row for row, _ in hits]), hits):
+            if match(doc.metadata):
+                results.append((doc, score))
+                if len(results) == k:
+                    break
+        return results
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, **kwargs)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        # 정규화 벡터의 코사인 유사도를 [0, 1]로 잘라 relevance로 사용
+        return lambda score: min(1.0, max(0.0, score))
+
+    def get_by_ids(self, ids: List[str], /) -> List[Document]:
+        rows = [self._id_to_row[i] for i in ids if i in self._id_to_row]
+        return self._read_docs(rows)
+
+    def memory_footprint(self) -> Dict[str, int]:
+        """검색 시 상주하는 코드 크기와 재채점용 원본 크기 (bytes)"""
+        count = self.meta["count"]
+        if not self.dim:
+            return {"codes_bytes": 0, "vectors_bytes": 0}
+        return {
+            "codes_bytes": count * self._code_width(),
+            "vectors_bytes": count * self.dim * 4,
+        }
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> "QuantizedVectorStore":
+        store = cls(embedding=embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
@@ -0,0 +1,381 @@
+"""
+샤드(여러 컬렉션) 벡터 저장소
+
+부서별 대형 컬렉션처럼 하나의 컬렉션이 커져 검색이 느려질 때, 여러 컬렉션(샤드)을 하나의 저장소처럼 씁니다.
+- 검색: 쿼리 임베딩은 한 번만 계산하고 모든 샤드를 스레드 풀에서 동시에 검색
+  (max_parallel로 동시 검색 수를 제한하면 샤드를 나눠 차례로 검색, 최근에 빨랐던 샤드부터)
+- 병합: 샤드마다 자기 저장소의 relevance 함수(_select_relevance_score_fn)로 점수를 [0, 1]로 정규화한 뒤
+  전역 top-k 선택 (거리 함수가 다른 저장소끼리도 비교 가능). 점수를 주지 않는 샤드는 순위로 점수를 매김
+- 느린 샤드: shard_timeout(초)까지 끝나지 않은 샤드는 빼고 나머지 결과를 반환
+  (결과의 missing에 샤드와 사유 기록, partial 결과는 검색 결과 캐시에 저장하지 않음)
+- 쓰기: shard_key 메타데이터 값이 샤드 이름이면 그 샤드로, 아니면 값(없으면 source, 본문)의 해시로 샤드 선택
+  같은 source의 청크는 같은 샤드에 모임
+- 문서 id: "샤드/원래 id" 형식 (get_by_ids, delete도 같은 형식)
+
+시간 초과된 샤드 검색은 취소할 수 없으므로 백그라운드에서 끝날 때까지 풀의 스레드를 차지합니다.
+(아직 시작하지 않은 샤드는 건너뜀)
+"""
+
+import asyncio
+import heapq
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from app.config import settings
+
+
+# 벡터 저장소별 "벡터로 검색 + 점수" 메서드 (점수는 각 저장소의 relevance 함수로 정규화)
+_SCORED_VECTOR_SEARCH_METHODS = (
+    "similarity_search_by_vector_with_score",
+    "similarity_search_by_vector_with_relevance_scores",
+    "similarity_search_with_score_by_vector",
+)
+
+_ID_SEPARATOR = "/"
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(settings.SHARD_SEARCH_WORKERS, thread_name_prefix="shard-search")
+    return _executor
+
+
+def shard_collection_names(collection_name: Union[str, Sequence[str]], shards: Optional[int] = None) -> Optional[List[str]]:
+    """
+    샤드로 쓸 컬렉션 이름 목록 (샤딩하지 않으면 None)
+
+    - 컬렉션 목록 또는 쉼표로 구분한 문자열: 각 컬렉션이 샤드
+    - shards >= 2: "{collection}_shard00" ... 형식의 해시 샤드
+    """
+    if isinstance(collection_name, str):
+        names = [name.strip() for name in collection_name.split(",") if name.strip()]
+    else:
+        names = [str(name) for name in collection_name]
+    if len(names) > 1:
+        return names
+    if shards and int(shards) > 1:
+        return [f"{names[0]}_shard{i:02d}" for i in range(int(shards))]
+    return None
+
+
+class ShardResults(list):
+    """병합된 (문서, relevance) 목록 + 빠진 샤드 {이름: "timeout" | "error"}와 샤드별 소요 시간(ms)"""
+
+    def __init__(self, items: Iterable = (), missing: Dict[str, str] = None, shard_ms: Dict[str, float] = None):
+        super().__init__(items)
+        self.missing = missing or {}
+        self.shard_ms = shard_ms or {}
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.missing)
+
+
+class ShardedVectorStore(VectorStore):
+    """
+    여러 벡터 저장소를 샤드로 묶어 동시 검색/병합하는 저장소
+
+    Args:
+        shards: {샤드 이름: 벡터 저장소} (삽입 순서가 해시 라우팅 순서)
+        embedding: 쿼리 임베딩 (모든 샤드가 같은 임베딩 모델로 인덱싱되어 있어야 함)
+        shard_key: 쓰기 라우팅에 쓸 메타데이터 키
+        shard_timeout: 샤드 검색 제한 시간(초), None이면 SHARD_SEARCH_TIMEOUT, 0이면 제한 없음
+        max_parallel: 동시에 검색할 샤드 수 (None이면 전부 동시) — 로컬 저장소는 CPU 코어 수가 적당
+    """
+
+    def __init__(
+        self,
+        shards: Dict[str, VectorStore],
+        embedding: Embeddings,
+        shard_key: Optional[str] = None,
+        shard_timeout: Optional[float] = None,
+        max_parallel: Optional[int] = None,
+        window: int = 500,
+    ):
+        if not shards:
+            raise ValueError("샤드가 하나 이상 필요합니다")
+        self.shards = dict(shards)
+        self._names = list(self.shards)
+        self._embedding = embedding
+        self.shard_key = shard_key
+        self.shard_timeout = settings.SHARD_SEARCH_TIMEOUT if shard_timeout is None else shard_timeout
+        self.max_parallel = max(1, max_parallel or len(self._names))
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            name: {"searches": 0, "timeouts": 0, "errors": 0, "added": 0, "recent_ms": 0.0, "latencies": deque(maxlen=window)}
+            for name in self._names
+        }
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    # ------------------------------------------------------------------
+    # 쓰기 라우팅
+    # ------------------------------------------------------------------
+
+    def route(self, document: Document, shard_key: Optional[str] = None) -> str:
+        """문서를 넣을 샤드 이름"""
+        key = shard_key or self.shard_key
+        value = document.metadata.get(key) if key else None
+        if value is not None and str(value) in self.shards:
+            return str(value)
+        if value is None:
+            value = document.metadata.get("source", document.page_content)
+        return self._names[zlib.crc32(str(value).encode("utf-8")) % len(self._names)]
+
+    def add_documents(self, documents: List[Document], shard_key: Optional[str] = None, **kwargs: Any) -> List[str]:
+        """샤드별로 나눠 저장하고 "샤드/id" 목록을 입력 순서대로 반환"""
+        groups: Dict[str, List[int]] = {}
+        for i, document in enumerate(documents):
+            groups.setdefault(self.route(document, shard_key), []).append(i)
+
+        ids: List[Optional[str]] = [None] * len(documents)
+        for name, positions in groups.items():
+            shard_ids = self.shards[name].add_documents([documents[i] for i in positions], **kwargs)
+            for i, shard_id in zip(positions, shard_ids):
+                ids[i] = f"{name}{_ID_SEPARATOR}{shard_id}"
+            with self._stats_lock:
+                self._stats[name]["added"] += len(positions)
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        documents = [
+            Document(id=ids[i] if ids else None, page_content=text, metadata=metadatas[i])
+            for i, text in enumerate(texts)
+        ]
+        return self.add_documents(documents, **kwargs)
+
+    def _group_ids(self, ids: List[str]) -> Dict[str, List[str]]:
+        """ "샤드/id"를 샤드별 원래 id로 (접두어가 없으면 모든 샤드)"""
+        groups: Dict[str, List[str]] = {}
+        for doc_id in ids:
+            name, _, local_id = doc_id.partition(_ID_SEPARATOR)
+            if local_id and name in self.shards:
+                groups.setdefault(name, []).append(local_id)
+            else:
+                for shard in self._names:
+                    groups.setdefault(shard, []).append(doc_id)
+        return groups
+
+    def get_by_ids(self, ids: List[str], /) -> List[Document]:
+        docs = []
+        for name, local_ids in self._group_ids(list(ids)).items():
+            docs.extend(self._tag(name, doc) for doc in self.shards[name].get_by_ids(local_ids))
+        return docs
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        for name, local_ids in self._group_ids(ids).items():
+            self.shards[name].delete(local_ids, **kwargs)
+        return True
+
+    # ------------------------------------------------------------------
+    # 검색 (fan-out + 병합)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _tag(name: str, doc: Document) -> Document:
+        """샤드 이름을 id 접두어와 metadata["shard"]로 붙인 사본"""
+        return Document(
+            id=f"{name}{_ID_SEPARATOR}{doc.id}" if doc.id else None,
+            page_content=doc.page_content,
+            metadata={**doc.metadata, "shard": name},
+        )
+
+    @staticmethod
+    def _search_shard(shard: VectorStore, embedding: List[float], k: int, kwargs: Dict) -> List[Tuple[Document, float]]:
+        """샤드 하나를 검색해 [0, 1] relevance 점수로 반환"""
+        for method_name in _SCORED_VECTOR_SEARCH_METHODS:
+            method = getattr(shard, method_name, None)
+            if method is None:
+                continue
+            relevance = shard._select_relevance_score_fn()
+            return [(doc, relevance(score)) for doc, score in method(embedding, k=k, **kwargs)]
+        # 점수가 없으면 순위로 점수 부여 (1위 1.0 → k위 1/k)
+        docs = shard.similarity_search_by_vector(embedding, k=k, **kwargs)
+        return [(doc, 1.0 - rank / max(k, 1)) for rank, doc in enumerate(docs)]
+
+
+    def _search_lane(
+        self,
+        names: List[str],
+        embedding: List[float],
+        k: int,
+        kwargs: Dict,
+        results: Dict[str, Tuple],
+        started: set,
+        stop: threading.Event,
+    ):
+        """샤드 묶음을 차례로 검색해 results에 (결과, ms) 또는 None(오류) 기록 (시간 초과 후에는 남은 샤드를 건너뜀)"""
+        for name in names:
+            if stop.is_set():
+                return
+            started.add(name)
+            start = time.perf_counter()
+            try:
+                hits = self._search_shard(self.shards[name], embedding, k, kwargs)
+            except Exception:
+                results[name] = None
+                continue
+            results[name] = (hits, (time.perf_counter() - start) * 1000)
+
+    def similarity_search_by_vector_with_relevance_scores(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        score_threshold: Optional[float] = None,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> ShardResults:
+        """
+        모든 샤드를 동시에 검색해 전역 top-k (relevance 내림차순)
+
+        timeout을 주면 shard_timeout과 둘 중 짧은 쪽까지만 기다립니다 (요청 deadline 전달용).
+        샤드는 max_parallel개 lane에 나눠 실행하고, 각 lane은 최근에 빨랐던 샤드부터 검색해
+        느린 샤드만 시간 초과로 빠지도록 합니다.
+        """
+        limits = [t for t in (self.shard_timeout or None, timeout) if t is not None]
+        limit = min(limits) if limits else None
+        with self._stats_lock:
+            order = sorted(self._names, key=lambda name: self._stats[name]["recent_ms"])
+        lanes = [order[i::self.max_parallel] for i in range(min(self.max_parallel, len(order)))]
+
+        results: Dict[str, Tuple] = {}
+        started: set = set()
+        stop = threading.Event()
+        executor = _get_executor()
+        futures = [
+            executor.submit(self._search_lane, lane, embedding, k, kwargs, results, started, stop)
+            for lane in lanes
+        ]
+        wait(futures, timeout=limit)
+        stop.set()
+        finished = dict(results)
+        running = set(started) - set(finished)
+
+        merged: List[Tuple[Document, float]] = []
+        missing: Dict[str, str] = {}
+        shard_ms: Dict[str, float] = {}
+        for name in self._names:
+            if name not in finished:
+                # 시작하지 못했거나 아직 검색 중
+                missing[name] = "timeout"
+                continue
+            if finished[name] is None:
+                missing[name] = "error"
+                continue
+            hits, elapsed_ms = finished[name]
+            shard_ms[name] = round(elapsed_ms, 2)
+            merged.extend((self._tag(name, doc), score) for doc, score in hits)
+
+        with self._stats_lock:
+            for name in self._names:
+                stats = self._stats[name]
+                stats["searches"] += 1
+                if missing.get(name) == "timeout":
+                    stats["timeouts"] += 1
+                    if name in running:
+                        # 검색 중에 끊긴 샤드는 다음 검색에서 뒤로 (최소한 기다린 시간만큼 느린 것으로 봄)
+                        stats["recent_ms"] = max(stats["recent_ms"], (limit or 0) * 1000)
+                elif missing.get(name) == "error":
+                    stats["errors"] += 1
+                else:
+                    stats["latencies"].append(shard_ms[name])
+                    stats["recent_ms"] = shard_ms[name]
+
+        if score_threshold is not None:
+            merged = [(doc, score) for doc, score in merged if score >= score_threshold]
+        top = heapq.nlargest(k, merged, key=lambda item: item[1])
+        return ShardResults(top, missing, shard_ms)
+
+    def similarity_search_with_relevance_scores(
+        self,
+        query: str,
+        k: int = 4,
+        score_threshold: Optional[float] = None,
+        **kwargs: Any,
+    ) -> ShardResults:
+        return self.similarity_search_by_vector_with_relevance_scores(
+            self._embedding.embed_query(query), k, score_threshold=score_threshold, **kwargs
+        )
+
+    async def asimilarity_search_with_relevance_scores(
+        self,
+        query: str,
+        k: int = 4,
+        score_threshold: Optional[float] = None,
+        **kwargs: Any,
+    ) -> ShardResults:
+        embedding = await self._embedding.aembed_query(query)
+        return await asyncio.to_thread(
+            self.similarity_search_by_vector_with_relevance_scores,
+            embedding, k, score_threshold, **kwargs,
+        )
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        # 점수는 샤드 간 비교 가능한 relevance (클수록 유사)
+        return self.similarity_search_with_relevance_scores(query, k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_relevance_scores(embedding, k, **kwargs)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_relevance_scores(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        # 병합 단계에서 이미 relevance로 정규화됨
+        return lambda score: score
+
+    def stats(self) -> Dict[str, Dict]:
+        """샤드별 검색 수, 시간 초과/오류 수, 저장한 문서 수, 검색 지연 p50/p99(ms)"""
+        with self._stats_lock:
+            snapshot = {name: {**s, "latencies": sorted(s["latencies"])} for name, s in self._stats.items()}
+
+        def pct(values: List[float], p: float) -> float:
+            return round(values[min(len(values) - 1, int(len(values) * p / 100))], 3) if values else 0.0
+
+        return {
+            name: {
+                "searches": s["searches"],
+                "timeouts": s["timeouts"],
+                "errors": s["errors"],
+                "added": s["added"],
+                "latency_ms": {"p50": pct(s["latencies"], 50), "p99": pct(s["latencies"], 99)},
+            }
+            for name, s in snapshot.items()
+        }
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> "ShardedVectorStore":
+        raise NotImplementedError("샤드 저장소는 get_vector_store(collection_name=[...]) 또는 shards 설정으로 생성합니다")
@@ -0,0 +1,13 @@
+"""
+백엔드 벤치마크 / 부하 테스트 도구
+
+GPU 서버 없이 백엔드 자체 오버헤드를 측정하기 위한 패키지입니다.
+- fake_ollama: 결정적(deterministic) 응답을 내는 가짜 Ollama 서버
+- load: 지정한 동시성으로 백엔드 엔드포인트를 호출하는 부하 생성기
+- report: p50/p95/p99 지연, TTFT, 처리량, CPU 사용량 리포트 저장 및 비교
+
+사용 예:
+    python -m bench fake-ollama --port 11500 --ttft-ms 50 --tokens-per-sec 80
+    python -m bench run --spawn --concurrency 8 --requests 200 -o runs/base.json
+    python -m bench compare runs/base.json runs/new.json
+"""
@@ -0,0 +1,390 @@
+"""
+벤치마크 CLI
+
+    python -m bench fake-ollama [...]   가짜 Ollama 서버 실행
+    python -m bench run [...]           부하 테스트 실행 후 JSON 리포트 저장
+    python -m bench compare A.json B.json
+    python -m bench chunking [...]      청킹 전략 처리량 비교
+    python -m bench vectorstore [...]   양자화 벡터 저장소 recall/지연/메모리 비교
+    python -m bench prefix-cache [...]  프롬프트 배치/라우팅별 KV prefix 캐시 재사용 시뮬레이션
+    python -m bench router [...]        채팅 그래프 라우터 분류/노드 오버헤드
+"""
+
+import argparse
+import asyncio
+import sys
+
+from bench import fake_ollama
+from bench.load import DEFAULT_RAG_DIR, SCENARIOS, run_all, seed_rag_collection, spawn_stack, stop_stack
+from bench.report import (
+    build_report,
+    compare_reports,
+    format_comparison,
+    format_summary,
+    load_report,
+    save_report,
+)
+
+
+def _fake_args(args) -> list:
+    """run --spawn 시 가짜 Ollama에 전달할 인자"""
+    return [
+        "--ttft-ms", str(args.ttft_ms),
+        "--tokens-per-sec", str(args.tokens_per_sec),
+        "--response-tokens", str(args.response_tokens),
+        "--embed-ms", str(args.embed_ms),
+        "--embedding-dim", str(args.embedding_dim),
+    ]
+
+
+def cmd_run(args) -> int:
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"알 수 없는 시나리오: {', '.join(unknown)} (사용 가능: {', '.join(SCENARIOS)})")
+        return 2
+
+    processes = ()
+    base_url = args.base_url
+    backend_pid = args.backend_pid
+    if args.spawn:
+        processes = spawn_stack(
+            backend_port=args.backend_port,
+            ollama_port=args.ollama_port,
+            fake_args=_fake_args(args),
+        )
+        base_url = f"http://127.0.0.1:{args.backend_port}"
+        backend_pid = processes[0].pid
+
+    options = {"rag_dir": args.rag_dir}
+    try:
+        if args.spawn and any(name.startswith("rag") for name in names):
+            chunks = seed_rag_collection(f"http://127.0.0.1:{args.ollama_port}", args.rag_dir, args.rag_docs)
+            print(f"RAG 컬렉션 준비: {chunks} chunks")
+        results = asyncio.run(
+            run_all(
+                base_url,
+                names,
+                args.concurrency,
+                args.requests,
+                args.model,
+                warmup=args.warmup,
+                backend_pid=backend_pid,
+                options=options,
+            )
+        )
+    finally:
+        stop_stack(*processes)
+
+    meta = {
+        "base_url": base_url,
+        "concurrency": args.concurrency,
+        "requests_per_scenario": args.requests,
+        "model": args.model,
+        "spawned": args.spawn,
+    }
+    if args.spawn:
+        meta["fake_ollama"] = {
+            "ttft_ms": args.ttft_ms,
+            "tokens_per_sec": args.tokens_per_sec,
+            "response_tokens": args.response_tokens,
+            "embed_ms": args.embed_ms,
+            "embedding_dim": args.embedding_dim,
+        }
+    report = build_report(results, meta)
+    print(format_summary(report))
+    if args.output:
+        save_report(report, args.output)
+        print(f"\n리포트 저장: {args.output}")
+    return 0
+
+
+def cmd_compare(args) -> int:
+    rows = compare_reports(load_report(args.base), load_report(args.new), threshold=args.threshold / 100)
+    print(format_comparison(rows))
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+def cmd_chunking(args) -> int:
+    from bench.chunking import format_chunking, run_chunking_benchmark
+
+    report = run_chunking_benchmark(
+        num_docs=args.docs,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        ollama_url=args.ollama_url,
+    )
+    print(format_chunking(report))
+    if args.output:
+        save_report(report, args.output)
+        print(f"\n리포트 저장: {args.output}")
+    return 0
+
+
+def cmd_vectorstore(args) -> int:
+    from bench.vectorstore import format_vectorstore, run_vectorstore_benchmark
+
+    report = run_vectorstore_benchmark(
+        count=args.count,
+        dim=args.dim,
+        queries=args.queries,
+        k=args.k,
+        rescore_factor=args.rescore_factor,
+    )
+    print(format_vectorstore(report))
+    if args.output:
+        save_report(report, args.output)
+        print(f"\n리포트 저장: {args.output}")
+    return 0
+
+
+def cmd_prefix_cache(args) -> int:
+    from bench.prefix_cache import format_prefix_cache, run_prefix_cache_benchmark
+
+    report = run_prefix_cache_benchmark(
+        conversations=args.conversations,
+        turns=args.turns,
+        instances=args.instances,
+        slots=args.slots,
+        context_words=args.context_words,
+        prefill_ms_per_token=args.prefill_ms_per_token,
+    )
+    print(format_prefix_cache(report))
+    if args.output:
+        save_report(report, args.output)
+        print(f"\n리포트 저장: {args.output}")
+    return 0
+
+
+def cmd_router(args) -> int:
+    from bench.router import format_router, run_router_benchmark
+
+    report = run_router_benchmark(count=args.requests, graph_runs=args.graph_runs)
+    print(format_router(report))
+    if args.output:
+        save_report(report, args.output)
+        print(f"\n리포트 저장: {args.output}")
+    return 0
+
+
+def cmd_retrieval_cache(args) -> int:
+    from bench.retrieval_cache import format_retrieval_cache, run_retrieval_cache_benchmark
+
+    report = run_retrieval_cache_benchmark(
+        docs=args.docs,
+        queries=args.queries,
+        distinct=args.distinct,
+        k=args.k,
+        embed_ms=args.embed_ms,
+    )
+    print(format_retrieval_cache(report))
+    if args.output:
+        save_report(report, args.output)
+        print(f"\n리포트 저장: {args.output}")
+    return 0
+
+
+def cmd_loader(args) -> int:
+    from bench.loader import format_loader, run_loader_benchmark
+
+    workers = [int(w) for w in args.workers.split(",")] if args.workers else None
+    report = run_loader_benchmark(files=args.files, workers=workers)
+    print(format_loader(report))
+    if args.output:
+        save_report(report, args.output)
+        print(f"\n리포트 저장: {args.output}")
+    return 0
+
+
+def cmd_embed_batch(args) -> int:
+    from bench.embed_batch import format_embed_batch, run_embed_batch_benchmark
+
+    report = run_embed_batch_benchmark(
+        concurrency=[int(c) for c in args.concurrency.split(",")],
+        queries=args.queries,
+        embed_ms=args.embed_ms,
+        embed_parallel=args.embed_parallel,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        port=args.port,
+    )
+    print(format_embed_batch(report))
+    if args.output:
+        save_report(report, args.output)
+        print(f"\n리포트 저장: {args.output}")
+    return 0
+
+
+def cmd_native_stream(args) -> int:
+    from bench.native_stream import format_native_stream, run_native_stream_benchmark
+
+    report = run_native_stream_benchmark(
+        concurrency=[int(c) for c in args.concurrency.split(",")],
+        requests=args.requests,
+        ttft_ms=args.ttft_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        response_tokens=args.response_tokens,
+        rounds=args.rounds,
+        backend_port=args.backend_port,
+        ollama_port=args.ollama_port,
+    )
+    print(format_native_stream(report))
+    if args.output:
+        save_report(report, args.output)
+        print(f"\n리포트 저장: {args.output}")
+    return 0
+
+
+def cmd_sharding(args) -> int:
+    from bench.sharding import format_sharding, run_sharding_benchmark
+
+    report = run_sharding_benchmark(
+        count=args.count,
+        dim=args.dim,
+        shards=args.shards,
+        queries=args.queries,
+        k=args.k,
+        slow_ms=args.slow_ms,
+        timeout_ms=args.timeout_ms,
+    )
+    print(format_sharding(report))
+    if args.output:
+        save_report(report, args.output)
+        print(f"\n리포트 저장: {args.output}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench", description="백엔드 벤치마크 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    fake = sub.add_parser("fake-ollama", help="가짜 Ollama 서버 실행")
+    fake_ollama.add_arguments(fake)
+
+    run = sub.add_parser("run", help="부하 테스트 실행")
+    run.add_argument("--base-url", default="http://127.0.0.1:8000")
+    run.add_argument("--scenarios", default=",".join(SCENARIOS))
+    run.add_argument("--concurrency", type=int, default=8)
+    run.add_argument("--requests", type=int, default=100, help="시나리오별 측정 요청 수")
+    run.add_argument("--warmup", type=int, default=2)
+    run.add_argument("--model", default="llama3")
+    run.add_argument("--backend-pid", type=int, default=None, help="CPU 측정 대상 백엔드 프로세스 pid")
+    run.add_argument("--spawn", action="store_true", help="가짜 Ollama와 백엔드를 직접 실행")
+    run.add_argument("--backend-port", type=int, default=8800)
+    run.add_argument("--ollama-port", type=int, default=11500)
+    run.add_argument("--ttft-ms", type=float, default=50.0)
+    run.add_argument("--tokens-per-sec", type=float, default=100.0)
+    run.add_argument("--response-tokens", type=int, default=64)
+    run.add_argument("--embed-ms", type=float, default=5.0)
+    run.add_argument("--embedding-dim", type=int, default=768)
+    run.add_argument("--rag-dir", default=DEFAULT_RAG_DIR, help="RAG 시나리오용 QUANTIZED 컬렉션 경로")
+    run.add_argument("--rag-docs", type=int, default=100, help="--spawn 시 RAG 컬렉션에 넣을 합성 문서 수")
+    run.add_argument("-o", "--output", default=None, help="JSON 리포트 저장 경로")
+
+    compare = sub.add_parser("compare", help="두 리포트 비교 (회귀 시 종료 코드 1)")
+    compare.add_argument("base")
+    compare.add_argument("new")
+    compare.add_argument("--threshold", type=float, default=10.0, help="회귀 판정 기준 (%%)")
+
+    chunking = sub.add_parser("chunking", help="청킹 전략 처리량 비교 (RECURSIVE vs SEMANTIC)")
+    chunking.add_argument("--docs", type=int, default=200)
+    chunking.add_argument("--chunk-size", type=int, default=1000)
+    chunking.add_argument("--chunk-overlap", type=int, default=200)
+    chunking.add_argument("--ollama-url", default=None, help="지정 시 Ollama 임베딩 사용 (예: 가짜 Ollama)")
+    chunking.add_argument("-o", "--output", default=None)
+
+    vectorstore = sub.add_parser("vectorstore", help="양자화 벡터 저장소 vs float32 비교")
+    vectorstore.add_argument("--count", type=int, default=200_000)
+    vectorstore.add_argument("--dim", type=int, default=384)
+    vectorstore.add_argument("--queries", type=int, default=200)
+    vectorstore.add_argument("--k", type=int, default=10)
+    vectorstore.add_argument("--rescore-factor", type=int, default=4)
+    vectorstore.add_argument("-o", "--output", default=None)
+
+    prefix = sub.add_parser("prefix-cache", help="프롬프트 배치/라우팅별 KV prefix 캐시 재사용 시뮬레이션")
+    prefix.add_argument("--conversations", type=int, default=16)
+    prefix.add_argument("--turns", type=int, default=10)
+    prefix.add_argument("--instances", type=int, default=4)
+    prefix.add_argument("--slots", type=int, default=4, help="인스턴스별 KV 캐시 슬롯 수")
+    prefix.add_argument("--context-words", type=int, default=300)
+    prefix.add_argument("--prefill-ms-per-token", type=float, default=0.5)
+    prefix.add_argument("-o", "--output", default=None)
+
+    router = sub.add_parser("router", help="채팅 그래프 라우터 분류/노드 오버헤드")
+    router.add_argument("--requests", type=int, default=5000)
+    router.add_argument("--graph-runs", type=int, default=500)
+    router.add_argument("-o", "--output", default=None)
+
+    rcache = sub.add_parser("retrieval-cache", help="검색 결과 캐시 적중률/지연과 쓰기 후 무효화")
+    rcache.add_argument("--docs", type=int, default=200)
+    rcache.add_argument("--queries", type=int, default=2000)
+    rcache.add_argument("--distinct", type=int, default=200, help="서로 다른 질문 수 (Zipf 분포로 반복)")
+    rcache.add_argument("--k", type=int, default=5)
+    rcache.add_argument("--embed-ms", type=float, default=5.0, help="쿼리 임베딩 지연")
+    rcache.add_argument("-o", "--output", default=None)
+
+    loader = sub.add_parser("loader", help="병렬 문서 로더 처리량과 변경 없는 파일 건너뛰기")
+    loader.add_argument("--files", type=int, default=600)
+    loader.add_argument("--workers", default=None, help="쉼표 구분 작업자 수 목록 (기본: 1, 4, CPU 수)")
+    loader.add_argument("-o", "--output", default=None)
+
+    ebatch = sub.add_parser("embed-batch", help="동시 쿼리 임베딩 마이크로 배칭 처리량/지연")
+    ebatch.add_argument("--concurrency", default="1,8,32,64", help="쉼표 구분 동시 호출자 수 목록")
+    ebatch.add_argument("--queries", type=int, default=256, help="동시성 수준별 쿼리 수")
+    ebatch.add_argument("--embed-ms", type=float, default=20.0, help="가짜 서버의 임베딩 요청당 지연")
+    ebatch.add_argument("--embed-parallel", type=int, default=4, help="가짜 서버가 동시에 처리하는 임베딩 요청 수")
+    ebatch.add_argument("--max-batch-size", type=int, default=64)
+    ebatch.add_argument("--max-wait-ms", type=float, default=5.0)
+    ebatch.add_argument("--port", type=int, default=11520)
+    ebatch.add_argument("-o", "--output", default=None)
+
+    nstream = sub.add_parser("native-stream", help="스트리밍 경로별 토큰당 백엔드 CPU (ChatOllama vs /api/chat 직접)")
+    nstream.add_argument("--concurrency", default="1,8", help="쉼표 구분 동시 요청 수 목록")
+    nstream.add_argument("--requests", type=int, default=100, help="경로/라운드별 요청 수")
+    nstream.add_argument("--rounds", type=int, default=2, help="경로를 번갈아 실행하는 횟수")
+    nstream.add_argument("--ttft-ms", type=float, default=20.0)
+    nstream.add_argument("--tokens-per-sec", type=float, default=2000.0)
+    nstream.add_argument("--response-tokens", type=int, default=256)
+    nstream.add_argument("--backend-port", type=int, default=8810)
+    nstream.add_argument("--ollama-port", type=int, default=11540)
+    nstream.add_argument("-o", "--output", default=None)
+
+    sharding = sub.add_parser("sharding", help="샤드 컬렉션 fan-out 검색 지연/병합 일치율과 느린 샤드 timeout")
+    sharding.add_argument("--count", type=int, default=200_000)
+    sharding.add_argument("--dim", type=int, default=384)
+    sharding.add_argument("--shards", type=int, default=4)
+    sharding.add_argument("--queries", type=int, default=200)
+    sharding.add_argument("--k", type=int, default=10)
+    sharding.add_argument("--slow-ms", type=float, default=500.0, help="느린 샤드에 더할 지연")
+    sharding.add_argument("--timeout-ms", type=float, default=None, help="샤드 검색 제한 시간 (기본: 샤드 검색 p99의 3배)")
+    sharding.add_argument("-o", "--output", default=None)
+
+    args = parser.parse_args(argv)
+    if args.command == "fake-ollama":
+        fake_ollama.run(args)
+        return 0
+    if args.command == "run":
+        return cmd_run(args)
+    if args.command == "chunking":
+        return cmd_chunking(args)
+    if args.command == "vectorstore":
+        return cmd_vectorstore(args)
+    if args.command == "prefix-cache":
+        return cmd_prefix_cache(args)
+    if args.command == "router":
+        return cmd_router(args)
+    if args.command == "retrieval-cache":
+        return cmd_retrieval_cache(args)
+    if args.command == "loader":
+        return cmd_loader(args)
+    if args.command == "embed-batch":
+        return cmd_embed_batch(args)
+    if args.command == "native-stream":
+        return cmd_native_stream(args)
+    if args.command == "sharding":
+        return cmd_sharding(args)
+    return cmd_compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
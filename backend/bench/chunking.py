@@ -0,0 +1,183 @@
+"""
+청킹 전략 처리량 벤치마크 (RECURSIVE vs SEMANTIC)
+
+주제가 섞인 합성 문서를 만들어 전략별로 다음을 측정합니다.
+- 처리량: docs/s, MB/s
+- 청크 수, 평균 길이, chunk_size 초과 여부
+- 주제 순도: 한 청크 안의 문장이 같은 주제에서 온 비율 (검색 정밀도의 대리 지표)
+
+임베딩은 기본적으로 프로세스 내 HashEmbeddings(단어 해시 bag-of-words)를 사용하고,
+--ollama-url을 주면 get_embeddings(OLLAMA)로 (가짜) Ollama 서버를 호출합니다.
+"""
+
+import hashlib
+import random
+import re
+import time
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.chains.rag_chain import get_embeddings, get_text_splitter
+from app.chains.semantic_splitter import split_sentences
+
+
+TOPICS = {
+    "etch": "etch plasma chamber gas pressure rate profile residue endpoint mask undercut",
+    "coating": "coating resist thickness spin uniformity bake nozzle viscosity film edge",
+    "pixel": "pixel dead bright subpixel driver transistor gate voltage leakage array",
+    "mura": "mura luminance blotch gamma compensation panel region contrast inspection camera",
+    "cleaning": "cleaning particle contamination rinse wafer brush chemical megasonic drying spot",
+}
+
+
+class HashEmbeddings(Embeddings):
+    """단어마다 고정 난수 벡터를 합산하는 결정적 임베딩 (공유 어휘 = 높은 유사도)"""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self._word_vectors: Dict[str, np.ndarray] = {}
+
+    def _word(self, word: str) -> np.ndarray:
+        vector = self._word_vectors.get(word)
+        if vector is None:
+            seed = int.from_bytes(hashlib.sha1(word.encode()).digest()[:8], "big")
+            vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+            self._word_vectors[word] = vector
+        return vector
+
+    def _embed(self, text: str) -> List[float]:
+        words = re.findall(r"\w+", text.lower())
+        if not words:
+            return [0.0] * self.dim
+        vector = np.sum([self._word(w) for w in words], axis=0)
+        return (vector / (np.linalg.norm(vector) or 1.0)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class TimedEmbeddings(Embeddings):
+    """임베딩 호출 시간을 누적하는 래퍼 (분할기 자체 오버헤드와 분리하기 위함)"""
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+        self.seconds = 0.0
+        self.texts = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        try:
+            return self.embeddings.embed_documents(texts)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.texts += len(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def make_corpus(num_docs: int, sections: int = 6, sentences_per_section: int = 8, seed: int = 7):
+    """
+    주제 구간이 이어붙은 합성 문서 생성
+
+    문단 경계(빈 줄)는 주제 경계와 무관한 위치에 넣어, 구분자 기반 분할이
+    주제 전환을 알 수 없도록 합니다.
+
+    Returns:
+        (문서 텍스트 목록, 문장 -> 주제 매핑)
+    """
+    rng = random.Random(seed)
+    names = list(TOPICS)
+    fillers = "the a of in and with for is was this that".split()
+    texts, sentence_topic = [], {}
+    for d in range(num_docs):
+        sentences = []
+        for s in range(sections):
+            topic = names[(d + s * 2 + rng.randrange(2)) % len(names)]
+            words = TOPICS[topic].split()
+            for k in range(sentences_per_section):
+                body = " ".join(rng.choice(words if rng.random() < 0.6 else fillers) for _ in range(rng.randint(8, 16)))
+                sentence = f"{body.capitalize()} {d}-{s}-{k}."
+                sentence_topic[sentence] = topic
+                sentences.append(sentence)
+        text = ""
+        for i, sentence in enumerate(sentences):
+            text += sentence + ("\n\n" if i and rng.random() < 0.15 else " ")
+        texts.append(text.strip())
+    return texts, sentence_topic
+
+
+def topic_purity(chunks: List[str], sentence_topic: Dict[str, str]) -> float:
+    """청크별 최다 주제 문장 비율의 평균"""
+    scores = []
+    for chunk in chunks:
+        topics = [sentence_topic[s] for s in split_sentences(chunk) if s in sentence_topic]
+        if topics:
+            scores.append(max(topics.count(t) for t in set(topics)) / len(topics))
+    return round(float(np.mean(scores)), 4) if scores else 0.0
+
+
+def run_chunking_benchmark(
+    num_docs: int = 200,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    ollama_url: str = None,
+    embedding_model: str = "nomic-embed-text",
+) -> Dict:
+    texts, sentence_topic = make_corpus(num_docs)
+    total_bytes = sum(len(t.encode("utf-8")) for t in texts)
+    if ollama_url:
+        base_embeddings = get_embeddings("OLLAMA", embedding_model, endpoint=ollama_url)
+    else:
+        base_embeddings = HashEmbeddings()
+
+    results = {}
+    for strategy in ("RECURSIVE", "SEMANTIC"):
+        embeddings = TimedEmbeddings(base_embeddings)
+        splitter = get_text_splitter(
+            strategy,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            embeddings=embeddings,
+        )
+        start = time.perf_counter()
+        chunks = [doc.page_content for doc in splitter.create_documents(texts)]
+        elapsed = time.perf_counter() - start
+        lengths = [len(c) for c in chunks]
+        results[strategy] = {
+            "seconds": round(elapsed, 4),
+            "docs_per_sec": round(num_docs / elapsed, 2),
+            "mb_per_sec": round(total_bytes / elapsed / 1e6, 3),
+            "embed_seconds": round(embeddings.seconds, 4),
+            "embedded_texts": embeddings.texts,
+            "splitter_overhead_seconds": round(elapsed - embeddings.seconds, 4),
+            "chunks": len(chunks),
+            "avg_chunk_chars": round(sum(lengths) / len(lengths), 1) if lengths else 0,
+            "max_chunk_chars": max(lengths) if lengths else 0,
+            "over_chunk_size": sum(1 for n in lengths if n > chunk_size),
+            "topic_purity": topic_purity(chunks, sentence_topic),
+        }
+
+    return {
+        "num_docs": num_docs,
+        "total_bytes": total_bytes,
+        "chunk_size": chunk_size,
+        "embeddings": f"ollama:{embedding_model}" if ollama_url else "hash",
+        "strategies": results,
+    }
+
+
+def format_chunking(report: Dict) -> str:
+    lines = [f"{'strategy':<12}{'docs/s':>10}{'MB/s':>9}{'chunks':>8}{'avg':>8}{'max':>7}{'over':>6}{'purity':>8}{'embed_s':>9}{'split_s':>9}"]
+    for name, r in report["strategies"].items():
+        lines.append(
+            f"{name:<12}{r['docs_per_sec']:>10.1f}{r['mb_per_sec']:>9.3f}{r['chunks']:>8}"
+            f"{r['avg_chunk_chars']:>8.0f}{r['max_chunk_chars']:>7}{r['over_chunk_size']:>6}{r['topic_purity']:>8.3f}"
+            f"{r['embed_seconds']:>9.3f}{r['splitter_overhead_seconds']:>9.3f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,113 @@
+"""
+임베딩 마이크로 배칭 벤치마크
+
+가짜 Ollama 서버를 하위 프로세스로 띄우고, 동시 쿼리 임베딩을 다음 두 방식으로 보내 비교합니다.
+- unbatched: OllamaEmbeddings.aembed_query (텍스트마다 /api/embeddings 한 번)
+- batched: BatchedEmbeddings (max_wait_ms 동안 모아 /api/embed 한 번)
+
+동시성 수준별로 처리량(queries/s), 호출자 지연 p50/p99, 평균 배치 크기를 측정합니다.
+가짜 서버는 --embed-parallel로 동시에 처리하는 임베딩 요청 수를 제한해 실제 서버의 제한된 병렬성을 모사합니다.
+"""
+
+import asyncio
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from langchain_community.embeddings import OllamaEmbeddings
+
+from app.utils.embedding_batcher import BatchedEmbeddings, EmbeddingBatcher, ollama_batch_fn
+from bench.load import BACKEND_DIR, _wait_until_ready
+from bench.report import summarize
+
+
+async def _drive(embeddings, queries: List[str], concurrency: int) -> Dict:
+    """concurrency개 호출자가 queries를 나눠 임베딩하고 호출별 지연 측정"""
+    latencies: List[float] = []
+    pending = iter(queries)
+
+    async def caller():
+        for text in pending:
+            start = time.perf_counter()
+            await embeddings.aembed_query(text)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "queries": len(latencies),
+        "elapsed_s": round(elapsed, 3),
+        "qps": round(len(latencies) / elapsed, 1),
+        "latency_ms": summarize(latencies),
+    }
+
+
+def run_embed_batch_benchmark(
+    concurrency: List[int] = None,
+    queries: int = 256,
+    embed_ms: float = 20.0,
+    embed_parallel: int = 4,
+    max_batch_size: int = 64,
+    max_wait_ms: float = 5.0,
+    max_concurrent_batches: int = 4,
+    port: int = 11520,
+) -> Dict:
+    concurrency = concurrency or [1, 8, 32, 64]
+    fake = subprocess.Popen(
+        [
+            sys.executable, "-m", "bench", "fake-ollama", "--port", str(port),
+            "--embed-ms", str(embed_ms), "--embed-parallel", str(embed_parallel),
+        ],
+        cwd=BACKEND_DIR,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_until_ready(f"{base_url}/api/tags")
+        base = OllamaEmbeddings(model="nomic-embed-text", base_url=base_url)
+        results = {}
+        for level in concurrency:
+            texts = [f"질문 {level}-{i}: 공정 불량 원인은?" for i in range(queries)]
+            unbatched = asyncio.run(_drive(base, texts, level))
+            batcher = EmbeddingBatcher(
+                ollama_batch_fn(base),
+                max_batch_size=max_batch_size,
+                max_wait_ms=max_wait_ms,
+                max_concurrent_batches=max_concurrent_batches,
+            )
+            batched = asyncio.run(_drive(BatchedEmbeddings(base, batcher), texts, level))
+            batched["batcher"] = batcher.stats()
+            results[level] = {
+                "unbatched": unbatched,
+                "batched": batched,
+                "added_p50_ms": round(batched["latency_ms"]["p50"] - unbatched["latency_ms"]["p50"], 2),
+            }
+    finally:
+        fake.terminate()
+        fake.wait(timeout=10)
+
+    return {
+        "queries": queries,
+        "embed_ms": embed_ms,
+        "embed_parallel": embed_parallel,
+        "max_batch_size": max_batch_size,
+        "max_wait_ms": max_wait_ms,
+        "levels": results,
+    }
+
+
+def format_embed_batch(report: Dict) -> str:
+    lines = [
+        f"{report['queries']} queries/level, server {report['embed_ms']}ms/request x {report['embed_parallel'] or 'unlimited'} parallel, "
+        f"batch <= {report['max_batch_size']}, wait {report['max_wait_ms']}ms"
+    ]
+    for level, r in report["levels"].items():
+        u, b = r["unbatched"], r["batched"]
+        lines.append(
+            f"concurrency {level:>3}: unbatched {u['qps']:>7.1f} q/s p50 {u['latency_ms']['p50']:>7.1f}ms "
+            f"p99 {u['latency_ms']['p99']:>7.1f}ms | batched {b['qps']:>7.1f} q/s p50 {b['latency_ms']['p50']:>7.1f}ms "
+            f"p99 {b['latency_ms']['p99']:>7.1f}ms, mean batch {b['batcher']['mean_batch_size']:.1f} "
+            f"(p50 {r['added_p50_ms']:+.1f}ms)"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,377 @@
+"""
+결정적(deterministic) 가짜 Ollama 서버
+
+실제 모델 없이 Ollama HTTP API 형태를 그대로 흉내냅니다.
+- /api/chat, /api/generate: NDJSON 스트리밍 (TTFT, tokens/s 설정 가능)
+- /api/embeddings, /api/embed: 텍스트 해시 기반 고정 벡터
+- /api/tags, /api/show, /api/pull: 모델 관리 API
+- prefix KV 캐시 모사: 직전 프롬프트와 겹치는 앞부분은 prefill 시간에서 제외
+
+같은 입력에는 항상 같은 토큰/벡터를 돌려주므로 실행 간 비교가 가능합니다.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+# 응답 토큰 생성에 쓰는 고정 어휘
+VOCAB = [
+    "the", "panel", "defect", "analysis", "shows", "a", "line", "pixel",
+    "mura", "pattern", "in", "region", "with", "high", "confidence", "and",
+    "cause", "is", "likely", "process", "step", "of", "etch", "coating",
+]
+
+
+@dataclass
+class FakeOllamaConfig:
+    """가짜 Ollama 서버 동작 설정"""
+    ttft_ms: float = 50.0
+    tokens_per_sec: float = 100.0
+    response_tokens: int = 64
+    embed_ms: float = 5.0
+    embedding_dim: int = 768
+    pull_seconds: float = 2.0
+    # 캐시되지 않은 프롬프트 토큰당 prefill 시간 (0이면 prefill 모사 안 함)
+    prefill_ms_per_token: float = 0.0
+    # KV 캐시 슬롯 수 (OLLAMA_NUM_PARALLEL에 해당)
+    kv_slots: int = 4
+    # 동시에 처리하는 임베딩 요청 수 (0이면 제한 없음) — 실제 서버의 제한된 병렬성 모사
+    embed_parallel: int = 0
+    models: List[str] = field(default_factory=lambda: ["llama3", "qwen3:32b", "nomic-embed-text"])
+
+
+def _seed(*parts: str) -> int:
+    """입력 문자열로부터 고정 시드 생성"""
+    digest = hashlib.sha256("\x00".join(parts).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def fake_tokens(model: str, prompt: str, count: int) -> List[str]:
+    """프롬프트에 대해 항상 같은 토큰 시퀀스 반환"""
+    rng = random.Random(_seed(model, prompt))
+    return [(" " if i else "") + rng.choice(VOCAB) for i in range(count)]
+
+
+def fake_embedding(model: str, text: str, dim: int) -> List[float]:
+    """텍스트에 대해 항상 같은 단위 벡터 반환"""
+    rng = random.Random(_seed(model, text))
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def render_tokens(messages: list) -> List[str]:
+    """메시지를 근사 토큰 시퀀스로 변환 (역할 태그 + 공백 단위 단어)"""
+    tokens = []
+    for m in messages:
+        tokens.append(f"<{m.get('role', '')}>")
+        tokens.extend(str(m.get("content", "")).split())
+    return tokens
+
+
+def _common_prefix(a: List[str], b: List[str]) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class KVPrefixCache:
+    """
+    llama.cpp/Ollama 슬롯별 KV 캐시 모사
+
+    요청은 공통 prefix가 가장 긴 슬롯의 KV를 재사용해 그 길이만큼 prefill을 건너뜁니다.
+    그 슬롯의 내용 일부만 겹치면(시스템 프롬프트만 같은 다른 대화 등) 슬롯을 덮어쓰지 않고
+    가장 오래된 슬롯에 공통 prefix를 복사해 사용합니다 (Ollama 멀티 유저 캐시와 같은 방식).
+    """
+
+    def __init__(self, slots: int = 4):
+        self.slots: List[List[str]] = [[] for _ in range(max(1, slots))]
+        self.last_used = [0] * len(self.slots)
+        self.clock = 0
+
+    def acquire(self, tokens: List[str]):
+        """(슬롯 번호, 캐시된 토큰 수) 반환"""
+        self.clock += 1
+        best, best_len = None, 0
+        for i, cached in enumerate(self.slots):
+            length = _common_prefix(cached, tokens)
+            if length > best_len:
+                best, best_len = i, length
+        oldest = min(range(len(self.slots)), key=lambda i: self.last_used[i])
+        if best is None or best_len < len(self.slots[best]):
+            best = oldest
+        self.last_used[best] = self.clock
+        # 응답 생성 중에도 다른 요청이 같은 슬롯을 고르지 않도록 바로 기록
+        self.slots[best] = list(tokens)
+        return best, best_len
+
+    def store(self, slot: int, tokens: List[str]):
+        self.slots[slot] = list(tokens)
+
+
+def _now_iso() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()) + "Z"
+
+
+def _prompt_of_messages(messages: list) -> str:
+    return "\n".join(f"{m.get('role', '')}:{m.get('content', '')}" for m in messages)
+
+
+def create_fake_ollama_app(config: FakeOllamaConfig = None) -> FastAPI:
+    """가짜 Ollama FastAPI 앱 생성"""
+    config = config or FakeOllamaConfig()
+    app = FastAPI(title="fake-ollama")
+    app.state.config = config
+    app.state.kv_cache = KVPrefixCache(config.kv_slots)
+    embed_slots = asyncio.Semaphore(config.embed_parallel) if config.embed_parallel > 0 else None
+
+    async def embed_delay(seconds: float):
+        if embed_slots is None:
+            await asyncio.sleep(seconds)
+            return
+        async with embed_slots:
+            await asyncio.sleep(seconds)
+
+    def num_predict(body: dict) -> int:
+        options = body.get("options") or {}
+        limit = options.get("num_predict")
+        if isinstance(limit, int) and limit > 0:
+            return min(limit, config.response_tokens)
+        return config.response_tokens
+
+    async def token_stream(model: str, prompt: str, count: int, build_chunk, prompt_tokens: List[str] = None):
+        """TTFT(+ 캐시되지 않은 prefill) 대기 후 tokens/s 속도로 토큰 생성"""
+        start = time.perf_counter()
+        prompt_tokens = prompt_tokens if prompt_tokens is not None else prompt.split()
+        slot, cached = app.state.kv_cache.acquire(prompt_tokens)
+        evaluated = len(prompt_tokens) - cached
+        prefill_ms = evaluated * config.prefill_ms_per_token
+        await asyncio.sleep((config.ttft_ms + prefill_ms) / 1000)
+        interval = 1.0 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0.0
+        tokens = fake_tokens(model, prompt, count)
+        first_token = time.perf_counter()
+        for i, token in enumerate(tokens):
+            if i and interval:
+                # 누적 지연을 피하기 위해 절대 시각 기준으로 대기
+                delay = first_token + i * interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield build_chunk(token, False)
+        # 생성된 응답까지 슬롯 KV 캐시에 남음
+        app.state.kv_cache.store(slot, prompt_tokens + ["<assistant>"] + "".join(tokens).split())
+        total_ns = int((time.perf_counter() - start) * 1e9)
+        prompt_ns = int((config.ttft_ms + prefill_ms) * 1e6)
+        yield build_chunk("", True) | {
+            "done_reason": "stop",
+            "total_duration": total_ns,
+            "load_duration": 0,
+            # Ollama와 같이 캐시에서 재사용한 토큰은 제외한 평가 토큰 수
+            "prompt_eval_count": evaluated,
+            "prompt_eval_duration": prompt_ns,
+            "eval_count": len(tokens),
+            "eval_duration": total_ns - prompt_ns,
+        }
+
+    async def respond(body: dict, prompt: str, build_chunk, content_key: str, prompt_tokens: List[str] = None):
+        model = body.get("model", "")
+        count = num_predict(body)
+        stream = token_stream(model, prompt, count, build_chunk, prompt_tokens)
+
+        if body.get("stream", True):
+            async def ndjson():
+                async for chunk in stream:
+                    yield json.dumps(chunk) + "\n"
+
+            return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+        # 비스트리밍: 전체 토큰을 합쳐서 한 번에 반환
+        text = ""
+        final = {}
+        async for chunk in stream:
+            if chunk["done"]:
+                final = chunk
+            else:
+                text += chunk[content_key]["content"] if content_key == "message" else chunk[content_key]
+        if content_key == "message":
+            final["message"] = {"role": "assistant", "content": text}
+        else:
+            final["response"] = text
+        return JSONResponse(final)
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        model = body.get("model", "")
+
+        def build_chunk(token: str, done: bool) -> dict:
+            return {
+                "model": model,
+                "created_at": _now_iso(),
+                "message": {"role": "assistant", "content": token},
+                "done": done,
+            }
+
+        messages = body.get("messages", [])
+        return await respond(body, _prompt_of_messages(messages), build_chunk, "message", render_tokens(messages))
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        model = body.get("model", "")
+
+        def build_chunk(token: str, done: bool) -> dict:
+            return {
+                "model": model,
+                "created_at": _now_iso(),
+                "response": token,
+                "done": done,
+            }
+
+        prompt = (body.get("system") or "") + (body.get("prompt") or "")
+        return await respond(body, prompt, build_chunk, "response")
+
+    @app.post("/api/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        await embed_delay(config.embed_ms / 1000)
+        return {"embedding": fake_embedding(body.get("model", ""), body.get("prompt", ""), config.embedding_dim)}
+
+    @app.post("/api/embed")
+    async def embed(request: Request):
+        body = await request.json()
+        model = body.get("model", "")
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        # 배치 호출은 요청당 고정 비용 + 항목당 작은 비용으로 모델링
+        await embed_delay((config.embed_ms + 0.1 * len(inputs)) / 1000)
+        return {
+            "model": model,
+            "embeddings": [fake_embedding(model, text, config.embedding_dim) for text in inputs],
+        }
+
+    @app.get("/api/tags")
+    async def tags():
+        return {
+            "models": [
+                {
+                    "name": name,
+                    "model": name,
+                    "size": 4_000_000_000,
+                    "modified_at": "2024-01-01T00:00:00Z",
+                    "digest": hashlib.sha256(name.encode()).hexdigest(),
+                }
+                for name in config.models
+            ]
+        }
+
+    @app.post("/api/show")
+    async def show(request: Request):
+        body = await request.json()
+        name = body.get("name") or body.get("model", "")
+        if name not in config.models:
+            return JSONResponse({"error": f"model '{name}' not found"}, status_code=404)
+        return {
+            "modelfile": f"FROM {name}",
+            "parameters": "temperature 0.7",
+            "template": "{{ .Prompt }}",
+            "details": {"family": "fake", "parameter_size": "8B", "quantization_level": "Q4_0"},
+        }
+
+    @app.post("/api/pull")
+    async def pull(request: Request):
+        body = await request.json()
+        name = body.get("name") or body.get("model", "")
+        total = 100 * 1024 * 1024
+        steps = 20
+
+        async def progress():
+            yield {"status": "pulling manifest"}
+            digest = "sha256:" + hashlib.sha256(name.encode()).hexdigest()
+            for i in range(1, steps + 1):
+                await asyncio.sleep(config.pull_seconds / steps)
+                yield {
+                    "status": f"pulling {digest[7:19]}",
+                    "digest": digest,
+                    "total": total,
+                    "completed": total * i // steps,
+                }
+            yield {"status": "verifying sha256 digest"}
+            yield {"status": "writing manifest"}
+            if name not in config.models:
+                config.models.append(name)
+            yield {"status": "success"}
+
+        if body.get("stream", True):
+            async def ndjson():
+                async for item in progress():
+                    yield json.dumps(item) + "\n"
+
+            return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+        async for _ in progress():
+            pass
+        return {"status": "success"}
+
+    return app
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="결정적 가짜 Ollama 서버")
+    add_arguments(parser)
+    run(parser.parse_args(argv))
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--ttft-ms", type=float, default=50.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=100.0)
+    parser.add_argument("--response-tokens", type=int, default=64)
+    parser.add_argument("--embed-ms", type=float, default=5.0)
+    parser.add_argument("--embedding-dim", type=int, default=768)
+    parser.add_argument("--pull-seconds", type=float, default=2.0)
+    parser.add_argument("--prefill-ms-per-token", type=float, default=0.0)
+    parser.add_argument("--kv-slots", type=int, default=4)
+    parser.add_argument("--embed-parallel", type=int, default=0)
+
+
+def config_from_args(args) -> FakeOllamaConfig:
+    return FakeOllamaConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        response_tokens=args.response_tokens,
+        embed_ms=args.embed_ms,
+        embedding_dim=args.embedding_dim,
+        pull_seconds=args.pull_seconds,
+        prefill_ms_per_token=args.prefill_ms_per_token,
+        kv_slots=args.kv_slots,
+        embed_parallel=args.embed_parallel,
+    )
+
+
+def run(args):
+    import uvicorn
+
+    uvicorn.run(
+        create_fake_ollama_app(config_from_args(args)),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+백엔드 부하 생성기
+
+지정한 동시성으로 각 시나리오(엔드포인트)를 호출하고
+요청별 지연, TTFT, 토큰 수, 백엔드 프로세스 CPU 사용량을 수집합니다.
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from bench.report import summarize
+
+
+# 요청마다 순환하는 고정 질문 목록
+QUESTIONS = [
+    "라인 결함의 주요 원인은 무엇인가요?",
+    "What is the typical root cause of mura defects?",
+    "데드 픽셀 불량률을 줄이는 공정 개선 방안을 알려주세요.",
+    "Summarize the last analysis case in three sentences.",
+    "코팅 공정에서 발생하는 오염 유형을 정리해 주세요.",
+]
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# RAG 시나리오용 QUANTIZED 컬렉션 위치
+DEFAULT_RAG_DIR = os.path.join(BACKEND_DIR, "bench_rag_db")
+RAG_COLLECTION = "bench"
+
+
+@dataclass
+class Scenario:
+    """부하 테스트 시나리오 (엔드포인트 + 요청 본문 + 응답 형식)"""
+    name: str
+    path: str
+    build_payload: Callable[[int, str, Dict], Dict]
+    # json: 일반 JSON 응답, sse: data: {...} 형식, langserve: event/data 형식
+    response_kind: str = "json"
+
+
+def _graph_payload(i: int, model: str, options: Dict) -> Dict:
+    return {
+        "messages": [{"role": "user", "content": QUESTIONS[i % len(QUESTIONS)]}],
+        "model": model,
+    }
+
+
+def _graph_native_payload(i: int, model: str, options: Dict) -> Dict:
+    # /api/chat 직접 스트리밍 (OLLAMA_FAST_STREAM과 같은 경로를 요청 단위로 선택)
+    return {**_graph_payload(i, model, options), "native_stream": True}
+
+
+def _langserve_payload(i: int, model: str, options: Dict) -> Dict:
+    return {
+        "input": {"input": QUESTIONS[i % len(QUESTIONS)], "history": []},
+        "config": {"configurable": {"model_name": model}},
+    }
+
+
+def _rag_payload(i: int, model: str, options: Dict) -> Dict:
+    return {
+        "messages": [{"role": "user", "content": QUESTIONS[i % len(QUESTIONS)]}],
+        "model": model,
+        "pipeline": {
+            "embedding_provider": "OLLAMA",
+            "embedding_model": "nomic-embed-text",
+            "vectordb_type": "QUANTIZED",
+            "vectordb_collection": RAG_COLLECTION,
+            "vectordb_settings": {"persist_directory": options.get("rag_dir", DEFAULT_RAG_DIR)},
+            "top_k": 5,
+            "score_threshold": 0.0,
+        },
+    }
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "graph_chat": Scenario("graph_chat", "/graph/chat", _graph_payload, "json"),
+    "graph_chat_stream": Scenario("graph_chat_stream", "/graph/chat/stream", _graph_payload, "sse"),
+    "graph_chat_stream_native": Scenario("graph_chat_stream_native", "/graph/chat/stream", _graph_native_payload, "sse"),
+    "chat_invoke": Scenario("chat_invoke", "/chat/invoke", _langserve_payload, "json"),
+    "chat_stream": Scenario("chat_stream", "/chat/stream", _langserve_payload, "langserve"),
+    "rag_chat_stream": Scenario("rag_chat_stream", "/rag/chat/stream", _rag_payload, "sse"),
+}
+
+
+class ProcessCPU:
+    """/proc/<pid>/stat 기반 프로세스 CPU 시간 측정 (Linux)"""
+
+    def __init__(self, pid: Optional[int]):
+        self.pid = pid
+        self.ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    def seconds(self) -> Optional[float]:
+        if not self.pid:
+            return None
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                # comm 필드에 공백이 있을 수 있으므로 마지막 ')' 이후부터 파싱
+                fields = f.read().rsplit(")", 1)[1].split()
+            utime, stime = int(fields[11]), int(fields[12])
+            return (utime + stime) / self.ticks
+        except (OSError, IndexError, ValueError):
+            return None
+
+
+async def _send(client: httpx.AsyncClient, scenario: Scenario, payload: Dict) -> Dict:
+    """요청 1건 실행 후 지연/TTFT/토큰 수 반환"""
+    start = time.perf_counter()
+    first_token = None
+    tokens = 0
+
+    if scenario.response_kind == "json":
+        response = await client.post(scenario.path, json=payload)
+        response.raise_for_status()
+        response.json()
+    else:
+        async with client.stream("POST", scenario.path, json=payload) as response:
+            response.raise_for_status()
+            event = None
+            async for line in response.aiter_lines():
+                if line.startswith("event:"):
+                    event = line[6:].strip()
+                    continue
+                if not line.startswith("data:"):
+                    continue
+                try:
+                    data = json.loads(line[5:].strip())
+                except json.JSONDecodeError:
+                    continue
+                if scenario.response_kind == "langserve":
+                    has_token = event == "data" and isinstance(data, str) and data != ""
+                else:
+                    has_token = isinstance(data, dict) and bool(data.get("content"))
+                if has_token:
+                    tokens += 1
+                    if first_token is None:
+                        first_token = time.perf_counter()
+
+    end = time.perf_counter()
+    return {
+        "latency_ms": (end - start) * 1000,
+        "ttft_ms": (first_token - start) * 1000 if first_token is not None else None,
+        "tokens": tokens,
+    }
+
+
+async def run_scenario(
+    base_url: str,
+    scenario: Scenario,
+    concurrency: int,
+    total_requests: int,
+    model: str,
+    warmup: int = 2,
+    backend_pid: int = None,
+    timeout: float = 120.0,
+    options: Dict = None,
+) -> Dict:
+    """시나리오 하나를 지정한 동시성으로 실행하고 결과 집계"""
+    options = options or {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        # 워밍업 (측정에서 제외)
+        for i in range(warmup):
+            try:
+                await _send(client, scenario, scenario.build_payload(i, model, options))
+            except httpx.HTTPError:
+                pass
+
+        samples: List[Dict] = []
+        errors: List[str] = []
+        counter = iter(range(total_requests))
+
+        async def worker():
+            for i in counter:
+                try:
+                    samples.append(await _send(client, scenario, scenario.build_payload(i, model, options)))
+                except httpx.HTTPError as e:
+                    errors.append(f"{type(e).__name__}: {e}")
+
+        cpu = ProcessCPU(backend_pid)
+        cpu_start = cpu.seconds()
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        duration = time.perf_counter() - wall_start
+        cpu_end = cpu.seconds()
+
+    completed = len(samples)
+    total_tokens = sum(s["tokens"] for s in samples)
+    cpu_seconds = cpu_end - cpu_start if cpu_start is not None and cpu_end is not None else None
+
+    return {
+        "scenario": scenario.name,
+        "path": scenario.path,
+        "concurrency": concurrency,
+        "requests": completed,
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(completed / duration, 3) if duration > 0 else None,
+        "tokens": total_tokens,
+        "tokens_per_sec": round(total_tokens / duration, 3) if duration > 0 and total_tokens else None,
+        "latency_ms": summarize([s["latency_ms"] for s in samples]),
+        "ttft_ms": summarize([s["ttft_ms"] for s in samples if s["ttft_ms"] is not None]),
+        "backend_cpu_ms_per_request": (
+            round(cpu_seconds * 1000 / completed, 3) if cpu_seconds is not None and completed else None
+        ),
+        "backend_cpu_us_per_token": (
+            round(cpu_seconds * 1e6 / total_tokens, 2) if cpu_seconds is not None and total_tokens else None
+        ),
+        "backend_cpu_util": round(cpu_seconds / duration, 3) if cpu_seconds is not None and duration > 0 else None,
+    }
+
+
+async def run_all(
+    base_url: str,
+    scenario_names: List[str],
+    concurrency: int,
+    total_requests: int,
+    model: str,
+    warmup: int = 2,
+    backend_pid: int = None,
+    options: Dict = None,
+) -> List[Dict]:
+    results = []
+    for name in scenario_names:
+        results.append(
+            await run_scenario(
+                base_url,
+                SCENARIOS[name],
+                concurrency,
+                total_requests,
+                model,
+                warmup=warmup,
+                backend_pid=backend_pid,
+                options=options,
+            )
+        )
+    return results
+
+
+def seed_rag_collection(ollama_url: str, rag_dir: str = DEFAULT_RAG_DIR, num_docs: int = 100) -> int:
+    """
+    RAG 시나리오용 QUANTIZED 컬렉션을 합성 문서로 채움
+
+    백엔드와 같은 임베딩 모델/서버(가짜 Ollama)를 사용해야 검색 결과가 의미를 가집니다.
+    """
+    import shutil
+
+    from langchain_core.documents import Document
+
+    from app.chains.rag_chain import get_embeddings, get_text_splitter, get_vector_store, index_documents
+    from bench.chunking import make_corpus
+
+    shutil.rmtree(os.path.join(rag_dir, RAG_COLLECTION), ignore_errors=True)
+    embeddings = get_embeddings("OLLAMA", "nomic-embed-text", endpoint=ollama_url)
+    vectorstore = get_vector_store(
+        "QUANTIZED",
+        embeddings,
+        collection_name=RAG_COLLECTION,
+        settings_dict={"persist_directory": rag_dir},
+    )
+    texts, _ = make_corpus(num_docs)
+    documents = [Document(page_content=text, metadata={"source": f"doc-{i}"}) for i, text in enumerate(texts)]
+    return index_documents(documents, vectorstore, get_text_splitter("RECURSIVE", chunk_size=800, chunk_overlap=100))
+
+
+def _wait_until_ready(url: str, timeout: float = 60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=2.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"서버가 준비되지 않았습니다: {url}")
+
+
+def spawn_stack(
+    backend_port: int = 8800,
+    ollama_port: int = 11500,
+    fake_args: List[str] = None,
+    backend_env: Dict[str, str] = None,
+):
+    """
+    가짜 Ollama + 백엔드(uvicorn)를 하위 프로세스로 실행
+
+    Returns:
+        (backend 프로세스, fake ollama 프로세스) — 백엔드 pid로 CPU를 측정합니다.
+    """
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "bench", "fake-ollama", "--port", str(ollama_port)] + (fake_args or []),
+        cwd=BACKEND_DIR,
+    )
+    env = dict(os.environ)
+    env["OLLAMA_HOST"] = f"http://127.0.0.1:{ollama_port}"
+    env.update(backend_env or {})
+    backend = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1",
+            "--port", str(backend_port),
+            "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    try:
+        _wait_until_ready(f"http://127.0.0.1:{ollama_port}/api/tags")
+        _wait_until_ready(f"http://127.0.0.1:{backend_port}/health")
+    except Exception:
+        stop_stack(backend, fake)
+        raise
+    return backend, fake
+
+
+def stop_stack(*processes):
+    for process in processes:
+        if process and process.poll() is None:
+            process.terminate()
+    for process in processes:
+        if process:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
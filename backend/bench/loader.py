@@ -0,0 +1,133 @@
+"""
+병렬 문서 로더 벤치마크
+
+합성 Markdown / HTML / DOCX 파일(일부는 zip 압축 안에)을 만들어 ParallelDocumentLoader로 다음을 측정합니다.
+- 작업자 수별 처리량: pages/s, MB/s
+- 재실행: mtime/크기가 같아 읽지 않고 건너뛴 파일 수
+- touch 후 재실행: 해시가 같아 파싱 없이 건너뛴 파일 수, 내용을 바꾼 파일만 다시 파싱
+
+PDF 생성에는 별도 라이브러리가 필요하므로 포함하지 않습니다.
+"""
+
+import html
+import io
+import os
+import tempfile
+import time
+import zipfile
+from typing import Dict, List
+
+from app.loaders.document_loader import ParallelDocumentLoader
+from bench.chunking import make_corpus
+
+
+def _docx_bytes(pages: List[str]) -> bytes:
+    w = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    body = []
+    for i, page in enumerate(pages):
+        if i:
+            body.append('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+        for paragraph in page.split("\n\n"):
+            body.append(f"<w:p><w:r><w:t>{html.escape(paragraph)}</w:t></w:r></w:p>")
+    document = f'<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="{w}"><w:body>{"".join(body)}</w:body></w:document>'
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", '<?xml version="1.0"?><Types/>')
+        archive.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+
+def _html_text(text: str) -> str:
+    paragraphs = "".join(f"<p>{html.escape(p)}</p>" for p in text.split("\n\n"))
+    return (
+        "<html><head><title>report</title><style>p{margin:0}</style><script>var x=1;</script></head>"
+        f"<body><nav><a href='/'>home</a></nav><article>{paragraphs}</article></body></html>"
+    )
+
+
+def make_files(root: str, files: int, pages_per_docx: int = 4) -> List[str]:
+    """형식을 섞은 합성 파일 생성 (1/4은 zip 압축 안에)"""
+    texts, _ = make_corpus(files, sections=4)
+    written = []
+    archive_entries = []
+    for i, text in enumerate(texts):
+        kind = ("md", "html", "docx")[i % 3]
+        name = f"doc_{i:05d}.{kind}"
+        if kind == "md":
+            data = f"---\ntitle: doc {i}\n---\n# 문서 {i}\n\n{text}".encode()
+        elif kind == "html":
+            data = _html_text(text).encode()
+        else:
+            step = max(1, len(text) // pages_per_docx)
+            data = _docx_bytes([text[p:p + step] for p in range(0, len(text), step)])
+        if i % 4 == 3:
+            archive_entries.append((f"archived/{name}", data))
+            continue
+        path = os.path.join(root, "docs", kind, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        written.append(path)
+    with zipfile.ZipFile(os.path.join(root, "docs", "bundle.zip"), "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in archive_entries:
+            archive.writestr(name, data)
+    return written
+
+
+def _run(loader: ParallelDocumentLoader) -> Dict:
+    docs = sum(1 for _ in loader.lazy_load())
+    return {**loader.stats.snapshot(), "yielded": docs}
+
+
+def run_loader_benchmark(files: int = 600, workers: List[int] = None) -> Dict:
+    workers = workers or sorted({1, min(4, os.cpu_count() or 1), os.cpu_count() or 1})
+    with tempfile.TemporaryDirectory() as tmp:
+        written = make_files(tmp, files)
+        source = os.path.join(tmp, "docs")
+
+        throughput = {}
+        for count in workers:
+            throughput[count] = _run(ParallelDocumentLoader(source, max_workers=count))
+
+        state_path = os.path.join(tmp, "state.json")
+        parallel = max(workers)
+        first = _run(ParallelDocumentLoader(source, max_workers=parallel, state_path=state_path))
+        rerun = _run(ParallelDocumentLoader(source, max_workers=parallel, state_path=state_path))
+
+        # 일부는 mtime만 변경, 일부는 내용 변경
+        now = time.time() + 10
+        touched = written[: len(written) // 5]
+        for path in touched:
+            os.utime(path, (now, now))
+        changed = written[-10:]
+        for path in changed:
+            if path.endswith(".md"):
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("\n\n추가 문단입니다.")
+        after_touch = _run(ParallelDocumentLoader(source, max_workers=parallel, state_path=state_path))
+
+    return {
+        "files": files,
+        "throughput": throughput,
+        "incremental": {"first": first, "rerun": rerun, "after_touch": after_touch},
+        "touched": len(touched),
+        "content_changed": sum(path.endswith(".md") for path in changed),
+    }
+
+
+def format_loader(report: Dict) -> str:
+    lines = [f"{report['files']} files (md/html/docx, 1/4 in bundle.zip)"]
+    for workers, s in report["throughput"].items():
+        lines.append(
+            f"workers {workers:>2}: {s['elapsed_s']:.2f}s, {s['pages_per_sec']:.0f} pages/s, "
+            f"{s['bytes_per_sec'] / 1e6:.2f} MB/s, {s['documents']} docs, {s['failed']} failed"
+        )
+    inc = report["incremental"]
+    for name in ("first", "rerun", "after_touch"):
+        s = inc[name]
+        lines.append(
+            f"{name:<12} parsed {s['parsed']:>4}, skipped {s['skipped_unchanged']:>4}, "
+            f"docs {s['documents']:>4}, {s['elapsed_s']:.2f}s"
+        )
+    lines.append(f"(touched {report['touched']} files, changed content of {report['content_changed']})")
+    return "\n".join(lines)
@@ -0,0 +1,108 @@
+"""
+스트리밍 경로별 토큰당 백엔드 CPU 벤치마크 (ChatOllama.astream vs /api/chat 직접 스트리밍)
+
+가짜 Ollama + 백엔드를 띄우고 같은 /graph/chat/stream 요청을 두 경로로 번갈아 보내 다음을 측정합니다.
+- 토큰당 백엔드 CPU(µs)와 요청당 CPU(ms)
+- 추가 지연: 가짜 서버가 보장하는 최소 시간(ttft + 토큰 수 / tokens_per_sec)을 뺀 p50/p99 지연과 TTFT
+
+토큰 생성 속도를 높게 두어 서버 대기보다 백엔드의 토큰 처리 비용이 드러나도록 합니다.
+"""
+
+import asyncio
+from typing import Dict, List
+
+from bench.load import SCENARIOS, run_scenario, spawn_stack, stop_stack
+
+
+PATHS = {"langchain": "graph_chat_stream", "native": "graph_chat_stream_native"}
+
+
+def run_native_stream_benchmark(
+    concurrency: List[int] = None,
+    requests: int = 100,
+    ttft_ms: float = 20.0,
+    tokens_per_sec: float = 2000.0,
+    response_tokens: int = 256,
+    rounds: int = 2,
+    backend_port: int = 8810,
+    ollama_port: int = 11540,
+    model: str = "llama3",
+) -> Dict:
+    concurrency = concurrency or [1, 8]
+    ideal_ms = ttft_ms + response_tokens / tokens_per_sec * 1000
+    processes = spawn_stack(
+        backend_port=backend_port,
+        ollama_port=ollama_port,
+        fake_args=[
+            "--ttft-ms", str(ttft_ms),
+            "--tokens-per-sec", str(tokens_per_sec),
+            "--response-tokens", str(response_tokens),
+        ],
+    )
+    base_url = f"http://127.0.0.1:{backend_port}"
+    results: Dict[int, Dict[str, Dict]] = {}
+    try:
+        for level in concurrency:
+            samples: Dict[str, List[Dict]] = {path: [] for path in PATHS}
+            # 순서 영향을 줄이기 위해 경로를 번갈아 여러 번 실행
+            for _ in range(rounds):
+                for path, scenario in PATHS.items():
+                    samples[path].append(asyncio.run(run_scenario(
+                        base_url,
+                        SCENARIOS[scenario],
+                        level,
+                        requests,
+                        model,
+                        warmup=2,
+                        backend_pid=processes[0].pid,
+                    )))
+            results[level] = {path: _merge(runs, ideal_ms) for path, runs in samples.items()}
+    finally:
+        stop_stack(*processes)
+
+    return {
+        "requests": requests,
+        "rounds": rounds,
+        "ttft_ms": ttft_ms,
+        "tokens_per_sec": tokens_per_sec,
+        "response_tokens": response_tokens,
+        "ideal_ms": round(ideal_ms, 1),
+        "levels": results,
+    }
+
+
+def _merge(runs: List[Dict], ideal_ms: float) -> Dict:
+    """여러 번 실행한 결과 중 토큰당 CPU는 평균, 지연은 중앙값 실행 기준"""
+    cpu_per_token = [r["backend_cpu_us_per_token"] for r in runs if r["backend_cpu_us_per_token"] is not None]
+    median = sorted(runs, key=lambda r: r["latency_ms"]["p50"])[len(runs) // 2]
+    return {
+        "requests": sum(r["requests"] for r in runs),
+        "errors": sum(r["errors"] for r in runs),
+        "tokens": sum(r["tokens"] for r in runs),
+        "cpu_us_per_token": round(sum(cpu_per_token) / len(cpu_per_token), 2) if cpu_per_token else None,
+        "cpu_ms_per_request": median["backend_cpu_ms_per_request"],
+        "latency_ms": median["latency_ms"],
+        "ttft_ms": median["ttft_ms"],
+        "added_p50_ms": round(median["latency_ms"]["p50"] - ideal_ms, 2),
+        "added_p99_ms": round(median["latency_ms"]["p99"] - ideal_ms, 2),
+    }
+
+
+def format_native_stream(report: Dict) -> str:
+    lines = [
+        f"{report['response_tokens']} tokens/response at {report['tokens_per_sec']:.0f} tok/s, "
+        f"ttft {report['ttft_ms']}ms (ideal {report['ideal_ms']}ms), {report['requests']} requests x {report['rounds']} rounds"
+    ]
+    for level, paths in report["levels"].items():
+        for path, r in paths.items():
+            cpu = r["cpu_us_per_token"]
+            lines.append(
+                f"concurrency {level:>3} {path:<10} cpu {cpu if cpu is not None else '-':>8} us/token, "
+                f"{r['cpu_ms_per_request'] or 0:>7.2f} ms/req | p50 {r['latency_ms']['p50']:>7.1f}ms "
+                f"(+{r['added_p50_ms']:.1f}) p99 {r['latency_ms']['p99']:>7.1f}ms (+{r['added_p99_ms']:.1f}) "
+                f"ttft {r['ttft_ms']['p50']:>6.1f}ms, errors {r['errors']}"
+            )
+        langchain, native = paths["langchain"]["cpu_us_per_token"], paths["native"]["cpu_us_per_token"]
+        if langchain and native:
+            lines.append(f"concurrency {level:>3} native/langchain cpu per token: {native / langchain:.2f}x")
+    return "\n".join(lines)
@@ -0,0 +1,139 @@
+"""
+KV prefix 캐시 재사용 시뮬레이션 (프롬프트 배치 x 인스턴스 라우팅)
+
+여러 대화가 섞여 들어오는 멀티턴 RAG 트래픽을 가짜 Ollama의 KVPrefixCache로 재생해
+턴마다 prefill해야 하는 토큰 수를 셉니다.
+- legacy: 질문과 검색 컨텍스트를 한 메시지에 담는 이전 배치
+- stable: app.chains.prompts.assemble_rag_messages (질문 단독 메시지 + 컨텍스트는 맨 뒤)
+- round_robin / affinity: 인스턴스 선택 방식 (affinity는 app.utils.session_router.pick_host)
+
+실제 모델이 아니라 단어 단위 근사 토큰으로 세는 시뮬레이션입니다.
+"""
+
+import random
+from typing import Dict, List
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from app.chains.prompts import RAG_SYSTEM_PROMPT, assemble_rag_messages
+from app.utils.session_router import pick_host
+from bench.fake_ollama import VOCAB, KVPrefixCache, fake_tokens, render_tokens
+
+
+# 이전 create_rag_chain_with_history의 컨텍스트 템플릿 (질문과 컨텍스트가 한 메시지)
+LEGACY_CONTEXT_TEMPLATE = """Context:
+{context}
+
+Question: {question}"""
+
+_ROLES = {SystemMessage: "system", HumanMessage: "user", AIMessage: "assistant"}
+
+
+def _to_dicts(messages) -> List[Dict]:
+    return [{"role": _ROLES[type(m)], "content": m.content} for m in messages]
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(VOCAB) for _ in range(count))
+
+
+def build_prompt(layout: str, history, question: str, context: str):
+    if layout == "legacy":
+        return [
+            SystemMessage(content=RAG_SYSTEM_PROMPT),
+            *history,
+            HumanMessage(content=LEGACY_CONTEXT_TEMPLATE.format(context=context, question=question)),
+        ]
+    return assemble_rag_messages(RAG_SYSTEM_PROMPT, history, question, context)
+
+
+def simulate(
+    layout: str,
+    routing: str,
+    conversations: int,
+    turns: int,
+    instances: int,
+    slots: int,
+    context_words: int,
+    response_tokens: int,
+    seed: int = 7,
+) -> Dict:
+    rng = random.Random(seed)
+    hosts = [f"http://ollama-{i}:11434" for i in range(instances)]
+    caches = {host: KVPrefixCache(slots) for host in hosts}
+
+    # 대화별 턴을 섞어서 도착 순서 결정 (대화 내부 순서는 유지)
+    schedule = [c for c in range(conversations) for _ in range(turns)]
+    rng.shuffle(schedule)
+
+    histories = {c: [] for c in range(conversations)}
+    prompt_tokens = prefilled_tokens = 0
+    for step, conv in enumerate(schedule):
+        history = histories[conv]
+        question = f"conversation {conv} turn {len(history) // 2} " + _words(rng, 12)
+        context = _words(rng, context_words)
+        messages = build_prompt(layout, history, question, context)
+
+        if routing == "affinity":
+            host = pick_host(f"id:{conv}", hosts)
+        else:
+            host = hosts[step % instances]
+        tokens = render_tokens(_to_dicts(messages))
+        cache = caches[host]
+        slot, cached = cache.acquire(tokens)
+        response = "".join(fake_tokens("bench", question, response_tokens))
+        cache.store(slot, tokens + ["<assistant>"] + response.split())
+
+        prompt_tokens += len(tokens)
+        prefilled_tokens += len(tokens) - cached
+        # 클라이언트가 다음 턴에 보내는 히스토리 (질문 원문 + 답변)
+        history.extend([HumanMessage(content=question), AIMessage(content=response)])
+
+    return {
+        "prompt_tokens": prompt_tokens,
+        "prefilled_tokens": prefilled_tokens,
+        "cache_hit_ratio": round(1 - prefilled_tokens / prompt_tokens, 4) if prompt_tokens else 0.0,
+    }
+
+
+def run_prefix_cache_benchmark(
+    conversations: int = 16,
+    turns: int = 10,
+    instances: int = 4,
+    slots: int = 4,
+    context_words: int = 300,
+    response_tokens: int = 64,
+    prefill_ms_per_token: float = 0.5,
+) -> Dict:
+    cases = [
+        ("legacy", "round_robin"),
+        ("legacy", "affinity"),
+        ("stable", "round_robin"),
+        ("stable", "affinity"),
+    ]
+    results = {}
+    for layout, routing in cases:
+        r = simulate(layout, routing, conversations, turns, instances, slots, context_words, response_tokens)
+        r["prefill_ms_per_request"] = round(
+            r["prefilled_tokens"] * prefill_ms_per_token / (conversations * turns), 2
+        )
+        results[f"{layout}+{routing}"] = r
+    return {
+        "conversations": conversations,
+        "turns": turns,
+        "instances": instances,
+        "slots": slots,
+        "context_words": context_words,
+        "prefill_ms_per_token": prefill_ms_per_token,
+        "cases": results,
+    }
+
+
+def format_prefix_cache(report: Dict) -> str:
+    lines = [f"{'case':<22}{'prompt tok':>12}{'prefilled':>11}{'hit %':>8}{'prefill ms/req':>16}"]
+    for name, r in report["cases"].items():
+        lines.append(
+            f"{name:<22}{r['prompt_tokens']:>12}{r['prefilled_tokens']:>11}"
+            f"{r['cache_hit_ratio'] * 100:>8.1f}{r['prefill_ms_per_request']:>16.2f}"
+        )
+    return "\n".join(lines)
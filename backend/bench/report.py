@@ -0,0 +1,161 @@
+"""
+벤치마크 결과 집계, 저장 및 비교
+"""
+
+import json
+import os
+import subprocess
+import time
+from typing import Dict, List, Optional
+
+
+# 비교 시 회귀 여부를 판단하는 지표 (값이 클수록 나쁨)
+LOWER_IS_BETTER = [
+    ("latency_ms", "p50"),
+    ("latency_ms", "p95"),
+    ("latency_ms", "p99"),
+    ("ttft_ms", "p50"),
+    ("ttft_ms", "p95"),
+    ("backend_cpu_ms_per_request", None),
+    ("backend_cpu_us_per_token", None),
+]
+
+# 값이 작을수록 나쁜 지표
+HIGHER_IS_BETTER = [
+    ("throughput_rps", None),
+]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """선형 보간 백분위수 (값이 없으면 None)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: List[float]) -> Optional[Dict[str, float]]:
+    """p50/p95/p99/평균/최대 요약"""
+    if not values:
+        return None
+    return {
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "mean": round(sum(values) / len(values), 3),
+        "max": round(max(values), 3),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def build_report(results: List[Dict], meta: Dict = None) -> Dict:
+    """시나리오별 결과를 하나의 리포트로 묶음"""
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": _git_commit(),
+        "meta": meta or {},
+        "scenarios": {result["scenario"]: result for result in results},
+    }
+
+
+def save_report(report: Dict, path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def load_report(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _metric(result: Dict, key: str, sub: Optional[str]) -> Optional[float]:
+    value = result.get(key)
+    if sub is not None:
+        value = value.get(sub) if isinstance(value, dict) else None
+    return value if isinstance(value, (int, float)) else None
+
+
+def compare_reports(base: Dict, new: Dict, threshold: float = 0.10) -> List[Dict]:
+    """
+    두 리포트를 비교해 지표별 변화율 반환
+
+    threshold(기본 10%)를 넘게 나빠진 지표는 regression=True로 표시합니다.
+    """
+    rows = []
+    for name, new_result in new.get("scenarios", {}).items():
+        base_result = base.get("scenarios", {}).get(name)
+        if not base_result:
+            continue
+        for key, sub, higher_better in (
+            [(k, s, False) for k, s in LOWER_IS_BETTER] + [(k, s, True) for k, s in HIGHER_IS_BETTER]
+        ):
+            before = _metric(base_result, key, sub)
+            after = _metric(new_result, key, sub)
+            if before is None or after is None or before == 0:
+                continue
+            change = (after - before) / before
+            worse = -change if higher_better else change
+            rows.append({
+                "scenario": name,
+                "metric": f"{key}.{sub}" if sub else key,
+                "base": before,
+                "new": after,
+                "change_pct": round(change * 100, 2),
+                "regression": worse > threshold,
+            })
+    return rows
+
+
+def format_summary(report: Dict) -> str:
+    """콘솔 출력용 요약 표"""
+    lines = [
+        f"{'scenario':<26}{'ok':>6}{'err':>5}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'ttft50':>9}{'cpu/req':>9}{'us/tok':>9}"
+    ]
+
+    def fmt(value):
+        return f"{value:>9.1f}" if isinstance(value, (int, float)) else f"{'-':>9}"
+
+    for name, r in report.get("scenarios", {}).items():
+        latency = r.get("latency_ms") or {}
+        ttft = r.get("ttft_ms") or {}
+        lines.append(
+            f"{name:<26}{r.get('requests', 0):>6}{r.get('errors', 0):>5}"
+            + fmt(r.get("throughput_rps"))
+            + fmt(latency.get("p50"))
+            + fmt(latency.get("p95"))
+            + fmt(latency.get("p99"))
+            + fmt(ttft.get("p50"))
+            + fmt(r.get("backend_cpu_ms_per_request"))
+            + fmt(r.get("backend_cpu_us_per_token"))
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[Dict]) -> str:
+    lines = [f"{'scenario':<26}{'metric':<30}{'base':>10}{'new':>10}{'change':>9}"]
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(
+            f"{row['scenario']:<26}{row['metric']:<30}{row['base']:>10.2f}{row['new']:>10.2f}"
+            f"{row['change_pct']:>8.1f}%{flag}"
+        )
+    return "\n".join(lines)
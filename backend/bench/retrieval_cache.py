@@ -0,0 +1,135 @@
+"""
+검색 결과 캐시 벤치마크
+
+Zipf 분포로 반복되는 질문(대소문자/공백/물음표만 다른 변형 포함)을 QUANTIZED 컬렉션에 보내
+캐시 없음 vs 캐시 사용의 검색 지연과 적중률을 비교합니다.
+중간에 index_documents로 문서를 추가해 무효화 후 결과가 캐시 없는 검색과 같은지도 확인합니다.
+
+임베딩은 HashEmbeddings에 고정 지연(--embed-ms)을 더해 원격 임베딩 호출을 흉내 냅니다.
+"""
+
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from app.chains.rag_chain import get_retriever, get_text_splitter, get_vector_store, index_documents
+from app.utils.retrieval_cache import normalize_query, retrieval_cache
+from bench.chunking import TOPICS, HashEmbeddings, make_corpus
+from bench.report import summarize
+
+
+class DelayedEmbeddings(Embeddings):
+    """호출마다 고정 지연을 더하는 임베딩 래퍼"""
+
+    def __init__(self, embeddings: Embeddings, delay_ms: float):
+        self.embeddings = embeddings
+        self.delay = delay_ms / 1000
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.delay)
+        return self.embeddings.embed_query(text)
+
+
+def make_queries(count: int, distinct: int, zipf_s: float = 1.1, seed: int = 5) -> List[str]:
+    """Zipf 분포 질문 목록 (같은 질문의 표기 변형 포함)"""
+    rng = random.Random(seed)
+    words = " ".join(TOPICS.values()).split()
+    pool = [" ".join(rng.sample(words, 4)) for _ in range(distinct)]
+    weights = [1 / (rank + 1) ** zipf_s for rank in range(distinct)]
+    variants = [
+        lambda q: q,
+        lambda q: q.capitalize() + "?",
+        lambda q: "  " + q.upper(),
+        lambda q: q.replace(" ", "  ") + ".",
+    ]
+    return [rng.choice(variants)(q) for q in rng.choices(pool, weights=weights, k=count)]
+
+
+def _run(retriever, queries: List[str]) -> List[float]:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        retriever.invoke(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def run_retrieval_cache_benchmark(
+    docs: int = 200,
+    queries: int = 2000,
+    distinct: int = 200,
+    k: int = 5,
+    embed_ms: float = 5.0,
+) -> Dict:
+    embeddings = DelayedEmbeddings(HashEmbeddings(), embed_ms)
+    splitter = get_text_splitter("RECURSIVE", chunk_size=500, chunk_overlap=50)
+    texts, _ = make_corpus(docs)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vectorstore = get_vector_store(
+            "QUANTIZED", embeddings, collection_name="bench", settings_dict={"persist_directory": tmp}
+        )
+        chunks = index_documents([Document(page_content=t) for t in texts], vectorstore, splitter)
+        workload = make_queries(queries, distinct)
+        plain = vectorstore.as_retriever(
+            search_type="similarity_score_threshold", search_kwargs={"k": k, "score_threshold": 0.0}
+        )
+        cached = get_retriever(vectorstore, top_k=k, score_threshold=0.0)
+
+        retrieval_cache.clear()
+        before = retrieval_cache.stats()
+        results = {
+            "no_cache": summarize(_run(plain, workload)),
+            "cache": summarize(_run(cached, workload)),
+        }
+        after = retrieval_cache.stats()
+        hits = after["hits"] - before["hits"]
+        misses = after["misses"] - before["misses"]
+
+        # 쓰기 후 무효화 확인: 새 문서가 섞인 결과를 캐시 없는 검색과 비교
+        extra, _ = make_corpus(docs // 4 or 1, seed=42)
+        index_documents([Document(page_content=t) for t in extra], vectorstore, splitter)
+        stale_before = retrieval_cache.stats()["stale"]
+        check = list({normalize_query(q): q for q in workload}.values())[:50]
+        mismatches = sum(
+            [d.id for d in cached.invoke(q)] != [d.id for d in plain.invoke(q)] for q in check
+        )
+        stale = retrieval_cache.stats()["stale"] - stale_before
+
+    return {
+        "docs": docs,
+        "chunks": chunks,
+        "queries": queries,
+        "distinct_questions": distinct,
+        "embed_ms": embed_ms,
+        "latency_ms": results,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        "invalidation": {"checked": len(check), "stale_dropped": stale, "mismatches": mismatches},
+        "cache_stats": retrieval_cache.stats(),
+    }
+
+
+def format_retrieval_cache(report: Dict) -> str:
+    lines = [
+        f"{report['chunks']} chunks, {report['queries']} queries "
+        f"({report['distinct_questions']} distinct, embed {report['embed_ms']} ms)",
+    ]
+    for name, s in report["latency_ms"].items():
+        lines.append(f"{name:<9} p50 {s['p50']:.3f} ms, p99 {s['p99']:.3f} ms, mean {s['mean']:.3f} ms")
+    stats = report["cache_stats"]
+    lines.append(
+        f"hit rate {report['hit_rate'] * 100:.1f}%, entries {stats['entries']}, {stats['bytes'] / 1024:.1f} KiB"
+    )
+    inv = report["invalidation"]
+    lines.append(
+        f"after index_documents: {inv['stale_dropped']}/{inv['checked']} stale entries dropped, "
+        f"{inv['mismatches']} mismatches vs uncached"
+    )
+    return "\n".join(lines)
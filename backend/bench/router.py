@@ -0,0 +1,102 @@
+"""
+채팅 그래프 라우터 오버헤드 벤치마크
+
+- 분류기: 질문 유형이 섞인 합성 요청으로 QueryRouter.route의 소요 시간(µs)과 경로 비율 측정
+- 그래프: LLM 호출 없는 채팅 노드로 router 노드 유무에 따른 LangGraph invoke 시간 차이 측정
+"""
+
+import random
+import time
+from typing import Dict, List
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, StateGraph
+
+from app.graphs.chat_graph import ChatState, add_routed_chat_nodes
+from app.graphs.router import QueryRouter, RouterConfig
+from bench.report import summarize
+
+
+SIMPLE_QUESTIONS = [
+    "안녕하세요", "고마워요!", "오늘 회의 몇 시야?", "hi there", "what is mura?",
+    "라인 결함이 뭐야?", "thanks", "이 용어 영어로 뭐야?", "ok got it", "좋은 아침",
+]
+
+COMPLEX_QUESTIONS = [
+    "지난 분기 패널 불량 데이터를 공정 단계별로 분석해서 주요 원인을 정리해줘",
+    "Compare the etch and coating process defect rates and explain why they differ",
+    "```python\ndef f(x):\n    return x * 2\n```\n이 코드에서 버그 찾아줘",
+    "Design a sampling plan for pixel defect inspection across three production lines, "
+    "taking into account throughput limits, the cost of false rejects and seasonal variation",
+    "단계별로 mura 검출 알고리즘을 구현하는 방법을 알려줘",
+]
+
+
+def make_requests(count: int, simple_ratio: float = 0.6, seed: int = 3) -> List[List]:
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        history = []
+        for _ in range(rng.randint(0, 8)):
+            history += [HumanMessage(content=rng.choice(SIMPLE_QUESTIONS)), AIMessage(content="네, 알겠습니다.")]
+        pool = SIMPLE_QUESTIONS if rng.random() < simple_ratio else COMPLEX_QUESTIONS
+        requests.append(history + [HumanMessage(content=rng.choice(pool))])
+    return requests
+
+
+def _graph(routed: bool):
+    def chat_node(state: ChatState) -> ChatState:
+        return {"messages": [AIMessage(content="ok")]}
+
+    workflow = StateGraph(ChatState)
+    if routed:
+        add_routed_chat_nodes(workflow, chat_node)
+    else:
+        workflow.add_node("chat", chat_node)
+        workflow.set_entry_point("chat")
+        workflow.add_edge("chat", END)
+    return workflow.compile()
+
+
+def run_router_benchmark(count: int = 5000, graph_runs: int = 500, small_model: str = "qwen3:1.7b") -> Dict:
+    router = QueryRouter(RouterConfig(small_model=small_model))
+    requests = make_requests(count)
+
+    overhead = []
+    for messages in requests:
+        start = time.perf_counter()
+        router.route(messages, "qwen3:32b")
+        overhead.append((time.perf_counter() - start) * 1e6)
+
+    # 그래프 단계 추가 비용 (전역 라우터 설정과 무관하게 노드 홉 비용만 비교)
+    graph_ms = {}
+    for name, routed in (("single_node", False), ("with_router", True)):
+        graph = _graph(routed)
+        latencies = []
+        for messages in requests[:graph_runs]:
+            start = time.perf_counter()
+            graph.invoke({"messages": messages, "model_name": "qwen3:32b"})
+            latencies.append((time.perf_counter() - start) * 1000)
+        graph_ms[name] = summarize(latencies)
+
+    return {
+        "requests": count,
+        "classifier_us": summarize(overhead),
+        "router_stats": router.stats.snapshot(),
+        "graph_invoke_ms": graph_ms,
+    }
+
+
+def format_router(report: Dict) -> str:
+    c = report["classifier_us"]
+    stats = report["router_stats"]
+    lines = [
+        f"classifier: p50 {c['p50']:.1f} µs, p99 {c['p99']:.1f} µs, mean {c['mean']:.1f} µs",
+        f"routes: {stats['routes']} (small {stats['small_ratio'] * 100:.1f}%)",
+        f"reasons: {stats['reasons']}",
+    ]
+    g = report["graph_invoke_ms"]
+    for name, s in g.items():
+        lines.append(f"graph {name:<12} p50 {s['p50']:.3f} ms, p99 {s['p99']:.3f} ms")
+    lines.append(f"router node added: {g['with_router']['p50'] - g['single_node']['p50']:.3f} ms (p50)")
+    return "\n".join(lines)
@@ -0,0 +1,145 @@
+"""
+샤드 컬렉션 fan-out 검색 벤치마크
+
+합성 벡터를 한 QUANTIZED 컬렉션과 N개 샤드(get_vector_store의 shards 설정)에 같은 내용으로 넣고 다음을 비교합니다.
+- 검색 지연 p50/p99: 단일 컬렉션 vs 샤드 동시 검색 + 전역 top-k 병합
+- 병합 결과 일치율: 단일 컬렉션 top-k 대비 샤드 병합 top-k의 겹침 (점수 정규화가 맞으면 1.0)
+- 느린 샤드: 샤드 하나에 고정 지연을 넣고 timeout으로 끊었을 때의 지연, partial 비율, 일치율
+  (timeout_ms를 주지 않으면 샤드 검색 p99의 3배)
+
+샤드 검색은 스레드에서 NumPy로 실행되므로 지연 개선 폭은 CPU 코어 수에 따라 달라집니다.
+(로컬 저장소는 동시 검색 수가 코어 수로 제한되어, 1코어에서는 샤드를 차례로 검색)
+"""
+
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.chains.rag_chain import get_vector_store
+from bench.chunking import HashEmbeddings
+from bench.report import summarize
+from bench.vectorstore import make_vectors
+
+
+def _fill(vectorstore, vectors: np.ndarray, batch: int = 20000):
+    """행 번호를 본문으로 넣음 (샤드 저장소는 route()로 나눠서)"""
+    texts = [str(i) for i in range(len(vectors))]
+    if not hasattr(vectorstore, "shards"):
+        for start in range(0, len(texts), batch):
+            vectorstore.add_embeddings(texts[start:start + batch], vectors[start:start + batch])
+        return
+    groups: Dict[str, List[int]] = {}
+    for i, text in enumerate(texts):
+        groups.setdefault(vectorstore.route(Document(page_content=text)), []).append(i)
+    for name, rows in groups.items():
+        for start in range(0, len(rows), batch):
+            part = rows[start:start + batch]
+            vectorstore.shards[name].add_embeddings([texts[i] for i in part], vectors[part])
+
+
+def _run(vectorstore, queries: np.ndarray, k: int, timeout: float = None):
+    latencies, tops, partial = [], [], 0
+    for q in queries:
+        start = time.perf_counter()
+        if hasattr(vectorstore, "shards"):
+            hits = vectorstore.similarity_search_by_vector_with_relevance_scores(q.tolist(), k, timeout=timeout)
+            partial += hits.partial
+        else:
+            hits = vectorstore.similarity_search_by_vector_with_score(q.tolist(), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        tops.append({doc.page_content for doc, _ in hits})
+    return latencies, tops, partial
+
+
+def _overlap(truth: List[set], found: List[set]) -> float:
+    return round(float(np.mean([len(t & f) / max(1, len(t)) for t, f in zip(truth, found)])), 4)
+
+
+def run_sharding_benchmark(
+    count: int = 200_000,
+    dim: int = 384,
+    shards: int = 4,
+    queries: int = 200,
+    k: int = 10,
+    slow_ms: float = 500.0,
+    timeout_ms: float = None,
+) -> Dict:
+    vectors = make_vectors(count, dim)
+    query_vectors = make_vectors(queries, dim, seed=99)
+    embeddings = HashEmbeddings()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        single = get_vector_store("QUANTIZED", embeddings, "single", settings_dict={"persist_directory": tmp})
+        sharded = get_vector_store(
+            "QUANTIZED",
+            embeddings,
+            "sharded",
+            settings_dict={"persist_directory": tmp, "shards": shards, "shard_timeout": 0},
+        )
+        _fill(single, vectors)
+        _fill(sharded, vectors)
+        sizes = {name: store.meta["count"] for name, store in sharded.shards.items()}
+
+        _run(single, query_vectors[:10], k)
+        _run(sharded, query_vectors[:10], k)
+        single_lat, truth, _ = _run(single, query_vectors, k)
+        sharded_lat, found, _ = _run(sharded, query_vectors, k)
+        if timeout_ms is None:
+            timeout_ms = round(summarize(sharded_lat)["p99"] * 3, 1)
+
+        # 샤드 하나를 느리게 만들고 timeout으로 끊음
+        slow_name = next(iter(sharded.shards))
+        slow_shard = sharded.shards[slow_name]
+        search = slow_shard.similarity_search_by_vector_with_score
+
+        def slow_search(*args, **kwargs):
+            time.sleep(slow_ms / 1000)
+            return search(*args, **kwargs)
+
+        slow_shard.similarity_search_by_vector_with_score = slow_search
+        slow_lat, slow_found, partial = _run(sharded, query_vectors, k, timeout=timeout_ms / 1000)
+        # 시간 초과된 검색이 끝날 때까지 대기 (임시 디렉토리 정리 전)
+        time.sleep(slow_ms / 1000 * 2)
+        shard_stats = sharded.stats()
+
+    return {
+        "count": count,
+        "dim": dim,
+        "k": k,
+        "max_parallel": sharded.max_parallel,
+        "shards": sizes,
+        "single": {"latency_ms": summarize(single_lat)},
+        "sharded": {"latency_ms": summarize(sharded_lat), "overlap_at_k": _overlap(truth, found)},
+        "slow_shard": {
+            "shard": slow_name,
+            "slow_ms": slow_ms,
+            "timeout_ms": timeout_ms,
+            "latency_ms": summarize(slow_lat),
+            "partial_ratio": round(partial / len(query_vectors), 4),
+            "overlap_at_k": _overlap(truth, slow_found),
+        },
+        "shard_stats": shard_stats,
+    }
+
+
+def format_sharding(report: Dict) -> str:
+    single, sharded, slow = report["single"], report["sharded"], report["slow_shard"]
+    lines = [
+        f"{report['count']} x {report['dim']} vectors, k={report['k']}, parallel {report['max_parallel']}, shards: "
+        + ", ".join(f"{name}={size}" for name, size in report["shards"].items()),
+        f"single collection: p50 {single['latency_ms']['p50']:.2f}ms, p99 {single['latency_ms']['p99']:.2f}ms",
+        f"sharded fan-out:   p50 {sharded['latency_ms']['p50']:.2f}ms, p99 {sharded['latency_ms']['p99']:.2f}ms, "
+        f"overlap@k vs single {sharded['overlap_at_k']:.4f}",
+        f"slow shard ({slow['shard']} +{slow['slow_ms']:.0f}ms, timeout {slow['timeout_ms']:.0f}ms): "
+        f"p50 {slow['latency_ms']['p50']:.2f}ms, p99 {slow['latency_ms']['p99']:.2f}ms, "
+        f"partial {slow['partial_ratio']:.0%}, overlap@k {slow['overlap_at_k']:.4f}",
+    ]
+    for name, s in report["shard_stats"].items():
+        lines.append(
+            f"  {name}: searches {s['searches']}, timeouts {s['timeouts']}, errors {s['errors']}, "
+            f"p50 {s['latency_ms']['p50']:.2f}ms"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,39 @@
+"""
+테스트 공용 fixture
+
+Ollama나 벡터 DB 없이 돌도록 LangChain의 in-memory 구현을 씁니다.
+- 임베딩: DeterministicFakeEmbedding (같은 텍스트는 같은 벡터)
+- 벡터 저장소: InMemoryVectorStore
+- LLM: GenericFakeChatModel (응답을 공백 단위 청크로 스트리밍)
+"""
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.vectorstores import InMemoryVectorStore
+
+
+ANSWER = "불량 원인은 온도 편차 입니다"
+
+DOCUMENTS = [
+    Document(id="doc-1", page_content="공정 불량 원인", metadata={"source": "a.md"}),
+    Document(id="doc-2", page_content="설비 점검 주기", metadata={"source": "b.md"}),
+]
+
+
+def make_fake_llm(answer: str = ANSWER) -> GenericFakeChatModel:
+    return GenericFakeChatModel(messages=iter([AIMessage(content=answer)]))
+
+
+@pytest.fixture
+def embeddings():
+    return DeterministicFakeEmbedding(size=32)
+
+
+@pytest.fixture
+def vectorstore(embeddings):
+    store = InMemoryVectorStore(embeddings)
+    store.add_documents(DOCUMENTS)
+    return store
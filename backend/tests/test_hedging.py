@@ -0,0 +1,116 @@
+import asyncio
+from typing import Any, AsyncIterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from app.chains.hedging import HedgedChatModel, HedgePolicy
+
+
+class SlowChatModel(BaseChatModel):
+    """첫 청크 전에 delay_s만큼 기다린 뒤 reply를 단어 단위로 스트리밍"""
+
+    reply: str
+    delay_s: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        raise NotImplementedError
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.delay_s)
+        for word in self.reply.split(" "):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+            if run_manager:
+                await run_manager.on_llm_new_token(word, chunk=chunk)
+            yield chunk
+
+
+class RunRecorder(AsyncCallbackHandler):
+    def __init__(self):
+        self.started = []
+        self.tokens = []
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self.started.append((run_id, parent_run_id))
+
+    async def on_llm_new_token(self, token, *, run_id, **kwargs):
+        self.tokens.append((run_id, token))
+
+
+def _stream(model, config=None):
+    async def run():
+        return [chunk async for chunk in model.astream([HumanMessage(content="질문")], config=config)]
+
+    return asyncio.run(run())
+
+
+def test_secondary_win_does_not_record_primary_ttft():
+    policy = HedgePolicy(delay_ms=20, min_samples=1, budget_ratio=1.0)
+    model = HedgedChatModel(
+        primary=SlowChatModel(reply="느린 응답", delay_s=0.5),
+        secondaries=[SlowChatModel(reply="빠른 응답")],
+        policy=policy,
+    )
+
+    chunks = _stream(model)
+
+    assert "".join(chunk.content for chunk in chunks) == "빠른응답"
+    assert chunks[0].response_metadata["hedge"]["winner"] == 1
+    assert policy.stats["secondary_wins"] == 1
+    # 주 LLM의 TTFT는 관측되지 않았으므로 표본 없음 → 지연 기준은 그대로
+    assert policy.snapshot()["ttft_samples"] == 0
+    assert policy.current_delay_ms() == 20
+
+
+def test_primary_win_records_ttft():
+    policy = HedgePolicy(delay_ms=1000, min_samples=1)
+    model = HedgedChatModel(primary=SlowChatModel(reply="답변"), secondaries=[SlowChatModel(reply="x")], policy=policy)
+
+    _stream(model)
+
+    assert policy.snapshot()["ttft_samples"] == 1
+    assert policy.current_delay_ms() < 1000
+
+
+def test_candidate_runs_report_to_callbacks():
+    recorder = RunRecorder()
+    model = HedgedChatModel(
+        primary=SlowChatModel(reply="주 응답"),
+        secondaries=[SlowChatModel(reply="보조")],
+        policy=HedgePolicy(delay_ms=1000),
+    )
+
+    _stream(model, config={"callbacks": [recorder], "tags": ["rag"]})
+
+    # 헤징 모델 실행과 주 LLM 실행이 모두 호출자 콜백에 기록됨
+    (outer, _), (inner, _) = recorder.started
+    assert [token for run_id, token in recorder.tokens if run_id == inner] == ["주", "응답"]
+    assert [token for run_id, token in recorder.tokens if run_id == outer] == ["주", "응답"]
+
+
+def test_ainvoke_nests_candidate_run():
+    recorder = RunRecorder()
+    model = HedgedChatModel(
+        primary=SlowChatModel(reply="주 응답"),
+        secondaries=[SlowChatModel(reply="보조")],
+        policy=HedgePolicy(delay_ms=1000),
+    )
+
+    message = asyncio.run(model.ainvoke([HumanMessage(content="질문")], config={"callbacks": [recorder]}))
+
+    assert message.content == "주응답"
+    (outer, _), (inner, parent) = recorder.started
+    assert parent == outer
+    assert [token for run_id, token in recorder.tokens if run_id == inner] == ["주", "응답"]
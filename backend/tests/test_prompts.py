@@ -0,0 +1,23 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from app.chains.prompts import NO_THINK_SUFFIX, RAG_SYSTEM_PROMPT, assemble_rag_messages, build_rag_system_prompt
+from app.chains.rag_chain import rag_prompt
+
+
+def test_rag_prompt_matches_canonical_layout():
+    history = [HumanMessage(content="이전 질문"), AIMessage(content="이전 답변")]
+    messages = rag_prompt("OLLAMA").invoke({"question": "질문", "context": "문서", "history": history})
+
+    assert messages == assemble_rag_messages(build_rag_system_prompt("OLLAMA"), history, "질문", "문서")
+    # [시스템] + 히스토리 + 질문 + 컨텍스트
+    assert isinstance(messages[0], SystemMessage)
+    assert messages[0].content == RAG_SYSTEM_PROMPT + NO_THINK_SUFFIX
+    assert messages[1:3] == history
+    assert messages[3].content == "질문"
+    assert "문서" in messages[4].content
+
+
+def test_custom_context_template_uses_single_message():
+    messages = rag_prompt("OPENAI", "시스템", "{context} / {question}").invoke({"question": "질문", "context": "문서"})
+
+    assert [m.content for m in messages] == ["시스템", "문서 / 질문"]
@@ -0,0 +1,30 @@
+import asyncio
+
+from app.utils.pull_jobs import PullJobManager
+
+
+def test_cancelled_pull_reaches_terminal_state(monkeypatch):
+    async def hang(self, job, host):
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(PullJobManager, "_pull", hang)
+
+    async def run():
+        manager = PullJobManager()
+        job, _ = manager.start("llama3", host="http://ollama.invalid")
+        await asyncio.sleep(0)
+        assert job.state == "running"
+
+        waiter = asyncio.create_task(manager.wait(job))
+        manager._tasks[job.id].cancel()
+        await asyncio.wait_for(waiter, 1)
+
+        # 취소된 작업은 중복 제거 대상이 아님
+        again, created = manager.start("llama3", host="http://ollama.invalid")
+        manager._tasks[again.id].cancel()
+        return job, created
+
+    job, created = asyncio.run(run())
+    assert job.state == "cancelled"
+    assert job.done and job.finished_at is not None
+    assert created
@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.routes import rag
+from app.chains.rag_stream import stream_rag_events
+from app.main import app
+from tests.conftest import ANSWER, make_fake_llm
+
+
+def _collect(question, embeddings, vectorstore, **kwargs):
+    async def run():
+        return [
+            event
+            async for event in stream_rag_events(
+                question=question,
+                history=[],
+                embeddings=embeddings,
+                vectorstore=vectorstore,
+                make_llm=lambda max_tokens: make_fake_llm(),
+                **kwargs,
+            )
+        ]
+
+    return asyncio.run(run())
+
+
+def _sse_events(text: str):
+    return [json.loads(block[len("data: "):]) for block in text.split("\n\n") if block.startswith("data: ")]
+
+
+def test_events_in_order_with_timings(embeddings, vectorstore):
+    events = _collect("공정 불량 원인", embeddings, vectorstore, top_k=1, score_threshold=0.9)
+
+    types = [event["type"] for event in events]
+    assert types[0] == "context"
+    assert types[-1] == "done"
+    assert set(types[1:-1]) == {"token"}
+
+    context, done = events[0], events[-1]
+    # 질문과 같은 문서는 임베딩이 같아 relevance 1.0
+    assert [doc["id"] for doc in context["documents"]] == ["doc-1"]
+    assert context["documents"][0]["score"] == pytest.approx(1.0)
+    assert {"embed_ms", "setup_ms", "search_ms", "pack_ms", "context_ready_ms"} <= set(context["timings"])
+
+    assert done["full_response"] == ANSWER
+    assert done["token_count"] == len(types) - 2
+    assert {"embed_ms", "search_ms", "pack_ms", "ttft_ms", "total_ms"} <= set(done["timings"])
+    assert done["timings"]["ttft_ms"] <= done["timings"]["total_ms"]
+    assert done["partial"] is False
+
+
+def test_score_threshold_filters_context(embeddings, vectorstore):
+    events = _collect("관련 없는 질문", embeddings, vectorstore, score_threshold=0.99)
+
+    assert events[0]["documents"] == []
+    assert events[-1]["full_response"] == ANSWER
+
+
+@pytest.fixture
+def client(monkeypatch, embeddings, vectorstore):
+    monkeypatch.setattr(rag, "get_rag_components", lambda pipeline: (embeddings, vectorstore))
+    monkeypatch.setattr(rag, "get_rag_llm", lambda **kwargs: make_fake_llm())
+    return TestClient(app)
+
+
+def test_chat_stream_endpoint(client):
+    response = client.post(
+        "/rag/chat/stream",
+        json={
+            "messages": [{"role": "user", "content": "공정 불량 원인"}],
+            "pipeline": {"top_k": 2, "score_threshold": 0.9},
+            "hedge": False,
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _sse_events(response.text)
+    assert events[0]["type"] == "rag_context"
+    assert [doc["id"] for doc in events[0]["documents"]] == ["doc-1"]
+    assert "search_ms" in events[0]["timings"]
+    tokens = events[1:-1]
+    assert tokens and all(set(event) == {"content"} for event in tokens)
+    assert events[-1]["done"] is True
+    assert events[-1]["full_response"] == "".join(event["content"] for event in tokens) == ANSWER
+    assert "ttft_ms" in events[-1]["timings"]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"messages": [{"role": "user", "content": "질문"}], "pipeline": "CHROMA"},
+        {"messages": [{"role": "assistant", "content": "답변"}]},
+        {"messages": []},
+    ],
+)
+def test_chat_stream_rejects_bad_request(client, body):
+    assert client.post("/rag/chat/stream", json=body).status_code == 400
+
+
+def test_chat_stream_rejects_unsupported_vectordb():
+    # FAISS는 빈 저장소를 만들 수 없어 스트리밍 RAG 파이프라인 설정 오류
+    response = TestClient(app).post(
+        "/rag/chat/stream",
+        json={
+            "messages": [{"role": "user", "content": "질문"}],
+            "pipeline": {"vectordb_type": "FAISS", "vectordb_collection": "test-unsupported"},
+        },
+    )
+
+    assert response.status_code == 400
+    assert "FAISS" in response.json()["detail"]